@@ -0,0 +1,12 @@
+"""
+Normalização de textos usada nas buscas de todos os apps.
+"""
+import unicodedata
+
+
+def normalizar_texto(valor):
+    """Remove acentos, converte para minúsculas e reduz os espaços."""
+    if not valor:
+        return ''
+    sem_acentos = unicodedata.normalize('NFKD', str(valor)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sem_acentos.lower().split())
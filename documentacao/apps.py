@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DocumentacaoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'documentacao'
+
+    def ready(self):
+        import documentacao.signals  # Importa os sinais para que sejam registrados
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from documentacao.models import FotosVideoImovel
+
+
+class Command(BaseCommand):
+    help = "Calcula o hash perceptual das imagens de imóveis que ainda não o possuem."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Quantidade de mídias gravadas por UPDATE em lote")
+
+    def handle(self, *args, **options):
+        campos = ['phash', 'phash_seg0', 'phash_seg1', 'phash_seg2', 'phash_seg3']
+        midias = FotosVideoImovel.objects.filter(phash__isnull=True, formato__iexact='imagem').order_by('id')
+
+        pendentes = []
+        total = 0
+        for midia in midias.iterator(chunk_size=options['lote']):
+            midia.atualizar_phash()
+            midia.arquivo.close()
+            if midia.phash is None:
+                continue
+            pendentes.append(midia)
+            if len(pendentes) >= options['lote']:
+                FotosVideoImovel.objects.bulk_update(pendentes, campos)
+                total += len(pendentes)
+                pendentes = []
+
+        FotosVideoImovel.objects.bulk_update(pendentes, campos)
+        total += len(pendentes)
+        self.stdout.write(f"{total} imagem(ns) com hash perceptual calculado.")
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from documentacao.models import DocumentoPessoaFisica, DocumentoPessoaJuridica, DocumentoImovel
+
+
+class Command(BaseCommand):
+    help = "Marca como vencidos os documentos cuja data de validade já passou. Deve ser executado diariamente."
+
+    def handle(self, *args, **options):
+        hoje = timezone.now().date()
+
+        # Um único UPDATE por modelo, filtrando pelo índice de data_validade,
+        # sem carregar os documentos em memória
+        for modelo in (DocumentoPessoaFisica, DocumentoPessoaJuridica, DocumentoImovel):
+            total = modelo.objects.filter(data_validade__lt=hoje, vencido=False).update(vencido=True)
+            self.stdout.write(f"{modelo.__name__}: {total} documento(s) marcado(s) como vencido(s).")
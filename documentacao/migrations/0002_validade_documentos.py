@@ -0,0 +1,90 @@
+# Generated by Django 5.1 on 2026-10-19 11:17
+
+import datetime
+from django.db import migrations, models
+
+
+# Cópia da tabela de validade no momento desta migração
+VALIDADE_DOCUMENTOS = {
+    'cnd': 180,
+    'iptu': 90,
+    'condominio': 30,
+    'onus_reais': 30,
+    'matricula': 30,
+    'cert_negativa_deb_tributarios': 180,
+    'cert_regul_fgts': 30,
+    'comprovante_renda': 90,
+    'comprovante_residencia': 90,
+}
+
+
+TAMANHO_LOTE = 1000
+
+
+def preencher_data_validade(apps, schema_editor):
+    hoje = datetime.date.today()
+    for nome_modelo in ('DocumentoPessoaFisica', 'DocumentoPessoaJuridica', 'DocumentoImovel'):
+        modelo = apps.get_model('documentacao', nome_modelo)
+        documentos = modelo.objects.filter(tipo_documento__in=VALIDADE_DOCUMENTOS).only('id', 'tipo_documento', 'data_emissao')
+        # Grava um lote por vez, sem manter a tabela inteira em memória
+        lote = []
+        for documento in documentos.iterator(chunk_size=TAMANHO_LOTE):
+            documento.data_validade = documento.data_emissao + datetime.timedelta(days=VALIDADE_DOCUMENTOS[documento.tipo_documento])
+            documento.vencido = documento.data_validade < hoje
+            lote.append(documento)
+            if len(lote) == TAMANHO_LOTE:
+                modelo.objects.bulk_update(lote, ['data_validade', 'vencido'])
+                lote = []
+        if lote:
+            modelo.objects.bulk_update(lote, ['data_validade', 'vencido'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentacao', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='documentoimovel',
+            name='data_validade',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='Calculada a partir de data_emissao e do tipo do documento', null=True),
+        ),
+        migrations.AddField(
+            model_name='documentoimovel',
+            name='vencido',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='documentopessoafisica',
+            name='data_validade',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='Calculada a partir de data_emissao e do tipo do documento', null=True),
+        ),
+        migrations.AddField(
+            model_name='documentopessoafisica',
+            name='vencido',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='documentopessoajuridica',
+            name='data_validade',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='Calculada a partir de data_emissao e do tipo do documento', null=True),
+        ),
+        migrations.AddField(
+            model_name='documentopessoajuridica',
+            name='vencido',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='data_validade',
+            field=models.DateField(blank=True, db_index=True, editable=False, help_text='Calculada a partir de data_emissao e do tipo do documento', null=True),
+        ),
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='vencido',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(preencher_data_validade, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentacao', '0002_validade_documentos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='phash',
+            field=models.BigIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='phash_seg0',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='phash_seg1',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='phash_seg2',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='fotosvideoimovel',
+            name='phash_seg3',
+            field=models.PositiveIntegerField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1 on 2026-10-19 12:33
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentacao', '0003_phash_midias'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='fotosvideoimovel',
+            name='data_validade',
+        ),
+        migrations.RemoveField(
+            model_name='fotosvideoimovel',
+            name='vencido',
+        ),
+    ]
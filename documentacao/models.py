@@ -1,4 +1,23 @@
 from django.db import models
+from django.utils import timezone
+from documentacao.phash import NUM_SEGMENTOS, calcular_dhash, distancia_hamming, para_assinado, segmentos, variantes
+import datetime
+
+
+# Validade, em dias a partir de `data_emissao`, dos tipos de documento que expiram.
+# Tipos ausentes desta tabela não possuem prazo de validade.
+VALIDADE_DOCUMENTOS = {
+    'cnd': 180,
+    'iptu': 90,
+    'condominio': 30,
+    'onus_reais': 30,
+    'matricula': 30,
+    'cert_negativa_deb_tributarios': 180,
+    'cert_regul_fgts': 30,
+    'comprovante_renda': 90,
+    'comprovante_residencia': 90,
+}
+
 
 class Documento(models.Model):
     descricao = models.CharField(max_length=255)
@@ -7,9 +26,32 @@ class Documento(models.Model):
 
     class Meta:
         abstract = True
-        
 
-class DocumentoPessoaFisica(Documento):
+
+class DocumentoComValidade(Documento):
+    """Documento cujo `tipo_documento` pode expirar, conforme `VALIDADE_DOCUMENTOS`."""
+    data_validade = models.DateField(null=True, blank=True, db_index=True, editable=False,
+                                     help_text="Calculada a partir de data_emissao e do tipo do documento")
+    vencido = models.BooleanField(default=False, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def calcular_data_validade(self):
+        """Retorna a data de validade do documento ou None se o tipo não expira."""
+        dias = VALIDADE_DOCUMENTOS.get(self.tipo_documento)
+        if dias is None or not self.data_emissao:
+            return None
+        data_emissao = self._meta.get_field('data_emissao').to_python(self.data_emissao)
+        return data_emissao + datetime.timedelta(days=dias)
+
+    def save(self, *args, **kwargs):
+        self.data_validade = self.calcular_data_validade()
+        self.vencido = self.data_validade is not None and self.data_validade < timezone.now().date()
+        super().save(*args, **kwargs)
+
+
+class DocumentoPessoaFisica(DocumentoComValidade):
     pessoa_fisica = models.ForeignKey('core.PessoaFisica', on_delete=models.CASCADE, related_name='documentos')
     tipo_documento = models.CharField(max_length=50, choices=[('CPF', 'CPF'), ('RG', 'RG'), ('CNH', 'CNH'), 
                                                               ('certidao_nascimento', 'Certidão Nascimento'), 
@@ -22,7 +64,7 @@ class DocumentoPessoaFisica(Documento):
         return f"{self.tipo_documento} - {self.pessoa_fisica.nome}"
     
 
-class DocumentoPessoaJuridica(Documento):
+class DocumentoPessoaJuridica(DocumentoComValidade):
     pessoa_juridica = models.ForeignKey('core.PessoaJuridica', on_delete=models.CASCADE, related_name='documentos')
     tipo_documento = models.CharField(max_length=50, choices=[('CNPJ', 'CNPJ'), 
                                                               ('contrato_social', 'Contrato Social'),
@@ -33,7 +75,7 @@ class DocumentoPessoaJuridica(Documento):
         return f"{self.tipo_documento} - {self.pessoa_juridica.nome}"
 
 
-class DocumentoImovel(Documento):
+class DocumentoImovel(DocumentoComValidade):
     TIPO_DOCUMENTO_CHOICES = [
         ('escritura', 'Escritura Pública'),
         ('matricula', 'Certidão de Matrícula'),
@@ -75,7 +117,148 @@ class FotosVideoImovel(Documento):
     ]
     formato = models.CharField(max_length=10, choices=FORMATO_CHOICES, default='Imagem')
 
+    # Hash perceptual (dHash) da imagem e seus 4 segmentos de 16 bits, usados na busca por semelhantes
+    phash = models.BigIntegerField(null=True, blank=True, editable=False, db_index=True)
+    phash_seg0 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    phash_seg1 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    phash_seg2 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+    phash_seg3 = models.PositiveIntegerField(null=True, blank=True, editable=False, db_index=True)
+
+    DISTANCIA_MAXIMA_SEMELHANTES = 11
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o imóvel original para atualizar os dois resumos quando a mídia muda de imóvel
+        instance._imovel_id_original = instance.__dict__.get('imovel_id')
+        return instance
+
+    def atualizar_phash(self):
+        """Calcula o hash perceptual da mídia, quando for uma imagem."""
+        valor = None
+        if self.formato.lower() == 'imagem' and self.arquivo:
+            valor = calcular_dhash(self.arquivo)
+
+        if valor is None:
+            self.phash = None
+            self.phash_seg0 = self.phash_seg1 = self.phash_seg2 = self.phash_seg3 = None
+        else:
+            self.phash = para_assinado(valor)
+            self.phash_seg0, self.phash_seg1, self.phash_seg2, self.phash_seg3 = segmentos(valor)
+
+    def save(self, *args, **kwargs):
+        # O hash só é recalculado quando um novo arquivo é enviado ou o formato deixa de ser imagem
+        if not getattr(self.arquivo, '_committed', True) or (self.phash is not None and self.formato.lower() != 'imagem'):
+            self.atualizar_phash()
+        super().save(*args, **kwargs)
+
+    def buscar_semelhantes(self, distancia_maxima=6):
+        """
+        Retorna as outras mídias cuja distância de Hamming até esta imagem é <= distancia_maxima,
+        como uma lista de tuplas (distancia, midia) ordenada pela distância.
+        """
+        if self.phash is None:
+            return []
+
+        distancia_maxima = min(distancia_maxima, self.DISTANCIA_MAXIMA_SEMELHANTES)
+        raio = distancia_maxima // NUM_SEGMENTOS
+        filtro = models.Q()
+        for indice, segmento in enumerate(segmentos(self.phash)):
+            filtro |= models.Q(**{f'phash_seg{indice}__in': variantes(segmento, raio)})
+
+        semelhantes = []
+        for midia in FotosVideoImovel.objects.filter(filtro).exclude(pk=self.pk):
+            distancia = distancia_hamming(self.phash, midia.phash)
+            if distancia <= distancia_maxima:
+                semelhantes.append((distancia, midia))
+        semelhantes.sort(key=lambda item: (item[0], item[1].id))
+        return semelhantes
+
+    @staticmethod
+    def atualizar_resumo_imovel(imovel_id):
+        """
+        Recalcula a capa e as contagens de fotos e vídeos de um imóvel.
+        Usa uma consulta de agregação e um UPDATE, sem carregar as mídias.
+        """
+        from imovel.models import Imovel
+
+        e_imagem = models.Q(formato__iexact='imagem')
+        resumo = FotosVideoImovel.objects.filter(imovel_id=imovel_id).aggregate(
+            total_fotos=models.Count('id', filter=e_imagem),
+            total_videos=models.Count('id', filter=models.Q(formato__iexact='video')),
+            capa=models.Min('id', filter=e_imagem),
+        )
+        Imovel.objects.filter(pk=imovel_id).update(
+            capa_id=resumo['capa'],
+            total_fotos=resumo['total_fotos'],
+            total_videos=resumo['total_videos'],
+        )
 
     def __str__(self):
         return f"{self.get_tipo_midia_display()} - {self.imovel.nome}"
 
+
+
+# Perfis de documentação exigida, usados no cálculo da matriz de completude.
+# Cada perfil aponta para um único modelo de documento, o campo que o liga à
+# entidade e a lista ordenada de `tipo_documento` obrigatórios. A ordem da
+# lista define a posição de cada tipo no bitmap retornado pela API.
+PERFIS_DOCUMENTACAO = {
+    'locatario_pf': {
+        'descricao': 'Locatário Pessoa Física',
+        'modelo': DocumentoPessoaFisica,
+        'campo_entidade': 'pessoa_fisica_id',
+        'tipos': ['CPF', 'RG', 'comprovante_renda', 'comprovante_residencia'],
+    },
+    'locador_pf': {
+        'descricao': 'Locador Pessoa Física',
+        'modelo': DocumentoPessoaFisica,
+        'campo_entidade': 'pessoa_fisica_id',
+        'tipos': ['CPF', 'RG', 'comprovante_residencia'],
+    },
+    'locatario_pj': {
+        'descricao': 'Locatário Pessoa Jurídica',
+        'modelo': DocumentoPessoaJuridica,
+        'campo_entidade': 'pessoa_juridica_id',
+        'tipos': ['CNPJ', 'contrato_social', 'cert_negativa_deb_tributarios', 'cert_regul_fgts'],
+    },
+    'imovel_venda': {
+        'descricao': 'Imóvel para Venda',
+        'modelo': DocumentoImovel,
+        'campo_entidade': 'imovel_id',
+        'tipos': ['escritura', 'matricula', 'cnd', 'iptu', 'onus_reais', 'habitese'],
+    },
+    'imovel_locacao': {
+        'descricao': 'Imóvel para Locação',
+        'modelo': DocumentoImovel,
+        'campo_entidade': 'imovel_id',
+        'tipos': ['matricula', 'iptu', 'condominio'],
+    },
+}
+
+
+def calcular_completude(perfil, entidade_ids):
+    """
+    Calcula, para cada entidade, quais documentos obrigatórios do perfil ainda faltam.
+
+    Executa uma única consulta agrupada por (entidade, tipo_documento) no modelo do
+    perfil e devolve um dicionário `{entidade_id: mascara}`, em que o bit `i` da
+    máscara indica que o tipo `perfil['tipos'][i]` está faltando.
+    """
+    tipos = perfil['tipos']
+    campo = perfil['campo_entidade']
+    bits = {tipo: 1 << indice for indice, tipo in enumerate(tipos)}
+    mascara_completa = (1 << len(tipos)) - 1
+
+    presentes = (
+        perfil['modelo'].objects
+        .filter(**{f'{campo}__in': entidade_ids, 'tipo_documento__in': tipos})
+        .values(campo, 'tipo_documento')
+        .annotate(total=models.Count('id'))
+    )
+
+    faltantes = {entidade_id: mascara_completa for entidade_id in entidade_ids}
+    for linha in presentes:
+        faltantes[linha[campo]] &= ~bits[linha['tipo_documento']]
+
+    return faltantes
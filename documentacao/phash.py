@@ -0,0 +1,79 @@
+"""
+Hash perceptual (dHash) das fotos de imóveis e funções auxiliares para a busca
+de imagens semelhantes por distância de Hamming.
+
+O hash de 64 bits é dividido em 4 segmentos de 16 bits, cada um gravado em uma
+coluna indexada (multi-index hashing). Pelo princípio da casa dos pombos, duas
+imagens a uma distância de Hamming <= D têm pelo menos um segmento a uma distância
+<= D // 4; assim a busca consulta apenas os valores vizinhos de cada segmento no
+índice, em vez de comparar o hash com todas as imagens.
+"""
+from itertools import combinations
+from PIL import Image
+
+LARGURA_HASH = 9
+ALTURA_HASH = 8
+BITS_HASH = 64
+NUM_SEGMENTOS = 4
+BITS_SEGMENTO = BITS_HASH // NUM_SEGMENTOS
+MASCARA_SEGMENTO = (1 << BITS_SEGMENTO) - 1
+
+
+def calcular_dhash(arquivo):
+    """
+    Calcula o difference hash de 64 bits de uma imagem.
+    Retorna None se o arquivo não puder ser lido como imagem.
+    """
+    try:
+        arquivo.seek(0)
+        with Image.open(arquivo) as imagem:
+            # Em JPEG, decodifica já em escala reduzida, sem carregar a imagem inteira
+            imagem.draft('L', (LARGURA_HASH * 8, ALTURA_HASH * 8))
+            pixels = list(
+                imagem.convert('L').resize((LARGURA_HASH, ALTURA_HASH), Image.Resampling.LANCZOS).getdata()
+            )
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    finally:
+        arquivo.seek(0)
+
+    valor = 0
+    for linha in range(ALTURA_HASH):
+        inicio = linha * LARGURA_HASH
+        for coluna in range(LARGURA_HASH - 1):
+            valor = (valor << 1) | (pixels[inicio + coluna] > pixels[inicio + coluna + 1])
+    return valor
+
+
+def para_assinado(valor):
+    """Converte o hash sem sinal para caber em um BigIntegerField (64 bits com sinal)."""
+    return valor - (1 << BITS_HASH) if valor >= (1 << (BITS_HASH - 1)) else valor
+
+
+def para_sem_sinal(valor):
+    return valor & ((1 << BITS_HASH) - 1)
+
+
+def segmentos(valor):
+    """Divide o hash em segmentos de 16 bits, do mais significativo para o menos significativo."""
+    valor = para_sem_sinal(valor)
+    return [
+        (valor >> (BITS_SEGMENTO * (NUM_SEGMENTOS - 1 - indice))) & MASCARA_SEGMENTO
+        for indice in range(NUM_SEGMENTOS)
+    ]
+
+
+def variantes(segmento, raio):
+    """Retorna todos os valores de segmento a uma distância de Hamming <= raio."""
+    valores = [segmento]
+    for distancia in range(1, raio + 1):
+        for bits in combinations(range(BITS_SEGMENTO), distancia):
+            valor = segmento
+            for bit in bits:
+                valor ^= 1 << bit
+            valores.append(valor)
+    return valores
+
+
+def distancia_hamming(valor_a, valor_b):
+    return (para_sem_sinal(valor_a) ^ para_sem_sinal(valor_b)).bit_count()
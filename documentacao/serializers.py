@@ -7,7 +7,7 @@ class DocPessoaFisicaSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DocumentoPessoaFisica
-        fields = ['id', 'pessoa_fisica', 'tipo_documento', 'descricao', 'arquivo', 'data_emissao']
+        fields = ['id', 'pessoa_fisica', 'tipo_documento', 'descricao', 'arquivo', 'data_emissao', 'data_validade', 'vencido']
 
     def validate_arquivo(self, value):
         ext = os.path.splitext(value.name)[1]
@@ -21,7 +21,7 @@ class DocPessoaJuridicaSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DocumentoPessoaJuridica
-        fields = ['id', 'pessoa_juridica', 'tipo_documento', 'descricao', 'arquivo', 'data_emissao']
+        fields = ['id', 'pessoa_juridica', 'tipo_documento', 'descricao', 'arquivo', 'data_emissao', 'data_validade', 'vencido']
 
     def validate_arquivo(self, value):
         ext = os.path.splitext(value.name)[1]
@@ -35,7 +35,7 @@ class DocImovelSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = DocumentoImovel
-        fields = ['id', 'imovel', 'tipo_documento', 'descricao', 'arquivo', 'data_emissao']
+        fields = ['id', 'imovel', 'tipo_documento', 'descricao', 'arquivo', 'data_emissao', 'data_validade', 'vencido']
 
     def validate_arquivo(self, value):
         ext = os.path.splitext(value.name)[1]
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from documentacao.models import FotosVideoImovel
+
+@receiver(post_save, sender=FotosVideoImovel)
+def atualizar_resumo_midia_ao_salvar(sender, instance, **kwargs):
+    # Atualiza o imóvel atual e, se a mídia foi movida, também o imóvel anterior
+    imovel_original = getattr(instance, '_imovel_id_original', None)
+    FotosVideoImovel.atualizar_resumo_imovel(instance.imovel_id)
+    if imovel_original is not None and imovel_original != instance.imovel_id:
+        FotosVideoImovel.atualizar_resumo_imovel(imovel_original)
+    instance._imovel_id_original = instance.imovel_id
+
+@receiver(post_delete, sender=FotosVideoImovel)
+def atualizar_resumo_midia_ao_remover(sender, instance, **kwargs):
+    FotosVideoImovel.atualizar_resumo_imovel(instance.imovel_id)
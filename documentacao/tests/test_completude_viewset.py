@@ -0,0 +1,82 @@
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from documentacao.models import DocumentoImovel
+from imovel.models import Imovel
+from usuario.models import Usuario
+import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
+
+class CompletudeDocumentacaoViewSetTest(MidiaTemporariaMixin, APITestCase):
+
+    def setUp(self):
+        # Criação do cliente autenticado
+        self.client = APIClient()
+        self.user = Usuario.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+        # Criação de dois imóveis, um com a documentação de locação completa e outro incompleto
+        self.imovel_completo = Imovel.objects.create(nome='Apartamento 101', cep='01234-567', numero_registro='111AAA')
+        self.imovel_incompleto = Imovel.objects.create(nome='Casa 202', cep='01234-567', numero_registro='222BBB')
+
+        for tipo in ['matricula', 'iptu', 'condominio']:
+            self._criar_documento(self.imovel_completo, tipo)
+        self._criar_documento(self.imovel_incompleto, 'iptu')
+        self._criar_documento(self.imovel_incompleto, 'iptu')
+
+    def _criar_documento(self, imovel, tipo):
+        return DocumentoImovel.objects.create(
+            imovel=imovel,
+            tipo_documento=tipo,
+            descricao=f'Documento {tipo}',
+            arquivo=SimpleUploadedFile(f'{tipo}.pdf', b'conteudo do arquivo', content_type='application/pdf'),
+            data_emissao=datetime.date(2024, 1, 1)
+        )
+
+    def test_matriz_completude(self):
+        # Teste da matriz de completude para o perfil de locação
+        url = reverse('completudedocumentacao-list')
+        ids = f'{self.imovel_completo.id},{self.imovel_incompleto.id},9999'
+        response = self.client.get(url, {'perfil': 'imovel_locacao', 'ids': ids})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tipos'], ['matricula', 'iptu', 'condominio'])
+        # matricula = bit 0, iptu = bit 1, condominio = bit 2
+        self.assertEqual(response.data['matriz'], [
+            [self.imovel_completo.id, 0],
+            [self.imovel_incompleto.id, 0b101],
+            [9999, 0b111],
+        ])
+        self.assertEqual(response.data['completos'], 1)
+
+    def test_matriz_completude_uma_consulta(self):
+        # A matriz deve ser calculada com uma única consulta ao modelo de documentos
+        url = reverse('completudedocumentacao-list')
+        with CaptureQueriesContext(connection) as contexto:
+            self.client.get(url, {'perfil': 'imovel_venda', 'ids': f'{self.imovel_completo.id}'})
+        consultas = [q['sql'] for q in contexto.captured_queries if 'documentacao_documentoimovel' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+
+    def test_perfil_invalido(self):
+        # Teste de perfil inexistente
+        url = reverse('completudedocumentacao-list')
+        response = self.client.get(url, {'perfil': 'inexistente', 'ids': '1'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ids_invalidos(self):
+        # Teste de IDs ausentes ou mal formatados
+        url = reverse('completudedocumentacao-list')
+        response = self.client.get(url, {'perfil': 'imovel_venda', 'ids': 'a,b'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'perfil': 'imovel_venda'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_listar_perfis(self):
+        # Teste da listagem de perfis disponíveis
+        url = reverse('completudedocumentacao-perfis')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('locatario_pf', [perfil['value'] for perfil in response.data])
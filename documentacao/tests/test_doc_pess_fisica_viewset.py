@@ -7,8 +7,9 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 import datetime
 from usuario.models import Usuario
 from rest_framework.test import APIClient
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocPessoaFisicaViewSetTest(APITestCase):
+class DocPessoaFisicaViewSetTest(MidiaTemporariaMixin, APITestCase):
 
     def setUp(self):
 
@@ -36,7 +37,7 @@ class DocPessoaFisicaViewSetTest(APITestCase):
 
     def test_create_documento(self):
         url = reverse('docpessoafisica-list')
-        arquivo = SimpleUploadedFile("cpf.pdf", b"file_content", content_type="application/pdf")
+        arquivo = SimpleUploadedFile("cpf.pdf", b"%PDF-1.4 file_content", content_type="application/pdf")
         data = {
             'pessoa_fisica': self.pessoa_fisica.id,
             'tipo_documento': 'CPF',
@@ -78,7 +79,7 @@ class DocPessoaFisicaViewSetTest(APITestCase):
             'tipo_documento': 'RG',
             'descricao': 'RG de João da Silva',
             'data_emissao': '2020-01-01',
-            'arquivo': SimpleUploadedFile("cpf.pdf", b"file_content", content_type="application/pdf"),
+            'arquivo': SimpleUploadedFile("cpf.pdf", b"%PDF-1.4 file_content", content_type="application/pdf"),
         }
         response = self.client.put(url, data, format='multipart')
         #print(response.data)
@@ -6,8 +6,9 @@ from documentacao.serializers import DocPessoaJuridicaSerializer
 import datetime
 from usuario.models import Usuario
 from rest_framework.test import APIClient
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocPessoaJuridicaSerializerTestCase(TestCase):
+class DocPessoaJuridicaSerializerTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
 
@@ -6,8 +6,9 @@ from documentacao.models import DocumentoPessoaJuridica
 from usuario.models import Usuario
 from core.models import PessoaJuridica, Estado
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocumentoPessoaJuridicaViewSetTest(APITestCase):
+class DocumentoPessoaJuridicaViewSetTest(MidiaTemporariaMixin, APITestCase):
 
     def setUp(self):
         self.client = APIClient()
@@ -33,7 +34,7 @@ class DocumentoPessoaJuridicaViewSetTest(APITestCase):
 
     def test_create_documento(self):
         url = reverse('docpessoajuridica-list')
-        arquivo = SimpleUploadedFile("contrato_social.pdf", b"file_content", content_type="application/pdf")
+        arquivo = SimpleUploadedFile("contrato_social.pdf", b"%PDF-1.4 file_content", content_type="application/pdf")
         data = {
             'pessoa_juridica': self.pessoa_juridica.id,
             'tipo_documento': 'contrato_social',
@@ -73,7 +74,7 @@ class DocumentoPessoaJuridicaViewSetTest(APITestCase):
             'tipo_documento': 'cert_negativa_deb_tributarios',
             'descricao': 'Certidão Negativa de Débitos Tributários',
             'data_emissao': '2020-01-01',
-            'arquivo': SimpleUploadedFile("cert_negativa.pdf", b"file_content", content_type="application/pdf"),
+            'arquivo': SimpleUploadedFile("cert_negativa.pdf", b"%PDF-1.4 file_content", content_type="application/pdf"),
         }
         response = self.client.put(url, data, format='multipart')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
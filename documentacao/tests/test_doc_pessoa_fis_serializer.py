@@ -4,8 +4,9 @@ from documentacao.models import DocumentoPessoaFisica
 from documentacao.serializers import DocPessoaFisicaSerializer
 from django.core.files.uploadedfile import SimpleUploadedFile
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocPessoaFisicaSerializerTestCase(TestCase):
+class DocPessoaFisicaSerializerTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         self.estado = Estado.objects.create(sigla='SP', nome='São Paulo')
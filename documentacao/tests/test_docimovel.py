@@ -3,8 +3,9 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from imovel.models import Imovel
 from documentacao.models import DocumentoImovel
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocumentoImovelTestCase(TestCase):
+class DocumentoImovelTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         # Criação de um imóvel completo para associar aos documentos
@@ -4,8 +4,9 @@ from documentacao.serializers import DocImovelSerializer
 from documentacao.models import DocumentoImovel
 from imovel.models import Imovel
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocImovelSerializerTestCase(TestCase):
+class DocImovelSerializerTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         # Criando um imóvel para ser usado nos testes
@@ -6,8 +6,9 @@ from documentacao.models import DocumentoImovel
 from imovel.models import Imovel
 from usuario.models import Usuario
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocumentoImovelViewSetTest(APITestCase):
+class DocumentoImovelViewSetTest(MidiaTemporariaMixin, APITestCase):
 
     def setUp(self):
         # Criação do cliente autenticado
@@ -37,7 +38,7 @@ class DocumentoImovelViewSetTest(APITestCase):
     def test_create_documento_imovel(self):
         # Teste de criação de um documento de imóvel
         url = reverse('documentoimovel-list')
-        arquivo = SimpleUploadedFile("matricula.pdf", b"file_content", content_type="application/pdf")
+        arquivo = SimpleUploadedFile("matricula.pdf", b"%PDF-1.4 file_content", content_type="application/pdf")
         data = {
             'imovel': self.imovel.id,
             'tipo_documento': 'matricula',
@@ -78,7 +79,7 @@ class DocumentoImovelViewSetTest(APITestCase):
             'imovel': self.imovel.id,
             'tipo_documento': 'iptu',
             'descricao': 'Certidão Negativa de IPTU',
-            'arquivo': SimpleUploadedFile("iptu.pdf", b"file_content", content_type="application/pdf"),
+            'arquivo': SimpleUploadedFile("iptu.pdf", b"%PDF-1.4 file_content", content_type="application/pdf"),
             'data_emissao': '2024-01-01'
         }
         response = self.client.put(url, data, format='multipart')
@@ -3,8 +3,9 @@ from core.models import PessoaFisica, Estado
 from documentacao.models import DocumentoPessoaFisica
 from django.core.files.uploadedfile import SimpleUploadedFile
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocPessoaFisicaTestCase(TestCase):
+class DocPessoaFisicaTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         # Criação de objetos iniciais para os testes
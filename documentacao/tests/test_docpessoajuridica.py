@@ -3,8 +3,9 @@ from core.models import PessoaJuridica, Estado
 from documentacao.models import DocumentoPessoaJuridica
 from django.core.files.uploadedfile import SimpleUploadedFile
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class DocPessoaJuridicaTestCase(TestCase):
+class DocPessoaJuridicaTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         # Criação de objetos iniciais para os testes
@@ -3,8 +3,9 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from documentacao.models import FotosVideoImovel
 from imovel.models import Imovel
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class FotosVideoImovelTestCase(TestCase):
+class FotosVideoImovelTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         # Criação de um imóvel completo para associar aos arquivos de mídia
@@ -5,8 +5,9 @@ from imovel.models import Imovel
 from documentacao.serializers import FotosVideoImovelSerializer
 from django.core.files.uploadedfile import SimpleUploadedFile
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class FotosVideoImovelSerializerTestCase(TestCase):
+class FotosVideoImovelSerializerTestCase(MidiaTemporariaMixin, TestCase):
 
     def setUp(self):
         # Criando um imóvel para ser usado nos testes
@@ -6,8 +6,9 @@ from documentacao.models import FotosVideoImovel
 from imovel.models import Imovel
 from usuario.models import Usuario
 import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
 
-class FotosVideoImovelViewSetTest(APITestCase):
+class FotosVideoImovelViewSetTest(MidiaTemporariaMixin, APITestCase):
 
     def setUp(self):
         # Criação do cliente autenticado
@@ -37,7 +38,7 @@ class FotosVideoImovelViewSetTest(APITestCase):
     def test_create_fotos_video_imovel(self):
         # Teste de criação de uma mídia
         url = reverse('fotosvideoimovel-list')
-        arquivo = SimpleUploadedFile("foto_drone.jpg", b"file_content", content_type="image/jpeg")
+        arquivo = SimpleUploadedFile("foto_drone.jpg", b"\xff\xd8\xff\xe0 file_content", content_type="image/jpeg")
         data = {
             'imovel': self.imovel.id,
             'tipo_midia': 'foto_drone',
@@ -82,7 +83,7 @@ class FotosVideoImovelViewSetTest(APITestCase):
             'tipo_midia': 'video_drone',
             'formato': 'video',
             'descricao': 'Vídeo com drone atualizado',
-            'arquivo': SimpleUploadedFile("video_drone.mp4", b"file_content", content_type="video/mp4"),
+            'arquivo': SimpleUploadedFile("video_drone.mp4", b"\x00\x00\x00\x18ftypmp42 file_content", content_type="video/mp4"),
             'data_emissao': '2024-01-01'
         }
         response = self.client.put(url, data, format='multipart')
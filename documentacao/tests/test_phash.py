@@ -0,0 +1,92 @@
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from documentacao.models import FotosVideoImovel
+from documentacao.phash import distancia_hamming, para_assinado, para_sem_sinal, segmentos, variantes
+from imovel.models import Imovel
+from usuario.models import Usuario
+from PIL import Image
+from io import BytesIO
+import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
+
+
+def gerar_imagem(desenho, brilho=0):
+    """Gera um PNG 64x64 a partir de uma função (x, y) -> tom de cinza."""
+    imagem = Image.new('L', (64, 64))
+    imagem.putdata([min(255, desenho(x, y) + brilho) for y in range(64) for x in range(64)])
+    buffer = BytesIO()
+    imagem.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+GRADIENTE = lambda x, y: x * 3 + y
+XADREZ = lambda x, y: 255 if (x // 8 + y // 8) % 2 else 0
+
+
+class PhashFuncoesTest(TestCase):
+
+    def test_conversao_com_sinal(self):
+        valor = (1 << 64) - 1
+        self.assertEqual(para_assinado(valor), -1)
+        self.assertEqual(para_sem_sinal(para_assinado(valor)), valor)
+
+    def test_segmentos(self):
+        self.assertEqual(segmentos(0x0001000200030004), [1, 2, 3, 4])
+
+    def test_variantes(self):
+        # 1 valor original + 16 valores a um bit de distância
+        self.assertEqual(len(variantes(0, 1)), 17)
+        self.assertTrue(all(distancia_hamming(0, valor) <= 1 for valor in variantes(0, 1)))
+
+
+class FotosSemelhantesTest(MidiaTemporariaMixin, APITestCase):
+
+    def setUp(self):
+        # Criação do cliente autenticado
+        self.client = APIClient()
+        self.user = Usuario.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+        self.imovel = Imovel.objects.create(nome='Casa de Praia', cep='60000-000', numero_registro='98765XYZ')
+        self.outro_imovel = Imovel.objects.create(nome='Apartamento', cep='60000-000', numero_registro='11111AAA')
+
+    def _criar_foto(self, imovel, conteudo, nome='foto.png'):
+        return FotosVideoImovel.objects.create(
+            imovel=imovel,
+            tipo_midia='foto_profissional',
+            formato='imagem',
+            descricao='Foto do imóvel',
+            arquivo=SimpleUploadedFile(nome, conteudo, content_type='image/png'),
+            data_emissao=datetime.date(2024, 1, 1)
+        )
+
+    def test_phash_calculado_no_upload(self):
+        foto = self._criar_foto(self.imovel, gerar_imagem(GRADIENTE))
+        self.assertIsNotNone(foto.phash)
+        self.assertEqual(segmentos(foto.phash), [foto.phash_seg0, foto.phash_seg1, foto.phash_seg2, foto.phash_seg3])
+
+    def test_arquivo_que_nao_e_imagem(self):
+        foto = self._criar_foto(self.imovel, b'conteudo do arquivo', 'foto.jpg')
+        self.assertIsNone(foto.phash)
+
+    def test_buscar_semelhantes_entre_imoveis(self):
+        # A mesma foto com brilho levemente alterado em outro imóvel é encontrada; o xadrez não
+        original = self._criar_foto(self.imovel, gerar_imagem(GRADIENTE))
+        copia = self._criar_foto(self.outro_imovel, gerar_imagem(GRADIENTE, brilho=10))
+        self._criar_foto(self.outro_imovel, gerar_imagem(XADREZ))
+
+        url = reverse('fotosvideoimovel-semelhantes', args=[original.id])
+        response = self.client.get(url, {'distancia': 4})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([midia['id'] for midia in response.data], [copia.id])
+        self.assertEqual(response.data[0]['imovel'], self.outro_imovel.id)
+
+    def test_distancia_invalida(self):
+        foto = self._criar_foto(self.imovel, gerar_imagem(GRADIENTE))
+        url = reverse('fotosvideoimovel-semelhantes', args=[foto.id])
+        response = self.client.get(url, {'distancia': 64})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,96 @@
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from documentacao.models import FotosVideoImovel
+from imovel.models import Imovel
+from usuario.models import Usuario
+import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
+
+class ResumoMidiaImovelTest(MidiaTemporariaMixin, APITestCase):
+
+    def setUp(self):
+        # Criação do cliente autenticado
+        self.client = APIClient()
+        self.user = Usuario.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+        self.imovel = Imovel.objects.create(nome='Casa de Praia', cep='60000-000', numero_registro='98765XYZ')
+        self.outro_imovel = Imovel.objects.create(nome='Apartamento', cep='60000-000', numero_registro='11111AAA')
+
+    def _criar_midia(self, imovel, formato, nome='foto.jpg'):
+        return FotosVideoImovel.objects.create(
+            imovel=imovel,
+            tipo_midia='foto_profissional' if formato == 'imagem' else 'video_tour',
+            formato=formato,
+            descricao='Mídia do imóvel',
+            arquivo=SimpleUploadedFile(nome, b'conteudo do arquivo'),
+            data_emissao=datetime.date(2024, 1, 1)
+        )
+
+    def test_resumo_ao_criar(self):
+        # Capa é a primeira foto; contagens por formato
+        video = self._criar_midia(self.imovel, 'video', 'tour.mp4')
+        foto1 = self._criar_midia(self.imovel, 'imagem')
+        self._criar_midia(self.imovel, 'imagem')
+
+        self.imovel.refresh_from_db()
+        self.assertEqual(self.imovel.capa_id, foto1.id)
+        self.assertNotEqual(self.imovel.capa_id, video.id)
+        self.assertEqual(self.imovel.total_fotos, 2)
+        self.assertEqual(self.imovel.total_videos, 1)
+
+    def test_resumo_ao_remover_capa(self):
+        foto1 = self._criar_midia(self.imovel, 'imagem')
+        foto2 = self._criar_midia(self.imovel, 'imagem')
+        foto1.delete()
+
+        self.imovel.refresh_from_db()
+        self.assertEqual(self.imovel.capa_id, foto2.id)
+        self.assertEqual(self.imovel.total_fotos, 1)
+
+    def test_resumo_ao_mover_midia(self):
+        # Mover a mídia de imóvel atualiza os dois resumos
+        foto = self._criar_midia(self.imovel, 'imagem')
+        foto = FotosVideoImovel.objects.get(pk=foto.pk)
+        foto.imovel = self.outro_imovel
+        foto.save()
+
+        self.imovel.refresh_from_db()
+        self.outro_imovel.refresh_from_db()
+        self.assertIsNone(self.imovel.capa_id)
+        self.assertEqual(self.imovel.total_fotos, 0)
+        self.assertEqual(self.outro_imovel.capa_id, foto.id)
+        self.assertEqual(self.outro_imovel.total_fotos, 1)
+
+    def test_resumo_no_serializer_do_imovel(self):
+        self._criar_midia(self.imovel, 'imagem')
+        response = self.client.get(reverse('imovel-detail', args=[self.imovel.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total_fotos'], 1)
+        self.assertIsNotNone(response.data['capa_arquivo'])
+
+    def test_midias_por_imoveis(self):
+        # As mídias de vários imóveis vêm em uma única consulta, respeitando o limite por imóvel
+        for _ in range(3):
+            self._criar_midia(self.imovel, 'imagem')
+        self._criar_midia(self.outro_imovel, 'video', 'tour.mp4')
+
+        url = reverse('fotosvideoimovel-por-imoveis')
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url, {'imoveis': f'{self.imovel.id},{self.outro_imovel.id}', 'limite': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        consultas = [q for q in contexto.captured_queries if 'documentacao_fotosvideoimovel' in q['sql']]
+        self.assertEqual(len(consultas), 1)
+        self.assertEqual(response.data[0]['imovel'], self.imovel.id)
+        self.assertEqual(len(response.data[0]['midias']), 2)
+        self.assertEqual(len(response.data[1]['midias']), 1)
+
+    def test_midias_por_imoveis_parametros_invalidos(self):
+        url = reverse('fotosvideoimovel-por-imoveis')
+        response = self.client.get(url, {'imoveis': 'x'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,77 @@
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from documentacao.models import DocumentoImovel, FotosVideoImovel
+from imovel.models import Imovel
+from usuario.models import Usuario
+from documentacao.tests.utils import MidiaTemporariaMixin
+
+LIMITES_TESTE = {'.pdf': 1024, '.docx': 1024, '.jpg': 2048, '.png': 2048, '.mp4': 4096, '.avi': 4096}
+
+@override_settings(DOCUMENTACAO_LIMITES_UPLOAD=LIMITES_TESTE)
+class ValidacaoUploadHandlerTest(MidiaTemporariaMixin, APITestCase):
+
+    def setUp(self):
+        # Criação do cliente autenticado
+        self.client = APIClient()
+        self.user = Usuario.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+        self.imovel = Imovel.objects.create(nome='Apartamento 101', cep='01234-567', numero_registro='12345ABC')
+
+    def _enviar_documento(self, nome, conteudo):
+        data = {
+            'imovel': self.imovel.id,
+            'tipo_documento': 'matricula',
+            'descricao': 'Matrícula do imóvel',
+            'arquivo': SimpleUploadedFile(nome, conteudo, content_type='application/octet-stream'),
+            'data_emissao': '2024-01-01'
+        }
+        return self.client.post(reverse('documentoimovel-list'), data, format='multipart')
+
+    def test_upload_valido(self):
+        response = self._enviar_documento('matricula.pdf', b'%PDF-1.7' + b'0' * 512)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(DocumentoImovel.objects.count(), 1)
+
+    def test_upload_acima_do_limite(self):
+        # Arquivo maior que o limite da extensão é interrompido com 413
+        response = self._enviar_documento('matricula.pdf', b'%PDF-1.7' + b'0' * 2048)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        self.assertEqual(DocumentoImovel.objects.count(), 0)
+
+    def test_requisicao_muito_grande(self):
+        # Corpo maior que o maior limite é rejeitado antes de qualquer leitura
+        response = self._enviar_documento('matricula.pdf', b'%PDF-1.7' + b'0' * (2 * 1024 * 1024))
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_magic_bytes_invalidos(self):
+        # Conteúdo que não corresponde à extensão é rejeitado com 400
+        response = self._enviar_documento('matricula.pdf', b'MZ\x90\x00' + b'0' * 64)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(DocumentoImovel.objects.count(), 0)
+
+    def test_arquivo_menor_que_cabecalho(self):
+        response = self._enviar_documento('matricula.pdf', b'%PD')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_extensao_nao_permitida(self):
+        # O endpoint de documentos não aceita vídeos
+        response = self._enviar_documento('matricula.mp4', b'\x00\x00\x00\x18ftypmp42')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_limite_por_tipo_de_midia(self):
+        # O limite de vídeo é maior que o de imagem
+        data = {
+            'imovel': self.imovel.id,
+            'tipo_midia': 'video_tour',
+            'formato': 'video',
+            'descricao': 'Vídeo tour',
+            'arquivo': SimpleUploadedFile('tour.mp4', b'\x00\x00\x00\x18ftypmp42' + b'0' * 3000, content_type='video/mp4'),
+            'data_emissao': '2024-01-01'
+        }
+        response = self.client.post(reverse('fotosvideoimovel-list'), data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(FotosVideoImovel.objects.count(), 1)
@@ -0,0 +1,91 @@
+from django.urls import reverse
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from documentacao.models import DocumentoImovel, VALIDADE_DOCUMENTOS
+from imovel.models import Imovel
+from usuario.models import Usuario
+from io import StringIO
+import datetime
+from documentacao.tests.utils import MidiaTemporariaMixin
+
+class VencimentoDocumentoTest(MidiaTemporariaMixin, APITestCase):
+
+    def setUp(self):
+        # Criação do cliente autenticado
+        self.client = APIClient()
+        self.user = Usuario.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+        self.imovel = Imovel.objects.create(nome='Apartamento 101', cep='01234-567', numero_registro='12345ABC')
+        self.hoje = timezone.now().date()
+
+    def _criar_documento(self, tipo, data_emissao):
+        return DocumentoImovel.objects.create(
+            imovel=self.imovel,
+            tipo_documento=tipo,
+            descricao=f'Documento {tipo}',
+            arquivo=SimpleUploadedFile(f'{tipo}.pdf', b'conteudo do arquivo', content_type='application/pdf'),
+            data_emissao=data_emissao
+        )
+
+    def test_data_validade_calculada(self):
+        # A validade é calculada a partir da tabela de validade por tipo
+        documento = self._criar_documento('cnd', datetime.date(2024, 1, 1))
+        self.assertEqual(documento.data_validade, datetime.date(2024, 1, 1) + datetime.timedelta(days=VALIDADE_DOCUMENTOS['cnd']))
+        self.assertTrue(documento.vencido)
+
+    def test_tipo_sem_validade(self):
+        # Tipos que não expiram ficam sem data de validade
+        documento = self._criar_documento('escritura', datetime.date(2024, 1, 1))
+        self.assertIsNone(documento.data_validade)
+        self.assertFalse(documento.vencido)
+
+    def test_listar_documentos_a_vencer(self):
+        # Documento que vence em 10 dias entra na janela de 30 dias; o já vencido e o distante não
+        dias_iptu = VALIDADE_DOCUMENTOS['iptu']
+        a_vencer = self._criar_documento('iptu', self.hoje - datetime.timedelta(days=dias_iptu - 10))
+        self._criar_documento('iptu', self.hoje - datetime.timedelta(days=dias_iptu + 1))
+        self._criar_documento('cnd', self.hoje)
+
+        url = reverse('vencimentodocumento-list')
+        response = self.client.get(url, {'dias': 30})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['documentos'][0]['id'], a_vencer.id)
+        self.assertEqual(response.data['documentos'][0]['modelo'], 'imovel')
+        self.assertEqual(response.data['documentos'][0]['tipo'], 'iptu')
+
+    def test_listar_documentos_a_vencer_paginado(self):
+        dias_iptu = VALIDADE_DOCUMENTOS['iptu']
+        documentos = [
+            self._criar_documento('iptu', self.hoje - datetime.timedelta(days=dias_iptu - restantes))
+            for restantes in (5, 1, 3, 2, 4)
+        ]
+        ordem = [documento.id for documento in sorted(documentos, key=lambda documento: documento.data_validade)]
+
+        url = reverse('vencimentodocumento-list')
+        response = self.client.get(url, {'dias': 30, 'limite': 2, 'page': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['total'], 5)
+        self.assertEqual([documento['id'] for documento in response.data['documentos']], ordem[2:4])
+        self.assertEqual(self.client.get(url, {'limite': 0}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_dias_invalido(self):
+        url = reverse('vencimentodocumento-list')
+        response = self.client.get(url, {'dias': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_marcar_documentos_vencidos(self):
+        # O comando diário marca como vencidos os documentos cuja validade passou
+        documento = self._criar_documento('onus_reais', self.hoje)
+        DocumentoImovel.objects.filter(pk=documento.pk).update(data_validade=self.hoje - datetime.timedelta(days=1))
+
+        call_command('marcar_documentos_vencidos', stdout=StringIO())
+
+        documento.refresh_from_db()
+        self.assertTrue(documento.vencido)
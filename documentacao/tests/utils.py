@@ -0,0 +1,25 @@
+import shutil
+import tempfile
+from django.test import override_settings
+
+
+class MidiaTemporariaMixin:
+    """
+    Grava os arquivos enviados pelos testes em um MEDIA_ROOT temporário, removido ao fim da
+    classe, para que as execuções não deixem arquivos na árvore do projeto.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls._media_root = tempfile.mkdtemp()
+        cls._midia_temporaria = override_settings(MEDIA_ROOT=cls._media_root)
+        cls._midia_temporaria.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._midia_temporaria.disable()
+            shutil.rmtree(cls._media_root, ignore_errors=True)
@@ -0,0 +1,112 @@
+import os
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+MB = 1024 * 1024
+
+# Tamanho máximo, em bytes, por extensão de arquivo. Pode ser sobrescrito em
+# settings.DOCUMENTACAO_LIMITES_UPLOAD.
+LIMITES_UPLOAD_PADRAO = {
+    '.pdf': 10 * MB,
+    '.docx': 10 * MB,
+    '.jpg': 10 * MB,
+    '.png': 10 * MB,
+    '.mp4': 500 * MB,
+    '.avi': 500 * MB,
+}
+
+# Quantidade de bytes do início do arquivo necessária para conferir a assinatura
+TAMANHO_CABECALHO = 12
+
+# Verificação dos "magic bytes" de cada extensão aceita
+ASSINATURAS = {
+    '.pdf': lambda cabecalho: cabecalho.startswith(b'%PDF-'),
+    '.docx': lambda cabecalho: cabecalho.startswith(b'PK\x03\x04'),
+    '.jpg': lambda cabecalho: cabecalho.startswith(b'\xff\xd8\xff'),
+    '.png': lambda cabecalho: cabecalho.startswith(b'\x89PNG\r\n\x1a\n'),
+    '.mp4': lambda cabecalho: cabecalho[4:8] == b'ftyp',
+    '.avi': lambda cabecalho: cabecalho[:4] == b'RIFF' and cabecalho[8:12] == b'AVI ',
+}
+
+
+class ArquivoMuitoGrande(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = 'O arquivo enviado excede o tamanho máximo permitido.'
+    default_code = 'arquivo_muito_grande'
+
+
+class ArquivoInvalido(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'O conteúdo do arquivo não corresponde à extensão informada.'
+    default_code = 'arquivo_invalido'
+
+
+def obter_limites_upload():
+    return getattr(settings, 'DOCUMENTACAO_LIMITES_UPLOAD', LIMITES_UPLOAD_PADRAO)
+
+
+class ValidacaoUploadHandler(FileUploadHandler):
+    """
+    Upload handler que valida os arquivos enquanto eles são recebidos.
+
+    Deve ser o primeiro handler da lista: rejeita extensões não permitidas assim que o
+    cabeçalho da parte chega, confere os magic bytes nos primeiros bytes do arquivo e
+    interrompe a leitura assim que o limite de tamanho da extensão é ultrapassado, sem
+    que o restante do arquivo seja bufferizado em memória ou gravado em disco.
+    """
+
+    def __init__(self, request=None, extensoes_permitidas=None):
+        super().__init__(request)
+        limites = obter_limites_upload()
+        if extensoes_permitidas is not None:
+            limites = {ext: limite for ext, limite in limites.items() if ext in extensoes_permitidas}
+        self.limites = limites
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        # Rejeita de imediato requisições cujo corpo inteiro já ultrapassa o maior limite
+        if self.limites and content_length > max(self.limites.values()) + MB:
+            self._abortar(ArquivoMuitoGrande())
+        return None
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.extensao = os.path.splitext(self.file_name or '')[1].lower()
+        if self.extensao not in self.limites:
+            self._abortar(ArquivoInvalido('Extensão de arquivo não suportada.'))
+        self.limite = self.limites[self.extensao]
+        self.cabecalho = b''
+        self.cabecalho_validado = False
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > self.limite:
+            self._abortar(ArquivoMuitoGrande(
+                f'O arquivo excede o tamanho máximo de {self.limite // MB} MB para arquivos {self.extensao}.'
+            ))
+
+        if not self.cabecalho_validado:
+            self.cabecalho += raw_data[:TAMANHO_CABECALHO - len(self.cabecalho)]
+            if len(self.cabecalho) >= TAMANHO_CABECALHO:
+                self._validar_cabecalho()
+
+        # Repassa o bloco para os próximos handlers (memória ou arquivo temporário)
+        return raw_data
+
+    def file_complete(self, file_size):
+        # Arquivos menores que o cabeçalho só podem ser conferidos ao final
+        if not self.cabecalho_validado:
+            self._validar_cabecalho()
+        return None
+
+    def _validar_cabecalho(self):
+        if not ASSINATURAS[self.extensao](self.cabecalho):
+            self._abortar(ArquivoInvalido())
+        self.cabecalho_validado = True
+
+    def _abortar(self, erro):
+        # Libera os arquivos parciais dos demais handlers antes de interromper o parser
+        for handler in self.request.upload_handlers if self.request is not None else []:
+            if handler is not self and hasattr(handler, 'file'):
+                handler.file.close()
+        raise erro
@@ -1,12 +1,15 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import DocPessoaFisicaViewSet, DocPessoaJuridicaViewSet, FotosVideoImovelViewSet, DocumentoImovelViewSet
+from .views import CompletudeDocumentacaoViewSet, VencimentoDocumentoViewSet
 
 router = DefaultRouter()
 router.register(r'doc-pessoa-fisica', DocPessoaFisicaViewSet, basename='docpessoafisica')
 router.register(r'doc-pessoa-juridica', DocPessoaJuridicaViewSet, basename='docpessoajuridica')
 router.register(r'fotos-video-imovel', FotosVideoImovelViewSet, basename='fotosvideoimovel')
 router.register(r'documento-imovel', DocumentoImovelViewSet, basename='documentoimovel')
+router.register(r'completude-documentacao', CompletudeDocumentacaoViewSet, basename='completudedocumentacao')
+router.register(r'vencimento-documentos', VencimentoDocumentoViewSet, basename='vencimentodocumento')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -1,11 +1,33 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
 from .models import DocumentoPessoaFisica, DocumentoPessoaJuridica, DocumentoImovel, FotosVideoImovel
+from .models import PERFIS_DOCUMENTACAO, calcular_completude
+from .upload_handlers import ValidacaoUploadHandler
 from .serializers import DocPessoaFisicaSerializer, DocPessoaJuridicaSerializer, DocImovelSerializer, FotosVideoImovelSerializer
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework.decorators import action
+import datetime
+import heapq
+import itertools
+
+class ValidacaoUploadMixin:
+    """
+    Instala o `ValidacaoUploadHandler` antes que o corpo da requisição seja lido,
+    para que uploads grandes ou inválidos sejam interrompidos durante o streaming.
+    """
+    extensoes_upload = None
+
+    def initial(self, request, *args, **kwargs):
+        if request.method in ('POST', 'PUT', 'PATCH'):
+            request.upload_handlers.insert(0, ValidacaoUploadHandler(request, self.extensoes_upload))
+        super().initial(request, *args, **kwargs)
 
-class DocPessoaFisicaViewSet(viewsets.ModelViewSet):
+
+class DocPessoaFisicaViewSet(ValidacaoUploadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar documentos de Pessoa Física.
 
@@ -14,6 +36,7 @@ class DocPessoaFisicaViewSet(viewsets.ModelViewSet):
     queryset = DocumentoPessoaFisica.objects.all().order_by('id')
     serializer_class = DocPessoaFisicaSerializer
     permission_classes = [IsAuthenticated]
+    extensoes_upload = ['.pdf', '.docx', '.jpg', '.png']
 
     def create(self, request, *args, **kwargs):
         # Criação personalizada do DocumentoPessoaFisica
@@ -67,7 +90,7 @@ class DocPessoaFisicaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
 
-class DocPessoaJuridicaViewSet(viewsets.ModelViewSet):
+class DocPessoaJuridicaViewSet(ValidacaoUploadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar documentos de Pessoa Jurídica.
 
@@ -76,6 +99,7 @@ class DocPessoaJuridicaViewSet(viewsets.ModelViewSet):
     queryset = DocumentoPessoaJuridica.objects.all().order_by('id')
     serializer_class = DocPessoaJuridicaSerializer
     permission_classes = [IsAuthenticated]
+    extensoes_upload = ['.pdf', '.docx', '.jpg', '.png']
 
     def create(self, request, *args, **kwargs):
         # Criação personalizada do DocumentoPessoaJuridica
@@ -129,7 +153,7 @@ class DocPessoaJuridicaViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
     
 
-class DocumentoImovelViewSet(viewsets.ModelViewSet):
+class DocumentoImovelViewSet(ValidacaoUploadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar documentos de Imóvel.
 
@@ -138,6 +162,7 @@ class DocumentoImovelViewSet(viewsets.ModelViewSet):
     queryset = DocumentoImovel.objects.all().order_by('id')
     serializer_class = DocImovelSerializer
     permission_classes = [IsAuthenticated]
+    extensoes_upload = ['.pdf', '.docx', '.jpg', '.png']
 
     def create(self, request, *args, **kwargs):
         # Criação personalizada do DocumentoImovel
@@ -192,7 +217,7 @@ class DocumentoImovelViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class FotosVideoImovelViewSet(viewsets.ModelViewSet):
+class FotosVideoImovelViewSet(ValidacaoUploadMixin, viewsets.ModelViewSet):
     """
     ViewSet para gerenciar fotos e vídeos de Imóvel.
 
@@ -201,6 +226,7 @@ class FotosVideoImovelViewSet(viewsets.ModelViewSet):
     queryset = FotosVideoImovel.objects.all().order_by('id')
     serializer_class = FotosVideoImovelSerializer
     permission_classes = [IsAuthenticated]
+    extensoes_upload = ['.jpg', '.png', '.mp4', '.avi']
 
     def create(self, request, *args, **kwargs):
         # Criação personalizada de Foto/Video do Imóvel
@@ -253,9 +279,197 @@ class FotosVideoImovelViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
-    
 
+    @action(detail=True, methods=['get'])
+    def semelhantes(self, request, pk=None):
+        """
+        Lista as fotos visualmente semelhantes a esta, em qualquer imóvel.
+        Recebe opcionalmente `distancia`, a distância de Hamming máxima entre os hashes perceptuais.
+        """
+        midia = get_object_or_404(FotosVideoImovel, pk=pk)
+        try:
+            distancia = int(request.query_params.get('distancia', 6))
+        except ValueError:
+            return Response({'error': 'O parâmetro `distancia` deve ser um número inteiro.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= distancia <= FotosVideoImovel.DISTANCIA_MAXIMA_SEMELHANTES:
+            return Response(
+                {'error': f'O parâmetro `distancia` deve estar entre 0 e {FotosVideoImovel.DISTANCIA_MAXIMA_SEMELHANTES}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if midia.phash is None:
+            return Response({'error': 'Esta mídia não possui hash perceptual (não é uma imagem válida).'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        response_data = [
+            {'distancia': distancia_midia, **FotosVideoImovelSerializer(semelhante).data}
+            for distancia_midia, semelhante in midia.buscar_semelhantes(distancia)
+        ]
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def por_imoveis(self, request):
+        """
+        Retorna as mídias de vários imóveis em uma única consulta, agrupadas por imóvel.
+        Recebe `imoveis` (IDs separados por vírgula) e, opcionalmente, `limite` de mídias por imóvel.
+        """
+        try:
+            imovel_ids = [int(valor) for valor in request.query_params.get('imoveis', '').split(',') if valor.strip()]
+            limite = int(request.query_params.get('limite', 10))
+        except ValueError:
+            return Response({'error': 'Os parâmetros `imoveis` e `limite` devem ser inteiros.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not imovel_ids or len(imovel_ids) > 100 or limite < 1:
+            return Response({'error': 'Informe entre 1 e 100 imóveis e um limite positivo.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # A numeração por imóvel permite aplicar o limite a cada grupo na mesma consulta
+        midias = (
+            FotosVideoImovel.objects
+            .filter(imovel_id__in=imovel_ids)
+            .annotate(ordem=Window(RowNumber(), partition_by=[F('imovel_id')], order_by=F('id').asc()))
+            .filter(ordem__lte=limite)
+            .order_by('imovel_id', 'id')
+        )
+
+        agrupadas = {imovel_id: [] for imovel_id in imovel_ids}
+        for midia in FotosVideoImovelSerializer(midias, many=True).data:
+            agrupadas[midia['imovel']].append(midia)
+
+        return Response(
+            [{'imovel': imovel_id, 'midias': agrupadas[imovel_id]} for imovel_id in imovel_ids],
+            status=status.HTTP_200_OK
+        )
 
 
+class CompletudeDocumentacaoViewSet(viewsets.ViewSet):
+    """
+    ViewSet para consultar a completude da documentação de várias entidades de uma vez.
 
+    Recebe um perfil de documentação (ex: `locatario_pf`, `imovel_venda`) e uma lista de IDs
+    de entidades, e retorna uma matriz compacta em que cada entidade recebe uma máscara de
+    bits com os tipos de documento que ainda estão faltando.
+    """
+    permission_classes = [IsAuthenticated]
+    max_ids = 1000
+
+    def list(self, request):
+        perfil_nome = request.query_params.get('perfil')
+        perfil = PERFIS_DOCUMENTACAO.get(perfil_nome)
+        if perfil is None:
+            return Response(
+                {'error': f'Perfil de documentação inválido. Opções: {", ".join(PERFIS_DOCUMENTACAO)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            ids = list(dict.fromkeys(
+                int(valor) for valor in request.query_params.get('ids', '').split(',') if valor.strip()
+            ))
+        except ValueError:
+            return Response({'error': 'O parâmetro `ids` deve ser uma lista de inteiros separados por vírgula.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not ids:
+            return Response({'error': 'Informe ao menos um ID no parâmetro `ids`.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(ids) > self.max_ids:
+            return Response({'error': f'No máximo {self.max_ids} IDs por consulta.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        faltantes = calcular_completude(perfil, ids)
+
+        # Cada linha da matriz é [id_da_entidade, mascara_de_faltantes]; máscara 0 = documentação completa
+        return Response({
+            'perfil': perfil_nome,
+            'tipos': perfil['tipos'],
+            'matriz': [[entidade_id, faltantes[entidade_id]] for entidade_id in ids],
+            'completos': sum(1 for mascara in faltantes.values() if mascara == 0),
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def perfis(self, request):
+        """
+        Retorna os perfis de documentação disponíveis e os tipos exigidos por cada um.
+        """
+        response_data = [
+            {'value': nome, 'label': perfil['descricao'], 'tipos': perfil['tipos']}
+            for nome, perfil in PERFIS_DOCUMENTACAO.items()
+        ]
+        return Response(response_data, status=status.HTTP_200_OK)
+
+
+class VencimentoDocumentoViewSet(viewsets.ViewSet):
+    """
+    ViewSet para listar os documentos que vencem nos próximos N dias.
 
+    Consulta os três modelos de documento com validade pelo índice de `data_validade` e
+    retorna uma lista única ordenada pela data de vencimento, paginada por `page` e `limite`.
+    Cada consulta lê no máximo os documentos até o fim da página pedida.
+    """
+    permission_classes = [IsAuthenticated]
+    max_dias = 365
+    limite_padrao = 50
+    max_limite = 200
+
+    # (nome exposto na API, modelo, campo que identifica o dono)
+    modelos = [
+        ('pessoa_fisica', DocumentoPessoaFisica, 'pessoa_fisica_id'),
+        ('pessoa_juridica', DocumentoPessoaJuridica, 'pessoa_juridica_id'),
+        ('imovel', DocumentoImovel, 'imovel_id'),
+    ]
+
+    def list(self, request):
+        try:
+            dias = int(request.query_params.get('dias', 30))
+        except ValueError:
+            return Response({'error': 'O parâmetro `dias` deve ser um número inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= dias <= self.max_dias:
+            return Response({'error': f'O parâmetro `dias` deve estar entre 0 e {self.max_dias}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            pagina = int(request.query_params.get('page', 1))
+            limite_pagina = int(request.query_params.get('limite', self.limite_padrao))
+        except ValueError:
+            pagina = limite_pagina = None
+        if pagina is None or pagina < 1 or limite_pagina is None or not 1 <= limite_pagina <= self.max_limite:
+            return Response({'error': f'Os parâmetros `page` (a partir de 1) e `limite` (entre 1 e {self.max_limite}) são inválidos.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        hoje = timezone.now().date()
+        limite = hoje + datetime.timedelta(days=dias)
+        fim_pagina = pagina * limite_pagina
+
+        # Cada consulta já vem ordenada por data_validade (varredura por faixa no índice) e
+        # limitada ao fim da página, então basta intercalar os resultados e recortar a página
+        resultados = []
+        total = 0
+        for nome, modelo, campo_dono in self.modelos:
+            documentos = modelo.objects.filter(data_validade__range=(hoje, limite))
+            total += documentos.count()
+            documentos = (
+                documentos
+                .order_by('data_validade', 'id')
+                .values('id', 'descricao', 'data_emissao', 'data_validade', 'tipo_documento', campo_dono)
+                [:fim_pagina]
+            )
+            resultados.append([
+                {
+                    'modelo': nome,
+                    'id': documento['id'],
+                    'dono_id': documento[campo_dono],
+                    'tipo': documento['tipo_documento'],
+                    'descricao': documento['descricao'],
+                    'data_emissao': documento['data_emissao'],
+                    'data_validade': documento['data_validade'],
+                }
+                for documento in documentos
+            ])
+
+        vencimentos = heapq.merge(*resultados, key=lambda documento: documento['data_validade'])
+        documentos = list(itertools.islice(vencimentos, fim_pagina - limite_pagina, fim_pagina))
+        return Response({
+            'dias': dias,
+            'total': total,
+            'page': pagina,
+            'limite': limite_pagina,
+            'documentos': documentos,
+        }, status=status.HTTP_200_OK)
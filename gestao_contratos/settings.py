@@ -129,10 +129,15 @@ REST_FRAMEWORK = {
     ),
 }
 
+# Cache. As respostas do Kanban e o índice de compatibilidade só usam o cache quando ele é
+# compartilhado entre os processos: em produção, configure Redis ou Memcached pelo ambiente, ex.:
+#   DJANGO_CACHE_BACKEND=django.core.cache.backends.redis.RedisCache
+#   DJANGO_CACHE_LOCATION=redis://127.0.0.1:6379/1  (requer o pacote redis)
+# O padrão, LocMemCache, é local ao processo e atende ao desenvolvimento e aos testes.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', 'unique-snowflake'),
     }
 }
 
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ImovelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'imovel'
+
+    def ready(self):
+        import imovel.signals  # Importa os sinais para que sejam registrados
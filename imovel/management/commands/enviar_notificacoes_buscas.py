@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from imovel.models import NotificacaoBusca
+
+
+class Command(BaseCommand):
+    help = "Envia por e-mail os avisos pendentes de novos imóveis para as buscas salvas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tamanho-lote', type=int, default=500,
+                            help="Quantidade máxima de avisos lidos por lote")
+
+    def handle(self, *args, **options):
+        total = NotificacaoBusca.enviar_pendentes(tamanho_lote=options['tamanho_lote'])
+        self.stdout.write(f"{total} e-mail(s) enviado(s).")
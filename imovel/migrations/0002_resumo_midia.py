@@ -0,0 +1,50 @@
+# Generated by Django 5.1 on 2026-10-19 11:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Min, Q
+
+
+def preencher_resumo_midia(apps, schema_editor):
+    Imovel = apps.get_model('imovel', 'Imovel')
+    FotosVideoImovel = apps.get_model('documentacao', 'FotosVideoImovel')
+
+    e_imagem = Q(formato__iexact='imagem')
+    resumos = FotosVideoImovel.objects.values('imovel_id').annotate(
+        total_fotos=Count('id', filter=e_imagem),
+        total_videos=Count('id', filter=Q(formato__iexact='video')),
+        capa=Min('id', filter=e_imagem),
+    ).order_by()
+    imoveis = [
+        Imovel(pk=resumo['imovel_id'], capa_id=resumo['capa'],
+               total_fotos=resumo['total_fotos'], total_videos=resumo['total_videos'])
+        for resumo in resumos
+    ]
+    Imovel.objects.bulk_update(imoveis, ['capa', 'total_fotos', 'total_videos'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documentacao', '0002_validade_documentos'),
+        ('imovel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imovel',
+            name='capa',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Foto usada como capa do imóvel nas listagens', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='documentacao.fotosvideoimovel'),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='total_fotos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='imovel',
+            name='total_videos',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(preencher_resumo_midia, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1 on 2026-10-19 12:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imovel', '0002_resumo_midia'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BuscaSalva',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(max_length=100)),
+                ('email', models.EmailField(help_text='E-mail que recebe os avisos de novos imóveis', max_length=254)),
+                ('cidade', models.CharField(blank=True, default='', max_length=100)),
+                ('bairro', models.CharField(blank=True, default='', max_length=100)),
+                ('tipo_imovel', models.CharField(blank=True, choices=[('casa', 'Casa'), ('apartamento', 'Apartamento'), ('comercial', 'Sala Comercial'), ('terreno', 'Terreno'), ('chacara', 'Chácara'), ('sobrado', 'Sobrado'), ('bangalo', 'Bangalô'), ('edicula', 'Edícula'), ('loft', 'Loft'), ('flat', 'Flat'), ('studio', 'Studio')], default='', max_length=20)),
+                ('tipo_transacao', models.CharField(blank=True, choices=[('venda', 'Venda'), ('aluguel', 'Aluguel'), ('permuta', 'Permuta'), ('arrendamento', 'Arrendamento'), ('financiamento', 'Financiamento Imobiliário'), ('leasing', 'Leasing Habitacional')], default='', max_length=20)),
+                ('valor_minimo', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('valor_maximo', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('quartos_minimo', models.PositiveSmallIntegerField(default=0)),
+                ('ativa', models.BooleanField(default=True)),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='buscas_salvas', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='NotificacaoBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True)),
+                ('data_envio', models.DateTimeField(blank=True, db_index=True, null=True)),
+                ('busca', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes', to='imovel.buscasalva')),
+                ('imovel', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificacoes_buscas', to='imovel.imovel')),
+                ('transacao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='imovel.transacaoimovel')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='buscasalva',
+            index=models.Index(fields=['cidade', 'tipo_imovel', 'tipo_transacao', 'ativa'], name='busca_salva_criterios_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='notificacaobusca',
+            unique_together={('busca', 'imovel')},
+        ),
+    ]
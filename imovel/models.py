@@ -1,6 +1,10 @@
+from django.conf import settings
+from django.core import mail
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from core.texto import normalizar_texto
 
 class SituacaoFiscal(models.Model):
     SITUACAO_FISCAL_CHOICES = [
@@ -92,6 +96,19 @@ class Imovel(models.Model):
         
     cep = models.CharField(max_length=10, validators=[validate_cep], default="")
 
+    # Resumo das mídias, mantido pelos sinais de documentacao.FotosVideoImovel
+    capa = models.ForeignKey(
+        'documentacao.FotosVideoImovel',
+        on_delete=models.SET_NULL,
+        related_name='+',
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Foto usada como capa do imóvel nas listagens"
+    )
+    total_fotos = models.PositiveIntegerField(default=0, editable=False)
+    total_videos = models.PositiveIntegerField(default=0, editable=False)
+
     def get_tipos_transacao(self):
         return list(self.transacoes.values_list('tipo_transacao', flat=True))
 
@@ -205,3 +222,145 @@ class HistoricoTransacao(models.Model):
         return f"{self.imovel.nome} - {self.campo_modificado} - {self.data_modificacao}"
 
 
+class BuscaSalva(models.Model):
+    """
+    Critérios de busca de imóveis salvos por um cliente, que é avisado por e-mail quando um
+    imóvel disponível passa a atendê-los.
+
+    Os critérios de igualdade (cidade, bairro, tipo do imóvel e tipo de transação) ficam vazios
+    quando a busca aceita qualquer valor; cidade e bairro são gravados normalizados. O índice
+    desses critérios permite encontrar, a partir de um imóvel, apenas as buscas candidatas.
+    """
+    nome = models.CharField(max_length=100)
+    email = models.EmailField(help_text="E-mail que recebe os avisos de novos imóveis")
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, null=True, blank=True,
+                                related_name='buscas_salvas')
+    cidade = models.CharField(max_length=100, blank=True, default='')
+    bairro = models.CharField(max_length=100, blank=True, default='')
+    tipo_imovel = models.CharField(max_length=20, choices=Imovel.TIPO_IMOVEL_CHOICES, blank=True, default='')
+    tipo_transacao = models.CharField(max_length=20, choices=TransacaoImovel.TIPO_TRANSACAO_CHOICES, blank=True, default='')
+    valor_minimo = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    valor_maximo = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    quartos_minimo = models.PositiveSmallIntegerField(default=0)
+    ativa = models.BooleanField(default=True)
+    data_criacao = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['cidade', 'tipo_imovel', 'tipo_transacao', 'ativa'], name='busca_salva_criterios_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.cidade = normalizar_texto(self.cidade)[:100]
+        self.bairro = normalizar_texto(self.bairro)[:100]
+        super().save(*args, **kwargs)
+
+    def atende(self, oferta):
+        """Indica se a oferta (`tipo_transacao` e `valor` de uma transação) atende aos critérios de transação e valor."""
+        return (
+            (not self.tipo_transacao or oferta['tipo_transacao'] == self.tipo_transacao)
+            and (self.valor_minimo is None or oferta['valor'] >= self.valor_minimo)
+            and (self.valor_maximo is None or oferta['valor'] <= self.valor_maximo)
+        )
+
+    @staticmethod
+    def percolar(imovel_id):
+        """
+        Encontra as buscas ativas atendidas pelo imóvel e registra os avisos pendentes.
+
+        Em vez de executar cada busca salva, consulta as buscas a partir dos dados do imóvel:
+        os critérios de igualdade usam o índice e as faixas de valor são comparadas com cada
+        transação do imóvel na mesma consulta. Cada busca é avisada uma única vez por imóvel.
+        Retorna a quantidade de avisos criados.
+        """
+        imovel = Imovel.objects.filter(pk=imovel_id, status='disponivel', disponibilidade=True).first()
+        if imovel is None:
+            return 0
+        ofertas = list(imovel.transacoes.values('id', 'tipo_transacao', 'valor'))
+
+        criterios_transacao = Q(tipo_transacao='', valor_minimo__isnull=True, valor_maximo__isnull=True)
+        for oferta in ofertas:
+            criterios_transacao |= (
+                Q(tipo_transacao__in=['', oferta['tipo_transacao']])
+                & (Q(valor_minimo__isnull=True) | Q(valor_minimo__lte=oferta['valor']))
+                & (Q(valor_maximo__isnull=True) | Q(valor_maximo__gte=oferta['valor']))
+            )
+        buscas = BuscaSalva.objects.filter(
+            criterios_transacao,
+            ativa=True,
+            cidade__in=['', normalizar_texto(imovel.cidade)],
+            tipo_imovel__in=['', imovel.tipo_imovel],
+            bairro__in=['', normalizar_texto(imovel.bairro)],
+            quartos_minimo__lte=imovel.num_quartos,
+        ).exclude(notificacoes__imovel=imovel)
+
+        notificacoes = []
+        for busca in buscas:
+            oferta = next((oferta for oferta in ofertas if busca.atende(oferta)), None)
+            notificacoes.append(NotificacaoBusca(busca=busca, imovel=imovel, transacao_id=oferta and oferta['id']))
+        NotificacaoBusca.objects.bulk_create(notificacoes, ignore_conflicts=True)
+        return len(notificacoes)
+
+    def __str__(self):
+        return f"{self.nome} ({self.email})"
+
+
+class NotificacaoBusca(models.Model):
+    """
+    Aviso pendente (caixa de saída) de que um imóvel atende a uma busca salva. Os avisos são
+    enviados em lote por `enviar_pendentes`, com um e-mail por busca.
+    """
+    busca = models.ForeignKey(BuscaSalva, on_delete=models.CASCADE, related_name='notificacoes')
+    imovel = models.ForeignKey(Imovel, on_delete=models.CASCADE, related_name='notificacoes_buscas')
+    transacao = models.ForeignKey(TransacaoImovel, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    data_criacao = models.DateTimeField(auto_now_add=True)
+    data_envio = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    class Meta:
+        unique_together = ('busca', 'imovel')
+
+    @staticmethod
+    def enviar_pendentes(tamanho_lote=500):
+        """
+        Envia os avisos pendentes agrupados por busca, com uma única conexão de e-mail por lote,
+        e marca os avisos enviados. Retorna a quantidade de e-mails enviados.
+        """
+        enviados = 0
+        with mail.get_connection() as conexao:
+            while True:
+                pendentes = list(
+                    NotificacaoBusca.objects.filter(data_envio__isnull=True)
+                    .select_related('busca', 'imovel', 'transacao')
+                    .order_by('busca_id', 'id')[:tamanho_lote]
+                )
+                if not pendentes:
+                    break
+                por_busca = {}
+                for notificacao in pendentes:
+                    por_busca.setdefault(notificacao.busca, []).append(notificacao)
+
+                mensagens = [
+                    mail.EmailMessage(
+                        subject=f"Novos imóveis para a sua busca \"{busca.nome}\"",
+                        body="\n".join(notificacao.descrever() for notificacao in notificacoes),
+                        to=[busca.email],
+                        connection=conexao,
+                    )
+                    for busca, notificacoes in por_busca.items()
+                ]
+                conexao.send_messages(mensagens)
+                NotificacaoBusca.objects.filter(id__in=[notificacao.id for notificacao in pendentes]).update(
+                    data_envio=timezone.now()
+                )
+                enviados += len(mensagens)
+        return enviados
+
+    def descrever(self):
+        descricao = f"{self.imovel.nome} - {self.imovel.bairro}, {self.imovel.cidade}"
+        if self.transacao is not None:
+            descricao += f" ({self.transacao.get_tipo_transacao_display()}: R$ {self.transacao.valor})"
+        return descricao
+
+    def __str__(self):
+        return f"Aviso do imóvel {self.imovel_id} para a busca {self.busca_id}"
+
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Imovel, TransacaoImovel, SituacaoFiscal
+from .models import Imovel, TransacaoImovel, SituacaoFiscal, BuscaSalva
 from rest_framework import serializers
 
 
@@ -23,6 +23,7 @@ class TransacaoImovelSerializer(serializers.ModelSerializer):
 class ImovelSerializer(serializers.ModelSerializer):
     situacoes_fiscais = SituacaoFiscalSerializer(many=True, required=False)  # Relacionamento many-to-one
     transacoes = TransacaoImovelSerializer(many=True, required=False)  # Relacionamento many-to-one
+    capa_arquivo = serializers.FileField(source='capa.arquivo', read_only=True)  # Resumo de mídias desnormalizado
 
     class Meta:
         model = Imovel
@@ -30,5 +31,24 @@ class ImovelSerializer(serializers.ModelSerializer):
             'id', 'nome', 'endereco', 'bairro', 'cidade', 'estado', 'cep', 'area_total', 
             'area_util', 'tipo_imovel', 'num_quartos', 'num_banheiros', 'num_vagas_garagem',
             'ano_construcao', 'caracteristicas_adicionais', 'numero_registro', 
-            'situacoes_fiscais', 'transacoes', 'disponibilidade', 'data_cadastro'
-        ]
\ No newline at end of file
+            'situacoes_fiscais', 'transacoes', 'disponibilidade', 'data_cadastro',
+            'capa', 'capa_arquivo', 'total_fotos', 'total_videos'
+        ]
+
+
+class BuscaSalvaSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = BuscaSalva
+        fields = [
+            'id', 'nome', 'email', 'cidade', 'bairro', 'tipo_imovel', 'tipo_transacao',
+            'valor_minimo', 'valor_maximo', 'quartos_minimo', 'ativa', 'data_criacao'
+        ]
+        read_only_fields = ['data_criacao']
+
+    def validate(self, data):
+        valor_minimo = data.get('valor_minimo', getattr(self.instance, 'valor_minimo', None))
+        valor_maximo = data.get('valor_maximo', getattr(self.instance, 'valor_maximo', None))
+        if valor_minimo is not None and valor_maximo is not None and valor_minimo > valor_maximo:
+            raise serializers.ValidationError("O valor mínimo não pode ser maior que o valor máximo.")
+        return data
+
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from imovel.models import BuscaSalva, Imovel, TransacaoImovel
+
+@receiver(post_save, sender=Imovel)
+def percolar_buscas_ao_salvar_imovel(sender, instance, **kwargs):
+    # As buscas são avaliadas após o commit, quando as transações do imóvel já estão gravadas
+    transaction.on_commit(lambda: BuscaSalva.percolar(instance.pk))
+
+@receiver(post_save, sender=TransacaoImovel)
+def percolar_buscas_ao_salvar_transacao(sender, instance, **kwargs):
+    transaction.on_commit(lambda: BuscaSalva.percolar(instance.imovel_id))
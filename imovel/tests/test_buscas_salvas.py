@@ -0,0 +1,98 @@
+from datetime import date
+from io import StringIO
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from imovel.models import BuscaSalva, Imovel, NotificacaoBusca, TransacaoImovel
+from usuario.models import Usuario
+
+
+class BuscaSalvaTest(APITestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = Usuario.objects.create_user(username='testuser', password='12345')
+        self.client.force_authenticate(user=self.user)
+
+        self.aldeota = BuscaSalva.objects.create(
+            nome='Apartamento na Aldeota', email='cliente@exemplo.com', usuario=self.user, cidade='Fortaleza',
+            bairro='Aldeota', tipo_imovel='apartamento', tipo_transacao='venda', valor_maximo=500000, quartos_minimo=3,
+        )
+        self.aluguel = BuscaSalva.objects.create(
+            nome='Aluguel em Fortaleza', email='inquilino@exemplo.com', cidade='FORTALEZA', tipo_transacao='aluguel',
+        )
+        self.inativa = BuscaSalva.objects.create(nome='Qualquer imóvel', email='antigo@exemplo.com', ativa=False)
+
+    def _imovel(self, bairro='Aldeota', quartos=3, **transacoes):
+        with self.captureOnCommitCallbacks(execute=True):
+            imovel = Imovel.objects.create(
+                nome=f'Apto {bairro}', bairro=bairro, cidade='Fortaleza', estado='CE', cep='60000-000',
+                tipo_imovel='apartamento', num_quartos=quartos, numero_registro=f'{bairro}{quartos}',
+            )
+            for tipo_transacao, valor in transacoes.items():
+                TransacaoImovel.objects.create(imovel=imovel, tipo_transacao=tipo_transacao, valor=valor,
+                                               condicoes_pagamento='À vista', data_disponibilidade=date(2024, 1, 1))
+        return imovel
+
+    def test_criterios_normalizados(self):
+        self.assertEqual((self.aldeota.cidade, self.aldeota.bairro), ('fortaleza', 'aldeota'))
+
+    def test_percolar_apenas_buscas_atendidas(self):
+        imovel = self._imovel(venda=480000, aluguel=3000)
+
+        notificacoes = NotificacaoBusca.objects.filter(imovel=imovel)
+        self.assertEqual({notificacao.busca_id for notificacao in notificacoes}, {self.aldeota.id, self.aluguel.id})
+        self.assertEqual(notificacoes.get(busca=self.aluguel).transacao.tipo_transacao, 'aluguel')
+
+        # Fora da faixa de valor ou com menos quartos, a busca não é avisada
+        self._imovel(bairro='Aldeota', quartos=2, venda=400000)
+        self._imovel(bairro='Aldeota', quartos=4, venda=900000)
+        self.assertEqual(NotificacaoBusca.objects.filter(busca=self.aldeota).count(), 1)
+
+    def test_aviso_unico_por_imovel(self):
+        imovel = self._imovel(venda=480000)
+        with self.captureOnCommitCallbacks(execute=True):
+            imovel.save()
+        self.assertEqual(NotificacaoBusca.objects.filter(busca=self.aldeota, imovel=imovel).count(), 1)
+
+    def test_imovel_indisponivel_nao_gera_aviso(self):
+        imovel = self._imovel()
+        with self.captureOnCommitCallbacks(execute=True):
+            imovel.status = 'vendido'
+            imovel.save()
+            TransacaoImovel.objects.create(imovel=imovel, tipo_transacao='venda', valor=480000,
+                                           condicoes_pagamento='À vista', data_disponibilidade=date(2024, 1, 1))
+        self.assertFalse(NotificacaoBusca.objects.filter(busca=self.aldeota).exists())
+
+    def test_enviar_pendentes_agrupa_por_busca(self):
+        self._imovel(venda=480000)
+        self._imovel(bairro='Aldeota', quartos=4, venda=450000)
+
+        saida = StringIO()
+        call_command('enviar_notificacoes_buscas', stdout=saida)
+        self.assertIn('1 e-mail(s) enviado(s).', saida.getvalue())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['cliente@exemplo.com'])
+        self.assertEqual(len(mail.outbox[0].body.splitlines()), 2)
+        self.assertFalse(NotificacaoBusca.objects.filter(data_envio__isnull=True).exists())
+
+        # Avisos já enviados não são reenviados
+        self.assertEqual(NotificacaoBusca.enviar_pendentes(), 0)
+
+    def test_viewset_restrito_ao_usuario(self):
+        url = reverse('buscasalva-list')
+        response = self.client.post(url, {'nome': 'Casa', 'email': 'cliente@exemplo.com', 'tipo_imovel': 'casa'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(BuscaSalva.objects.get(pk=response.data['id']).usuario, self.user)
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_viewset_valida_faixa_de_valor(self):
+        response = self.client.post(reverse('buscasalva-list'), {
+            'nome': 'Casa', 'email': 'cliente@exemplo.com', 'valor_minimo': 500000, 'valor_maximo': 100000,
+        })
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,7 +1,7 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from imovel.models import Imovel, SituacaoFiscal, TransacaoImovel
-from imovel.serializers import ImovelSerializer, TransacaoImovelSerializer, SituacaoFiscalSerializer
+from imovel.models import BuscaSalva, Imovel, SituacaoFiscal, TransacaoImovel
+from imovel.serializers import BuscaSalvaSerializer, ImovelSerializer, TransacaoImovelSerializer, SituacaoFiscalSerializer
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 from rest_framework.decorators import action
@@ -12,7 +12,7 @@ class ImovelViewSet(viewsets.ModelViewSet):
 
     Este ViewSet permite realizar operações CRUD para o modelo Imovel.
     """
-    queryset = Imovel.objects.all().order_by('id')
+    queryset = Imovel.objects.select_related('capa').order_by('id')
     serializer_class = ImovelSerializer
     permission_classes = [IsAuthenticated]
 
@@ -213,3 +213,23 @@ class TransacaoImovelViewSet(viewsets.ModelViewSet):
         return Response(response_data, status=status.HTTP_200_OK)
 
 
+class BuscaSalvaViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para gerenciar as buscas salvas.
+
+    Cada usuário vê apenas as próprias buscas; administradores veem todas. Os avisos de novos
+    imóveis são gerados ao salvar imóveis e transações e enviados pelo comando
+    `enviar_notificacoes_buscas`.
+    """
+    serializer_class = BuscaSalvaSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = BuscaSalva.objects.order_by('id')
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(usuario=self.request.user)
+        return queryset
+
+    def perform_create(self, serializer):
+        serializer.save(usuario=self.request.user)
+
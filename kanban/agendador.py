@@ -0,0 +1,136 @@
+import heapq
+import threading
+import time
+from datetime import timedelta
+from django.core.cache import cache
+from django.utils import timezone
+from kanban.cache import cache_compartilhado
+from kanban.models import KanbanCard
+
+CHAVE_VERSAO = 'kanban:agendador:versao'
+
+
+class AgendadorTransicoes:
+    """
+    Agendador das mudanças de cor dos cards do Kanban.
+
+    Mantém em um heap as próximas transições de uma janela curta de tempo, carregadas
+    por uma consulta de faixa no índice de `KanbanCard.proxima_transicao`, e processa
+    apenas os cards cujo momento de transição já chegou.
+
+    Os cards gravados no mesmo processo entram no heap pelo sinal de `KanbanCard` (`agendar`)
+    e acordam a espera. As gravações de outros processos avançam uma versão no cache
+    compartilhado, que a espera consulta a cada `intervalo_verificacao` para recarregar a
+    janela. A recarga periódica continua cobrindo as alterações feitas sem sinais.
+    """
+
+    max_ids_por_ciclo = 1000
+
+    def __init__(self, janela=timedelta(minutes=5), intervalo_recarga=timedelta(seconds=30),
+                 intervalo_verificacao=timedelta(seconds=1)):
+        self.janela = janela
+        self.intervalo_recarga = intervalo_recarga
+        self.intervalo_verificacao = intervalo_verificacao
+        self.heap = []
+        self.fim = None  # fim da janela carregada no heap
+        self.proxima_recarga = None
+        self.versao = None
+        self.trava = threading.Lock()
+        self.despertador = threading.Event()
+
+    def recarregar(self, agora):
+        # A versão é lida antes da consulta para não perder avisos feitos durante a recarga
+        versao = self._versao_compartilhada()
+        fim = agora + self.janela
+        transicoes = list(
+            KanbanCard.objects
+            .filter(proxima_transicao__lte=fim)
+            .values_list('proxima_transicao', 'id')
+        )
+        heapq.heapify(transicoes)
+        with self.trava:
+            self.heap = transicoes
+            self.fim = fim
+            self.proxima_recarga = agora + self.intervalo_recarga
+            self.versao = versao
+
+    def agendar(self, momento, card_id):
+        """
+        Inclui a transição de um card gravado neste processo e avisa os agendadores dos outros processos.
+        """
+        if momento is None:
+            return
+        with self.trava:
+            if self.fim is not None and momento <= self.fim:
+                heapq.heappush(self.heap, (momento, card_id))
+                self.despertador.set()
+        self._avancar_versao()
+
+    def avisar(self):
+        """
+        Pede a recarga da janela após alterações que não passam pelos sinais dos cards
+        (gravações em lote ou mudança do prazo de uma coluna).
+        """
+        with self.trava:
+            self.proxima_recarga = None
+            self.despertador.set()
+        self._avancar_versao()
+
+    @staticmethod
+    def _versao_compartilhada():
+        return cache.get(CHAVE_VERSAO) if cache_compartilhado() else None
+
+    @staticmethod
+    def _avancar_versao():
+        if not cache_compartilhado():
+            return
+        cache.add(CHAVE_VERSAO, 0, timeout=None)
+        try:
+            cache.incr(CHAVE_VERSAO)
+        except ValueError:
+            # Expulsa do cache entre o add e o incr: a próxima leitura já difere da versão carregada
+            pass
+
+    def executar_ciclo(self, agora=None):
+        """
+        Processa as transições vencidas e retorna quantos segundos esperar até o próximo ciclo.
+        """
+        agora = agora or timezone.now()
+        if self.proxima_recarga is None or agora >= self.proxima_recarga:
+            self.recarregar(agora)
+
+        vencidos = []
+        with self.trava:
+            while self.heap and self.heap[0][0] <= agora:
+                vencidos.append(heapq.heappop(self.heap)[1])
+
+        # Entradas desatualizadas do heap são descartadas pelo filtro de proxima_transicao;
+        # um acúmulo grande (ex: após o agendador ficar parado) é processado sem lista de IDs
+        if len(vencidos) > self.max_ids_por_ciclo:
+            KanbanCard.processar_transicoes(agora)
+        elif vencidos:
+            KanbanCard.processar_transicoes(agora, card_ids=vencidos)
+
+        with self.trava:
+            proximo_evento = min(self.heap[0][0], self.proxima_recarga) if self.heap else self.proxima_recarga
+        # Após a recarga, proxima_recarga fica sempre depois de `agora`, então a espera avança
+        return max(0.0, (proximo_evento - agora).total_seconds())
+
+    def aguardar(self, segundos):
+        """
+        Espera até o próximo ciclo, retornando antes se uma transição for agendada neste
+        processo ou se outro processo avisar de uma alteração.
+        """
+        limite = time.monotonic() + segundos
+        while (restante := limite - time.monotonic()) > 0:
+            if self.despertador.wait(min(restante, self.intervalo_verificacao.total_seconds())):
+                self.despertador.clear()
+                return
+            versao = self._versao_compartilhada()
+            if versao is not None and versao != self.versao:
+                with self.trava:
+                    self.proxima_recarga = None
+                return
+
+
+agendador_transicoes = AgendadorTransicoes()
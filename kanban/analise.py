@@ -0,0 +1,122 @@
+"""
+Análise de funil do Kanban a partir do histórico de movimentações dos cards.
+
+As movimentações são lidas em uma única consulta, ordenadas por card e data, e toda
+a agregação é feita com operações vetorizadas do NumPy: a permanência em cada etapa é
+a diferença entre a entrada na etapa e a entrada seguinte do mesmo card (ou o momento
+atual, se o card ainda está nela), e a conversão entre duas etapas é a fração dos cards
+que passaram pela primeira e, depois disso, entraram na segunda. Os cards arquivados não
+contam entre os cards atuais das etapas.
+"""
+import numpy as np
+from django.utils import timezone
+from kanban.models import KanbanCardArquivado
+
+
+def _percentil(valores_ordenados, inicios, quantidades, fracao):
+    """Percentil (com interpolação linear) de cada grupo de um vetor ordenado por grupo."""
+    posicao = (np.maximum(quantidades, 1) - 1) * fracao
+    inferior = inicios + np.floor(posicao).astype(np.int64)
+    superior = inicios + np.ceil(posicao).astype(np.int64)
+    if not len(valores_ordenados):
+        return np.full(len(quantidades), np.nan)
+    inferior = np.minimum(inferior, len(valores_ordenados) - 1)
+    superior = np.minimum(superior, len(valores_ordenados) - 1)
+    resultado = valores_ordenados[inferior] + (valores_ordenados[superior] - valores_ordenados[inferior]) * (posicao % 1)
+    return np.where(quantidades > 0, resultado, np.nan)
+
+
+def _arredondar(valores):
+    return [None if np.isnan(valor) else round(float(valor), 2) for valor in valores]
+
+
+def analisar_funil(movimentacoes, ordem_etapas=(), agora=None):
+    """
+    Calcula, para um queryset de `KanbanMovimentacao`, o tempo em cada etapa e a conversão entre etapas.
+
+    `ordem_etapas` define a ordem das etapas no resultado (as demais vêm depois, em ordem
+    alfabética); a conversão é calculada de cada etapa para as etapas seguintes e conta apenas
+    os cards que entraram na etapa seguinte depois de entrar na primeira.
+    """
+    agora = np.datetime64(agora or timezone.now(), 'us')
+    linhas = list(movimentacoes.order_by('card_id', 'data', 'id').values_list('card_id', 'etapa', 'data'))
+    if not linhas:
+        return {"etapas": [], "conversao": []}
+
+    cards, etapas, datas = zip(*linhas)
+    cards = np.array(cards, dtype=np.int64)
+    datas = np.array(datas, dtype='datetime64[us]')
+    nomes, etapa_idx = np.unique(np.array(etapas, dtype=str), return_inverse=True)
+
+    # Reordena as etapas: primeiro as de `ordem_etapas`, depois as demais
+    posicoes = {nome: indice for indice, nome in enumerate(ordem_etapas)}
+    ordem = sorted(range(len(nomes)), key=lambda indice: (posicoes.get(nomes[indice], len(posicoes)), nomes[indice]))
+    nova_posicao = np.empty(len(nomes), dtype=np.int64)
+    nova_posicao[ordem] = np.arange(len(nomes))
+    nomes = nomes[ordem]
+    etapa_idx = nova_posicao[etapa_idx]
+    quantidade_etapas = len(nomes)
+
+    # Permanência: até a entrada seguinte do mesmo card, ou até agora na etapa atual
+    concluida = np.zeros(len(cards), dtype=bool)
+    concluida[:-1] = cards[1:] == cards[:-1]
+    saida = np.full(len(datas), agora)
+    saida[:-1] = np.where(concluida[:-1], datas[1:], agora)
+    horas = (saida - datas) / np.timedelta64(1, 'h')
+
+    entradas = np.bincount(etapa_idx, minlength=quantidade_etapas)
+    # O último registro de um card arquivado é a etapa de onde ele saiu para o arquivo
+    arquivados = np.isin(cards, list(
+        KanbanCardArquivado.objects.filter(id__in=movimentacoes.values('card_id')).values_list('id', flat=True)
+    ))
+    cards_atuais = np.bincount(etapa_idx[~concluida & ~arquivados], minlength=quantidade_etapas)
+    etapa_concluida = etapa_idx[concluida]
+    horas_concluidas = horas[concluida]
+    concluidas = np.bincount(etapa_concluida, minlength=quantidade_etapas)
+    soma_horas = np.bincount(etapa_concluida, weights=horas_concluidas, minlength=quantidade_etapas)
+    media = np.divide(soma_horas, concluidas, out=np.full(quantidade_etapas, np.nan), where=concluidas > 0)
+
+    horas_ordenadas = horas_concluidas[np.lexsort((horas_concluidas, etapa_concluida))]
+    inicios = np.concatenate(([0], np.cumsum(concluidas)[:-1]))
+    mediana = _percentil(horas_ordenadas, inicios, concluidas, 0.5)
+    p90 = _percentil(horas_ordenadas, inicios, concluidas, 0.9)
+
+    # Conversão: matrizes card x etapa com a primeira e a última entrada do card na etapa, pela
+    # posição da linha (as linhas estão em ordem de card e data). O card converte de uma etapa
+    # para outra se a primeira entrada na origem vem antes da última entrada no destino.
+    _, card_idx = np.unique(cards, return_inverse=True)
+    sequencia = np.arange(len(cards))
+    primeira = np.full((card_idx.max() + 1, quantidade_etapas), len(cards))
+    np.minimum.at(primeira, (card_idx, etapa_idx), sequencia)
+    ultima = np.full((card_idx.max() + 1, quantidade_etapas), -1)
+    np.maximum.at(ultima, (card_idx, etapa_idx), sequencia)
+    cards_por_etapa = (ultima >= 0).sum(axis=0)
+
+    origem, destino = np.triu_indices(quantidade_etapas, k=1)
+    convertidos = (primeira[:, origem] < ultima[:, destino]).sum(axis=0)
+    taxas = convertidos / cards_por_etapa[origem]
+
+    return {
+        "etapas": [
+            {
+                "etapa": str(nome),
+                "entradas": int(total_entradas),
+                "cards_atuais": int(atuais),
+                "tempo_medio_horas": tempo_medio,
+                "tempo_mediano_horas": tempo_mediano,
+                "tempo_p90_horas": tempo_p90,
+            }
+            for nome, total_entradas, atuais, tempo_medio, tempo_mediano, tempo_p90 in zip(
+                nomes, entradas, cards_atuais, _arredondar(media), _arredondar(mediana), _arredondar(p90)
+            )
+        ],
+        "conversao": [
+            {
+                "de": str(nomes[de]),
+                "para": str(nomes[para]),
+                "cards": int(total),
+                "taxa": round(float(taxa), 4),
+            }
+            for de, para, total, taxa in zip(origem, destino, convertidos, taxas)
+        ],
+    }
@@ -0,0 +1,26 @@
+"""
+Normalização dos dados de busca dos leads do Kanban.
+
+Os valores normalizados são gravados em colunas indexadas do card, permitindo buscar
+por prefixo do nome (sem acentos e sem diferenciar maiúsculas) e por telefone ou e-mail
+exatos sem ler o JSON de `contato`.
+"""
+import re
+
+TAMANHO_MINIMO_TELEFONE = 8
+
+
+def normalizar_telefone(valor):
+    """Mantém apenas os dígitos, sem o código do Brasil (55) e sem zeros à esquerda."""
+    digitos = re.sub(r'\D', '', str(valor or ''))
+    if digitos.startswith('55') and len(digitos) in (12, 13):
+        digitos = digitos[2:]
+    return digitos.lstrip('0')
+
+
+def normalizar_email(valor):
+    return str(valor or '').strip().lower()
+
+
+def parece_telefone(termo):
+    return bool(re.fullmatch(r'[\d\s()+\-.]+', termo)) and len(re.sub(r'\D', '', termo)) >= TAMANHO_MINIMO_TELEFONE
@@ -0,0 +1,18 @@
+"""
+Verificação do backend de cache usado pelas respostas do Kanban e pelo índice de compatibilidade.
+
+As versões guardadas no cache só invalidam os dados dos outros processos se todos lerem o
+mesmo cache. Com um backend local ao processo (LocMemCache) ou sem cache (DummyCache),
+o Kanban não guarda respostas e o índice de imóveis é reconstruído a cada consulta.
+"""
+from django.conf import settings
+
+BACKENDS_LOCAIS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_compartilhado(alias='default'):
+    """Indica se o cache `alias` é compartilhado entre os processos da aplicação."""
+    return settings.CACHES.get(alias, {}).get('BACKEND') not in BACKENDS_LOCAIS
@@ -0,0 +1,299 @@
+"""
+Compatibilidade entre os leads do Kanban e os imóveis disponíveis.
+
+O `IndiceImoveis` mantém em memória um índice invertido das ofertas disponíveis (cada
+transação de um imóvel disponível) por cidade, bairro, tipo do imóvel, tipo de transação e
+faixa de preço. Os critérios do lead são lidos de `KanbanCard.dados_adicionais`:
+
+    {"cidade": "Fortaleza", "bairro": ["Aldeota", "Meireles"], "tipo_imovel": ["apartamento", "casa"],
+     "tipo_transacao": "venda", "orcamento": 450000, "quartos": 3}
+
+Cidade, tipo do imóvel, tipo de transação e orçamento restringem as ofertas candidatas pelas
+listas do índice; bairro, quartos e proximidade do orçamento definem a pontuação. Bairro, tipo
+do imóvel e tipo de transação aceitam um valor ou uma lista de valores. Os textos são comparados
+sem acentos e sem diferenciar maiúsculas.
+
+O índice é atualizado por imóvel quando um `Imovel` ou `TransacaoImovel` é gravado neste
+processo. Uma versão compartilhada no cache do Django avisa os outros processos, que
+reconstroem o índice na consulta seguinte. Isso exige um cache compartilhado entre os
+processos; com um cache local ao processo o índice é reconstruído a cada consulta.
+"""
+import math
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from decimal import Decimal, InvalidOperation
+from django.core.cache import cache
+from imovel.models import Imovel
+from core.texto import normalizar_texto
+from kanban.cache import cache_compartilhado
+
+CHAVE_VERSAO = 'kanban:compatibilidade:versao'
+
+# Razão entre faixas de preço consecutivas (cada faixa cobre 25% a mais que a anterior)
+RAZAO_FAIXA_PRECO = 1.25
+# Ofertas consideradas em relação ao orçamento do lead: até 10% acima e a partir da metade
+TOLERANCIA_ACIMA_ORCAMENTO = 0.10
+FRACAO_MINIMA_ORCAMENTO = 0.5
+
+# Pesos da pontuação
+PESO_BAIRRO = 3.0
+PESO_ORCAMENTO = 2.0
+PESO_QUARTOS = 1.0
+
+LIMITE_RESULTADOS = 10
+
+
+def faixa_preco(valor):
+    return int(math.log(valor, RAZAO_FAIXA_PRECO)) if valor and valor > 1 else 0
+
+
+def _numero(valor):
+    try:
+        numero = float(Decimal(str(valor)))
+    except (InvalidOperation, ValueError):
+        return None
+    return numero if math.isfinite(numero) else None
+
+
+def _termos(valor):
+    """Conjunto dos textos normalizados de um critério informado como valor único ou lista."""
+    valores = valor if isinstance(valor, list) else [valor]
+    return frozenset(
+        normalizar_texto(item) for item in valores
+        if isinstance(item, (str, int, float)) and not isinstance(item, bool) and normalizar_texto(item)
+    )
+
+
+def criterios_do_lead(dados_adicionais):
+    """Extrai e normaliza os critérios de busca do lead a partir dos dados adicionais do card."""
+    dados = dados_adicionais if isinstance(dados_adicionais, dict) else {}
+    return {
+        'cidade': normalizar_texto(dados.get('cidade')) or None,
+        'bairros': _termos(dados.get('bairro')),
+        'tipo_imovel': _termos(dados.get('tipo_imovel')),
+        'tipo_transacao': _termos(dados.get('tipo_transacao')),
+        'orcamento': _numero(dados.get('orcamento')) if dados.get('orcamento') not in (None, '') else None,
+        'quartos': _numero(dados.get('quartos')) if dados.get('quartos') not in (None, '') else None,
+    }
+
+
+class IndiceImoveis:
+    """
+    Índice invertido em memória das ofertas de imóveis disponíveis.
+
+    Cada oferta é uma transação de um imóvel disponível, identificada pelo ID da transação.
+    As listas do índice ligam cada termo (cidade, bairro, tipo, transação e faixa de preço)
+    ao conjunto de ofertas que o possuem.
+    """
+
+    def __init__(self):
+        self.ofertas = {}  # transacao_id -> dados da oferta
+        self.ofertas_do_imovel = {}  # imovel_id -> conjunto de IDs das transações
+        self.listas = {}  # (campo, termo) -> conjunto de IDs das transações
+        self.faixas = []  # faixas de preço presentes, em ordem
+        self.versao = None
+        self.trava = threading.RLock()
+
+    # Manutenção do índice
+
+    @staticmethod
+    def _termos(oferta):
+        return [
+            ('cidade', oferta['cidade']),
+            ('bairro', oferta['bairro']),
+            ('tipo_imovel', oferta['tipo_imovel']),
+            ('tipo_transacao', oferta['tipo_transacao']),
+            ('faixa', faixa_preco(oferta['valor'])),
+        ]
+
+    def _adicionar(self, oferta):
+        self.ofertas[oferta['id']] = oferta
+        self.ofertas_do_imovel.setdefault(oferta['imovel_id'], set()).add(oferta['id'])
+        for termo in self._termos(oferta):
+            self.listas.setdefault(termo, set()).add(oferta['id'])
+            if termo[0] == 'faixa':
+                posicao = bisect_left(self.faixas, termo[1])
+                if posicao == len(self.faixas) or self.faixas[posicao] != termo[1]:
+                    self.faixas.insert(posicao, termo[1])
+
+    def _remover_imovel(self, imovel_id):
+        for oferta_id in self.ofertas_do_imovel.pop(imovel_id, ()):
+            oferta = self.ofertas.pop(oferta_id)
+            for termo in self._termos(oferta):
+                lista = self.listas.get(termo)
+                lista.discard(oferta_id)
+                if not lista:
+                    del self.listas[termo]
+                    if termo[0] == 'faixa':
+                        self.faixas.remove(termo[1])
+
+    @staticmethod
+    def _carregar_ofertas(imoveis):
+        """Lê as transações dos imóveis disponíveis do queryset `imoveis` em uma consulta."""
+        transacoes = (
+            imoveis.filter(status='disponivel', disponibilidade=True)
+            .values('transacoes__id', 'id', 'nome', 'cidade', 'bairro', 'tipo_imovel', 'num_quartos',
+                    'transacoes__tipo_transacao', 'transacoes__valor')
+        )
+        return [
+            {
+                'id': transacao['transacoes__id'],
+                'imovel_id': transacao['id'],
+                'nome': transacao['nome'],
+                'cidade': normalizar_texto(transacao['cidade']),
+                'bairro': normalizar_texto(transacao['bairro']),
+                'tipo_imovel': normalizar_texto(transacao['tipo_imovel']),
+                'quartos': transacao['num_quartos'],
+                'tipo_transacao': normalizar_texto(transacao['transacoes__tipo_transacao']),
+                'valor': float(transacao['transacoes__valor']),
+            }
+            for transacao in transacoes
+            if transacao['transacoes__id'] is not None
+        ]
+
+    def reconstruir(self):
+        """Recarrega todas as ofertas disponíveis."""
+        versao = self._versao_compartilhada() if cache_compartilhado() else None
+        ofertas = self._carregar_ofertas(Imovel.objects.all())
+        with self.trava:
+            self.ofertas, self.ofertas_do_imovel, self.listas, self.faixas = {}, {}, {}, []
+            for oferta in ofertas:
+                self._adicionar(oferta)
+            self.versao = versao
+
+    def atualizar_imovel(self, imovel_id):
+        """
+        Atualiza no índice as ofertas de um imóvel gravado neste processo e avança a versão
+        compartilhada. Se outro processo também alterou os imóveis, a próxima consulta reconstrói o índice.
+        """
+        if not cache_compartilhado():
+            # Sem versão compartilhada o índice já é reconstruído a cada consulta
+            return
+        if self.versao is None:
+            # Índice ainda não construído neste processo: basta avisar os outros
+            self._avancar_versao()
+            return
+
+        ofertas = self._carregar_ofertas(Imovel.objects.filter(pk=imovel_id))
+        with self.trava:
+            self._remover_imovel(imovel_id)
+            for oferta in ofertas:
+                self._adicionar(oferta)
+            nova_versao = self._avancar_versao()
+            em_dia = nova_versao is not None and self.versao is not None and nova_versao == self.versao + 1
+            self.versao = nova_versao if em_dia else None
+
+    @staticmethod
+    def _versao_compartilhada():
+        versao = cache.get(CHAVE_VERSAO)
+        if versao is None:
+            # Iniciada a partir do relógio para nunca repetir uma versão anterior expulsa do cache
+            cache.add(CHAVE_VERSAO, time.time_ns(), timeout=None)
+            versao = cache.get(CHAVE_VERSAO)
+        return versao
+
+    @staticmethod
+    def _avancar_versao():
+        try:
+            return cache.incr(CHAVE_VERSAO)
+        except ValueError:
+            return None
+
+    def sincronizar(self):
+        """
+        Reconstrói o índice se outro processo alterou os imóveis desde a última leitura.
+        Com um cache local ao processo as alterações dos outros processos não seriam vistas,
+        então o índice é sempre reconstruído.
+        """
+        if not cache_compartilhado() or self.versao is None or self.versao != self._versao_compartilhada():
+            self.reconstruir()
+
+    # Consulta
+
+    def _candidatos(self, criterios):
+        """
+        IDs das ofertas que atendem aos filtros do lead, pela interseção das listas do índice.
+        Um critério com vários valores aceita a união das listas de cada valor.
+        """
+        conjuntos = []
+        if criterios['cidade']:
+            conjuntos.append(self.listas.get(('cidade', criterios['cidade']), set()))
+        for campo in ('tipo_imovel', 'tipo_transacao'):
+            if criterios[campo]:
+                conjuntos.append(set().union(*(self.listas.get((campo, termo), set()) for termo in criterios[campo])))
+        orcamento = criterios['orcamento']
+        if orcamento:
+            inicio = bisect_left(self.faixas, faixa_preco(orcamento * FRACAO_MINIMA_ORCAMENTO))
+            fim = bisect_right(self.faixas, faixa_preco(orcamento * (1 + TOLERANCIA_ACIMA_ORCAMENTO)))
+            conjuntos.append(set().union(*(self.listas[('faixa', faixa)] for faixa in self.faixas[inicio:fim])))
+
+        if not conjuntos:
+            return set(self.ofertas)
+        conjuntos.sort(key=len)
+        return set(conjuntos[0]).intersection(*conjuntos[1:])
+
+    @staticmethod
+    def _pontuar(oferta, criterios):
+        """Pontuação da oferta para o lead, ou None se ela estiver fora do orçamento."""
+        pontuacao = 0.0
+        orcamento = criterios['orcamento']
+        if orcamento:
+            if not orcamento * FRACAO_MINIMA_ORCAMENTO <= oferta['valor'] <= orcamento * (1 + TOLERANCIA_ACIMA_ORCAMENTO):
+                return None
+            pontuacao += PESO_ORCAMENTO * (1 - abs(oferta['valor'] - orcamento) / orcamento)
+        if criterios['bairros'] and oferta['bairro'] in criterios['bairros']:
+            pontuacao += PESO_BAIRRO
+        if criterios['quartos'] is not None and oferta['quartos'] >= criterios['quartos']:
+            pontuacao += PESO_QUARTOS
+        return pontuacao
+
+    def _ordenar(self, candidatos, criterios, limite):
+        resultados = []
+        for oferta_id in candidatos:
+            oferta = self.ofertas[oferta_id]
+            pontuacao = self._pontuar(oferta, criterios)
+            if pontuacao is not None:
+                resultados.append((pontuacao, oferta))
+        resultados.sort(key=lambda item: (-item[0], item[1]['valor'], item[1]['id']))
+        return [
+            {
+                'imovel_id': oferta['imovel_id'],
+                'transacao_id': oferta['id'],
+                'nome': oferta['nome'],
+                'bairro': oferta['bairro'],
+                'tipo_transacao': oferta['tipo_transacao'],
+                'valor': oferta['valor'],
+                'pontuacao': round(pontuacao, 4),
+            }
+            for pontuacao, oferta in resultados[:limite]
+        ]
+
+    def compativeis(self, dados_adicionais, limite=LIMITE_RESULTADOS):
+        """Retorna as ofertas mais compatíveis com os critérios do lead, da maior para a menor pontuação."""
+        self.sincronizar()
+        criterios = criterios_do_lead(dados_adicionais)
+        with self.trava:
+            return self._ordenar(self._candidatos(criterios), criterios, limite)
+
+    def compativeis_em_lote(self, cards, limite=LIMITE_RESULTADOS):
+        """
+        Retorna um dicionário ID do card -> ofertas compatíveis, em uma única passada pelos cards.
+        Leads com os mesmos filtros reaproveitam o conjunto de candidatos já calculado.
+        Os cards são lidos do banco antes de tomar a trava do índice.
+        """
+        cards = list(cards)
+        self.sincronizar()
+        candidatos_por_filtro = {}
+        resultado = {}
+        with self.trava:
+            for card in cards:
+                criterios = criterios_do_lead(card.dados_adicionais)
+                filtro = (criterios['cidade'], criterios['tipo_imovel'], criterios['tipo_transacao'], criterios['orcamento'])
+                if filtro not in candidatos_por_filtro:
+                    candidatos_por_filtro[filtro] = self._candidatos(criterios)
+                resultado[card.pk] = self._ordenar(candidatos_por_filtro[filtro], criterios, limite)
+        return resultado
+
+
+indice_imoveis = IndiceImoveis()
@@ -0,0 +1,164 @@
+"""
+Envio das alterações dos Kanbans aos navegadores por server-sent events (SSE).
+
+Cada conexão é uma corrotina que aguarda eventos em uma fila do `BrokerEventos`. Para
+cada Kanban com conexões abertas, o broker mantém uma única tarefa que consulta as
+alterações no banco (`Kanban.alteracoes_desde`) e as distribui para todas as filas.
+Como a consulta é feita no banco, alterações gravadas por outros workers também chegam;
+as gravações deste processo acordam a tarefa assim que a transação é confirmada
+(`notificar`), sem esperar o intervalo de consulta.
+"""
+import asyncio
+import json
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from kanban.models import Kanban, MARGEM_SINCRONIZACAO
+
+# Intervalo, em segundos, entre consultas ao banco quando não há notificação local
+INTERVALO_CONSULTA = 2
+# Intervalo, em segundos, entre comentários de keep-alive enviados às conexões ociosas
+INTERVALO_KEEPALIVE = 15
+# Eventos pendentes por conexão; um cliente lento além disso recebe um pedido de recarga
+TAMANHO_FILA = 100
+
+
+def consultar_alteracoes(kanban_id, desde):
+    """Retorna as alterações do Kanban desde `desde`, ou None se o Kanban não existe mais."""
+    kanban = Kanban.objects.filter(pk=kanban_id).first()
+    return kanban.alteracoes_desde(desde) if kanban else None
+
+
+def formatar_evento(evento):
+    return f"event: {evento['tipo']}\ndata: {json.dumps(evento['dados'], cls=DjangoJSONEncoder)}\n\n"
+
+
+class BrokerEventos:
+    """
+    Broker em memória que distribui as alterações de cada Kanban às conexões abertas no processo.
+    """
+
+    def __init__(self, intervalo=INTERVALO_CONSULTA):
+        self.intervalo = intervalo
+        self.filas = {}  # kanban_id -> conjunto de filas das conexões
+        self.tarefas = {}  # kanban_id -> tarefa que consulta o banco
+        self.despertadores = {}  # kanban_id -> asyncio.Event para consultar imediatamente
+        self.loop = None
+
+    def inscrever(self, kanban_id):
+        self.loop = asyncio.get_running_loop()
+        fila = asyncio.Queue(maxsize=TAMANHO_FILA)
+        self.filas.setdefault(kanban_id, set()).add(fila)
+        if kanban_id not in self.tarefas:
+            self.despertadores[kanban_id] = asyncio.Event()
+            self.tarefas[kanban_id] = asyncio.create_task(self._monitorar(kanban_id))
+        return fila
+
+    def cancelar(self, kanban_id, fila):
+        filas = self.filas.get(kanban_id)
+        if filas is None:
+            return
+        filas.discard(fila)
+        if not filas:
+            # Última conexão do Kanban: encerra a consulta ao banco
+            del self.filas[kanban_id]
+            del self.despertadores[kanban_id]
+            self.tarefas.pop(kanban_id).cancel()
+
+    def publicar(self, kanban_id, evento):
+        for fila in self.filas.get(kanban_id, ()):
+            try:
+                fila.put_nowait(evento)
+            except asyncio.QueueFull:
+                # O cliente não está acompanhando: descarta o pendente e pede a recarga do quadro
+                while not fila.empty():
+                    fila.get_nowait()
+                fila.put_nowait({'tipo': 'recarregar', 'dados': {}})
+
+    def notificar(self):
+        """
+        Acorda as tarefas de consulta para buscarem as alterações imediatamente.
+        Pode ser chamado de qualquer thread (por exemplo, de views síncronas).
+        """
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+        for despertador in list(self.despertadores.values()):
+            loop.call_soon_threadsafe(despertador.set)
+
+    async def _monitorar(self, kanban_id):
+        despertador = self.despertadores[kanban_id]
+        cursor = timezone.now() - MARGEM_SINCRONIZACAO
+        enviados = {}
+        while True:
+            try:
+                await asyncio.wait_for(despertador.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+            despertador.clear()
+
+            alteracoes = await sync_to_async(consultar_alteracoes)(kanban_id, cursor)
+            if alteracoes is None or alteracoes['completo']:
+                self.publicar(kanban_id, {'tipo': 'recarregar', 'dados': {}})
+                if alteracoes is None:
+                    return
+                cursor = alteracoes['cursor']
+                continue
+
+            cursor = alteracoes['cursor']
+            evento, enviados = self._filtrar_enviados(alteracoes, enviados)
+            if evento['colunas'] or evento['cards'] or any(evento['removidos'].values()):
+                self.publicar(kanban_id, {'tipo': 'alteracoes', 'dados': evento})
+
+    @staticmethod
+    def _filtrar_enviados(alteracoes, enviados):
+        """
+        O cursor tem uma margem de segurança, então as mesmas alterações voltam nas consultas
+        seguintes; remove as que já foram enviadas sem mudança na consulta anterior.
+        """
+        atuais = {}
+        evento = {'cursor': alteracoes['cursor'], 'versao': alteracoes['versao'], 'removidos': {}}
+        for tipo in ('colunas', 'cards'):
+            evento[tipo] = []
+            for item in alteracoes[tipo]:
+                chave = (tipo, item['id'])
+                atuais[chave] = json.dumps(item, cls=DjangoJSONEncoder, sort_keys=True)
+                if enviados.get(chave) != atuais[chave]:
+                    evento[tipo].append(item)
+        for tipo, ids in alteracoes['removidos'].items():
+            evento['removidos'][tipo] = []
+            for objeto_id in ids:
+                chave = ('removido', tipo, objeto_id)
+                atuais[chave] = ''
+                if chave not in enviados:
+                    evento['removidos'][tipo].append(objeto_id)
+        return evento, atuais
+
+
+broker = BrokerEventos()
+
+
+async def fluxo_eventos(kanban_id, desde=None, broker=broker):
+    """
+    Gera o fluxo SSE de uma conexão. Se `desde` for informado, começa enviando as
+    alterações feitas desde esse cursor, cobrindo o intervalo até a inscrição no broker.
+    """
+    fila = broker.inscrever(kanban_id)
+    try:
+        yield "retry: 3000\n\n"
+        if desde is not None:
+            alteracoes = await sync_to_async(consultar_alteracoes)(kanban_id, desde)
+            if alteracoes is None or alteracoes['completo']:
+                yield formatar_evento({'tipo': 'recarregar', 'dados': {}})
+            else:
+                yield formatar_evento({'tipo': 'alteracoes', 'dados': alteracoes})
+
+        while True:
+            try:
+                evento = await asyncio.wait_for(fila.get(), timeout=INTERVALO_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield formatar_evento(evento)
+    finally:
+        broker.cancelar(kanban_id, fila)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from kanban.agendador import agendador_transicoes
+
+
+class Command(BaseCommand):
+    help = "Executa o agendador que atualiza a cor dos cards do Kanban no momento de cada transição."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--uma-vez', action='store_true', help="Executa um único ciclo e encerra")
+
+    def handle(self, *args, **options):
+        while True:
+            espera = agendador_transicoes.executar_ciclo()
+            if options['uma_vez']:
+                break
+            agendador_transicoes.aguardar(espera)
@@ -0,0 +1,15 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from kanban.models import KanbanCardArquivado, IDADE_ARQUIVAMENTO
+
+
+class Command(BaseCommand):
+    help = "Arquiva os cards das colunas finais do Kanban sem alteração há mais do que a idade configurada."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=IDADE_ARQUIVAMENTO.days,
+                            help="Idade mínima, em dias desde a última alteração, dos cards arquivados")
+
+    def handle(self, *args, **options):
+        total = KanbanCardArquivado.arquivar(idade=timedelta(days=options['dias']))
+        self.stdout.write(f"{total} card(s) arquivado(s).")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from kanban.models import KanbanRemocao
+
+
+class Command(BaseCommand):
+    help = "Remove os registros de remoção do Kanban mais antigos que a retenção da sincronização incremental."
+
+    def handle(self, *args, **options):
+        total = KanbanRemocao.limpar_antigas()
+        self.stdout.write(f"{total} registro(s) de remoção apagado(s).")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from kanban.models import KanbanColumn
+from kanban.ranking import TAMANHO_MAXIMO_RANK
+
+
+class Command(BaseCommand):
+    help = "Redistribui os ranks das colunas do Kanban cujos ranks ficaram longos. Deve ser executado periodicamente."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tamanho-maximo',
+            type=int,
+            default=TAMANHO_MAXIMO_RANK,
+            help="Tamanho de rank a partir do qual a coluna é rebalanceada.",
+        )
+
+    def handle(self, *args, **options):
+        total = KanbanColumn.rebalancear_ranks_longos(options['tamanho_maximo'])
+        self.stdout.write(f"{total} coluna(s) rebalanceada(s).")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from kanban.models import KanbanColumn
+
+
+class Command(BaseCommand):
+    help = "Recalcula a cor de alerta de todos os cards do Kanban. Deve ser executado periodicamente."
+
+    def handle(self, *args, **options):
+        total = KanbanColumn.recalcular_cores_de_todas()
+        self.stdout.write(f"{total} card(s) com a cor atualizada.")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from kanban.models import Kanban
+
+
+class Command(BaseCommand):
+    help = "Reconstrói os atributos indexados dos campos promovidos de dados_adicionais dos cards."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kanban', type=int, help="ID do Kanban a sincronizar (padrão: todos).")
+
+    def handle(self, *args, **options):
+        kanbans = Kanban.objects.all()
+        if options['kanban']:
+            kanbans = Kanban.objects.filter(pk=options['kanban'])
+
+        total = 0
+        for kanban in kanbans.iterator():
+            total += kanban.sincronizar_atributos()
+        self.stdout.write(f"{total} atributo(s) gravado(s).")
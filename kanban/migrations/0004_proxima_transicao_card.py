@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-19 11:28
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models import Case, F, When
+from django.utils import timezone
+
+
+def agendar_transicoes(apps, schema_editor):
+    KanbanColumn = apps.get_model('kanban', 'KanbanColumn')
+    KanbanCard = apps.get_model('kanban', 'KanbanCard')
+    agora = timezone.now()
+    for coluna in KanbanColumn.objects.all():
+        metade_prazo = timedelta(hours=coluna.prazo_alerta / 2)
+        prazo = timedelta(hours=coluna.prazo_alerta)
+        KanbanCard.objects.filter(coluna=coluna).update(proxima_transicao=Case(
+            When(data_criacao__gt=agora - metade_prazo, then=F('data_criacao') + metade_prazo),
+            When(data_criacao__gte=agora - prazo, then=F('data_criacao') + prazo),
+            default=None,
+            output_field=models.DateTimeField(),
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0003_kanbancard_contato_kanbancard_contrato_assinado_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancard',
+            name='proxima_transicao',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, help_text='Momento da próxima mudança de cor do card', null=True),
+        ),
+        migrations.RunPython(agendar_transicoes, migrations.RunPython.noop),
+    ]
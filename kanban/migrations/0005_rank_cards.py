@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-19 11:32
+
+from django.db import migrations, models
+from kanban.ranking import ranks_distribuidos
+
+
+def distribuir_ranks(apps, schema_editor):
+    # Mantém a ordem de criação dos cards existentes em cada coluna
+    KanbanColumn = apps.get_model('kanban', 'KanbanColumn')
+    KanbanCard = apps.get_model('kanban', 'KanbanCard')
+    for coluna in KanbanColumn.objects.all():
+        cards = list(KanbanCard.objects.filter(coluna=coluna).order_by('id').only('id'))
+        for card, rank in zip(cards, ranks_distribuidos(len(cards))):
+            card.rank = rank
+        KanbanCard.objects.bulk_update(cards, ['rank'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imovel', '0002_resumo_midia'),
+        ('kanban', '0004_proxima_transicao_card'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancard',
+            name='rank',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Posição do card na coluna, em ordem lexicográfica', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='kanbancard',
+            index=models.Index(fields=['coluna', 'rank'], name='kanban_card_coluna_rank_idx'),
+        ),
+        migrations.RunPython(distribuir_ranks, migrations.RunPython.noop),
+    ]
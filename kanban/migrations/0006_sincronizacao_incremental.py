@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-19 11:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0005_rank_cards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancolumn',
+            name='ultima_atualizacao',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='kanbancard',
+            name='ultima_atualizacao',
+            field=models.DateTimeField(auto_now=True, db_index=True),
+        ),
+        migrations.CreateModel(
+            name='KanbanRemocao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('card', 'Card'), ('coluna', 'Coluna')], max_length=10)),
+                ('objeto_id', models.PositiveBigIntegerField()),
+                ('data_remocao', models.DateTimeField(auto_now_add=True)),
+                ('kanban', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='remocoes', to='kanban.kanban')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kanban', 'data_remocao'], name='kanban_remocao_data_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1 on 2026-10-19 11:42
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def registrar_colunas_atuais(apps, schema_editor):
+    # Sem histórico anterior, considera que cada card entrou na coluna atual ao ser criado
+    KanbanCard = apps.get_model('kanban', 'KanbanCard')
+    KanbanColumnOrder = apps.get_model('kanban', 'KanbanColumnOrder')
+    KanbanMovimentacao = apps.get_model('kanban', 'KanbanMovimentacao')
+    kanbans = dict(KanbanColumnOrder.objects.values_list('coluna_id', 'kanban_id'))
+    KanbanMovimentacao.objects.bulk_create(
+        (
+            KanbanMovimentacao(card_id=card_id, kanban_id=kanbans.get(coluna_id), coluna_id=coluna_id, etapa=etapa, data=data)
+            for card_id, coluna_id, etapa, data in KanbanCard.objects.values_list('id', 'coluna_id', 'coluna__nome', 'data_criacao').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0006_sincronizacao_incremental'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KanbanMovimentacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('etapa', models.CharField(help_text='Nome da coluna no momento da entrada', max_length=100)),
+                ('data', models.DateTimeField(default=django.utils.timezone.now)),
+                ('card', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimentacoes', to='kanban.kanbancard')),
+                ('coluna', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimentacoes', to='kanban.kanbancolumn')),
+                ('kanban', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='movimentacoes', to='kanban.kanban')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['card', 'data'], name='kanban_mov_card_data_idx'), models.Index(fields=['kanban', 'data'], name='kanban_mov_kanban_data_idx')],
+            },
+        ),
+        migrations.RunPython(registrar_colunas_atuais, migrations.RunPython.noop),
+    ]
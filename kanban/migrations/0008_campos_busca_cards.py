@@ -0,0 +1,49 @@
+# Generated by Django 5.1 on 2026-10-19 11:44
+
+from django.db import migrations, models
+from core.texto import normalizar_texto
+from kanban.busca import normalizar_telefone, normalizar_email
+
+
+def preencher_campos_busca(apps, schema_editor):
+    KanbanCard = apps.get_model('kanban', 'KanbanCard')
+    cards = []
+    for card in KanbanCard.objects.only('id', 'lead_nome', 'contato').iterator():
+        contato = card.contato if isinstance(card.contato, dict) else {}
+        card.busca_nome = normalizar_texto(card.lead_nome)[:100]
+        card.busca_telefone = normalizar_telefone(contato.get('telefone'))[:20]
+        card.busca_whatsapp = normalizar_telefone(contato.get('whatsapp'))[:20]
+        card.busca_email = normalizar_email(contato.get('email'))[:254]
+        cards.append(card)
+    KanbanCard.objects.bulk_update(cards, ['busca_nome', 'busca_telefone', 'busca_whatsapp', 'busca_email'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0007_movimentacao_cards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancard',
+            name='busca_email',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='kanbancard',
+            name='busca_nome',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='kanbancard',
+            name='busca_telefone',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='kanbancard',
+            name='busca_whatsapp',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(preencher_campos_busca, migrations.RunPython.noop),
+    ]
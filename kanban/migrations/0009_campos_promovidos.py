@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-19 11:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0008_campos_busca_cards'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanban',
+            name='campos_promovidos',
+            field=models.JSONField(blank=True, default=list, help_text='Chaves de `dados_adicionais` dos cards com filtro e ordenação indexados, no formato [{"chave": "orcamento", "tipo": "numero"}]'),
+        ),
+        migrations.CreateModel(
+            name='KanbanCardAtributo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chave', models.CharField(max_length=50)),
+                ('valor_texto', models.CharField(blank=True, default='', max_length=255)),
+                ('valor_numero', models.DecimalField(blank=True, decimal_places=2, max_digits=14, null=True)),
+                ('card', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atributos', to='kanban.kanbancard')),
+                ('kanban', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atributos', to='kanban.kanban')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kanban', 'chave', 'valor_texto'], name='kanban_atributo_texto_idx'), models.Index(fields=['kanban', 'chave', 'valor_numero'], name='kanban_atributo_numero_idx')],
+                'unique_together': {('card', 'chave')},
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.1 on 2026-10-19 11:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imovel', '0002_resumo_midia'),
+        ('kanban', '0009_campos_promovidos'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='KanbanCardArquivado',
+            fields=[
+                ('lead_nome', models.CharField(max_length=100)),
+                ('descricao', models.TextField(blank=True)),
+                ('data_prazo', models.DateTimeField(blank=True, null=True)),
+                ('dados_adicionais', models.JSONField(blank=True, default=dict, help_text='Campo para dados dinâmicos adicionais')),
+                ('contato', models.JSONField(blank=True, default=dict, help_text='Informações de contato do lead, como telefone, WhatsApp, e e-mail', null=True)),
+                ('data_visita', models.DateTimeField(blank=True, help_text='Data e hora da visita agendada', null=True)),
+                ('observacoes_visita', models.TextField(blank=True, help_text='Observações sobre a visita')),
+                ('valor_final', models.DecimalField(blank=True, decimal_places=2, help_text='Valor final da negociação', max_digits=10, null=True)),
+                ('tipo_garantia', models.CharField(blank=True, help_text='Tipo de garantia', max_length=100)),
+                ('prazo_vigencia', models.CharField(blank=True, help_text='Prazo de vigência do contrato', max_length=100)),
+                ('metodo_pagamento', models.CharField(blank=True, help_text='Método de pagamento', max_length=100)),
+                ('documentos_anexados', models.TextField(blank=True, help_text='Documentos anexados para análise')),
+                ('status_documentacao', models.CharField(blank=True, help_text='Status da documentação', max_length=100)),
+                ('resultado_analise_credito', models.CharField(blank=True, help_text='Resultado da análise de crédito', max_length=100)),
+                ('data_assinatura', models.DateTimeField(blank=True, help_text='Data da assinatura do contrato', null=True)),
+                ('contrato_assinado', models.TextField(blank=True, help_text='Contrato assinado anexado')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('etapa', models.CharField(help_text='Nome da coluna no momento do arquivamento', max_length=100)),
+                ('data_criacao', models.DateTimeField()),
+                ('ultima_atualizacao', models.DateTimeField()),
+                ('data_arquivamento', models.DateTimeField(default=django.utils.timezone.now)),
+                ('coluna', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='cards_arquivados', to='kanban.kanbancolumn')),
+                ('imovel', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='cards_arquivados', to='imovel.imovel')),
+                ('kanban', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cards_arquivados', to='kanban.kanban')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kanban', 'data_arquivamento'], name='kanban_arquivado_data_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1 on 2026-10-19 11:57
+
+from datetime import timedelta
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+from django.utils import timezone
+
+
+def preencher_nivel_alerta(apps, schema_editor):
+    # Mesmo cálculo de `KanbanColumn.expressao_nivel_alerta`, com um UPDATE por coluna
+    KanbanColumn = apps.get_model('kanban', 'KanbanColumn')
+    KanbanCard = apps.get_model('kanban', 'KanbanCard')
+    agora = timezone.now()
+    for coluna in KanbanColumn.objects.all():
+        KanbanCard.objects.filter(coluna=coluna).update(nivel_alerta=Case(
+            When(data_criacao__lt=agora - timedelta(hours=coluna.prazo_alerta), then=Value(2)),
+            When(data_criacao__lte=agora - timedelta(hours=coluna.prazo_alerta / 2), then=Value(1)),
+            default=Value(0),
+        ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imovel', '0002_resumo_midia'),
+        ('kanban', '0010_cards_arquivados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancard',
+            name='nivel_alerta',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'No prazo'), (1, 'Atenção'), (2, 'Alerta')], default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='kanbancard',
+            index=models.Index(fields=['nivel_alerta', 'data_criacao'], name='kanban_card_alerta_idx'),
+        ),
+        migrations.RunPython(preencher_nivel_alerta, migrations.RunPython.noop),
+    ]
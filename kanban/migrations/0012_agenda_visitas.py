@@ -0,0 +1,22 @@
+# Generated by Django 5.1 on 2026-10-19 12:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imovel', '0003_buscas_salvas'),
+        ('kanban', '0011_nivel_alerta'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='kanbancard',
+            index=models.Index(fields=['data_visita'], name='kanban_card_visita_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='kanbancard',
+            index=models.Index(fields=['imovel', 'data_visita'], name='kanban_card_imovel_visita_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-19 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('kanban', '0012_agenda_visitas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='kanbancolumn',
+            name='lote',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Identificador temporário da criação em lote, usado para reler os IDs em bancos que não os retornam e apagado ao fim da criação', max_length=32, null=True),
+        ),
+    ]
@@ -1,10 +1,58 @@
 from usuario.models import Usuario
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from django.db import models
-from django.db.models import F, Max
+from django.db import connection, models, transaction
+from django.db.models import F, Q, Count, Max, Window, Case, When, Value, CharField, OuterRef, Subquery
+from django.db.models.functions import RowNumber, Length
 from imovel.models import Imovel
+from kanban.ranking import rank_entre, ranks_distribuidos, TAMANHO_MAXIMO_RANK
+from kanban.cache import cache_compartilhado
+from core.texto import normalizar_texto
+from kanban.busca import normalizar_telefone, normalizar_email, parece_telefone
+from kanban.validacao import obter_validador
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+import copy
+import time
+import uuid
 
+# Cor de alerta intermediária (amarela), usada a partir da metade do prazo da coluna
+COR_INTERMEDIARIA = '#FFFF00'
+
+# Nível de alerta do card, que acompanha a cor: no prazo, após a metade do prazo e prazo vencido
+NIVEL_NO_PRAZO = 0
+NIVEL_ATENCAO = 1
+NIVEL_ALERTA = 2
+NIVEIS_ALERTA = [
+    (NIVEL_NO_PRAZO, 'No prazo'),
+    (NIVEL_ATENCAO, 'Atenção'),
+    (NIVEL_ALERTA, 'Alerta'),
+]
+
+# Sincronização incremental: por quanto tempo as remoções ficam registradas e a
+# folga do cursor para gravações de transações ainda não confirmadas
+RETENCAO_REMOCOES = timedelta(days=7)
+MARGEM_SINCRONIZACAO = timedelta(seconds=2)
+
+# Tempo de vida das respostas do quadro em cache; a versão do Kanban na chave já impede dados desatualizados
+TEMPO_CACHE_KANBAN = 60 * 60
+
+# Operações em lote sobre os cards e a coluna para onde os cards arquivados são movidos
+OPERACOES_EM_LOTE = ('mover', 'arquivar', 'imovel')
+COLUNA_ARQUIVO = 'Inativos'
+
+# Colunas finais do funil, cujos cards sem alteração há mais de `IDADE_ARQUIVAMENTO` são arquivados
+COLUNAS_TERMINAIS = ('Inativos', 'Reprovado', 'Contratos Firmados')
+IDADE_ARQUIVAMENTO = timedelta(days=getattr(settings, 'KANBAN_DIAS_ARQUIVAMENTO', 180))
+
+# Duração considerada para cada visita agendada na detecção de conflitos da agenda
+DURACAO_VISITA = timedelta(minutes=getattr(settings, 'KANBAN_DURACAO_VISITA', 60))
+
+
+class KanbanDesatualizado(ValidationError):
+    """A versão do Kanban informada pelo cliente não é a versão atual."""
 
 
 
@@ -14,46 +62,201 @@ class KanbanColumn(models.Model):
     prazo_alerta = models.PositiveIntegerField(default=3)  # Prazo em horas
     cor_inicial = models.CharField(max_length=7, default="#00FF00")
     cor_alerta = models.CharField(max_length=7, default="#FF0000")
+    ultima_atualizacao = models.DateTimeField(auto_now=True)
+    lote = models.CharField(
+        max_length=32, null=True, blank=True, editable=False, db_index=True,
+        help_text="Identificador temporário da criação em lote, usado para reler os IDs em bancos que não os "
+                  "retornam e apagado ao fim da criação",
+    )
+
+    # Campos que determinam a cor dos cards
+    CAMPOS_PRAZO = ('prazo_alerta', 'cor_inicial', 'cor_alerta')
 
     def validar_campos(self, card):
-        """Valida se os campos obrigatórios da coluna estão preenchidos no cartão."""
-        erros = []
-        for campo, descricao in self.meta_dados.get("campos_obrigatorios", {}).items():
-            if not getattr(card, campo, None):
-                erros.append(f"O campo '{campo}' ({descricao}) é obrigatório para esta coluna.")
-        if erros:
-            raise ValidationError(erros)
+        """Valida o cartão com as regras da coluna (campos obrigatórios, tipos e valores)."""
+        obter_validador(self).validar(card)
 
-    def verificar_prazo(self, data_criacao):
+    def validar_cards(self, cards):
+        """
+        Valida um lote de cards com as regras da coluna em uma única passada.
+        Retorna um dicionário ID do card -> lista de erros, apenas com os cards inválidos.
+        """
+        return obter_validador(self).erros_em_lote(cards)
 
-        alerta_cor = self.cor_inicial
+    def verificar_nivel_alerta(self, data_criacao, agora=None):
+        """Calcula o nível de alerta baseado no prazo de alerta."""
         alerta_prazo = float(self.prazo_alerta)
+        horas_passadas = ((agora or timezone.now()) - data_criacao).total_seconds() / 3600
 
-        #print(f'prazo_alerta: {alerta_prazo}')
-        #print(f'data_criacao: {data_criacao}')
-        #print(f'timezone.now(): {timezone.now()}')
+        if horas_passadas > alerta_prazo:
+            return NIVEL_ALERTA
+        if horas_passadas >= (alerta_prazo / 2):
+            return NIVEL_ATENCAO
+        return NIVEL_NO_PRAZO
+
+    def cor_do_nivel(self, nivel):
+        return {NIVEL_ALERTA: self.cor_alerta, NIVEL_ATENCAO: COR_INTERMEDIARIA}.get(nivel, self.cor_inicial)
+
+    def verificar_prazo(self, data_criacao, agora=None):
         """Calcula a cor baseada no prazo de alerta."""
-        horas_passadas = (timezone.now() - data_criacao).total_seconds() / 3600
-        #print(f'horas passadas: {horas_passadas}')
-        
-        if horas_passadas > alerta_prazo:            
-            alerta_cor = self.cor_alerta
-        elif horas_passadas >= (alerta_prazo / 2):            
-           alerta_cor = '#FFFF00'  # Cor de alerta intermediária (amarela)
-        
-        return alerta_cor
+        return self.cor_do_nivel(self.verificar_nivel_alerta(data_criacao, agora))
+
+    def calcular_proxima_transicao(self, data_criacao, agora=None):
+        """
+        Retorna o momento em que a cor do card muda novamente (metade do prazo ou fim do prazo),
+        ou None se o card já está na cor de alerta.
+        """
+        agora = agora or timezone.now()
+        metade_prazo = data_criacao + timedelta(hours=self.prazo_alerta / 2)
+        fim_prazo = data_criacao + timedelta(hours=self.prazo_alerta)
+        if agora < metade_prazo:
+            return metade_prazo
+        if agora <= fim_prazo:
+            return fim_prazo
+        return None
+
+    def expressao_proxima_transicao(self, agora):
+        """
+        Equivalente em SQL de `calcular_proxima_transicao`.
+        """
+        metade_prazo = timedelta(hours=self.prazo_alerta / 2)
+        prazo = timedelta(hours=self.prazo_alerta)
+        return Case(
+            When(data_criacao__gt=agora - metade_prazo, then=F('data_criacao') + metade_prazo),
+            When(data_criacao__gte=agora - prazo, then=F('data_criacao') + prazo),
+            default=None,
+            output_field=models.DateTimeField(),
+        )
+
+    def expressao_cor(self, agora):
+        """
+        Equivalente em SQL de `verificar_prazo`: expressão CASE que calcula a cor
+        de cada card da coluna a partir de `data_criacao`.
+        """
+        return Case(
+            When(data_criacao__lt=agora - timedelta(hours=self.prazo_alerta), then=Value(self.cor_alerta)),
+            When(data_criacao__lte=agora - timedelta(hours=self.prazo_alerta / 2), then=Value(COR_INTERMEDIARIA)),
+            default=Value(self.cor_inicial),
+            output_field=CharField(),
+        )
+
+    def expressao_nivel_alerta(self, agora):
+        """Equivalente em SQL de `verificar_nivel_alerta`."""
+        return Case(
+            When(data_criacao__lt=agora - timedelta(hours=self.prazo_alerta), then=Value(NIVEL_ALERTA)),
+            When(data_criacao__lte=agora - timedelta(hours=self.prazo_alerta / 2), then=Value(NIVEL_ATENCAO)),
+            default=Value(NIVEL_NO_PRAZO),
+            output_field=models.PositiveSmallIntegerField(),
+        )
+
+    def valores_alerta(self, agora):
+        """Expressões SQL dos campos de alerta dos cards da coluna, usadas nas atualizações em lote."""
+        return {
+            'cor_atual': self.expressao_cor(agora),
+            'nivel_alerta': self.expressao_nivel_alerta(agora),
+            'proxima_transicao': self.expressao_proxima_transicao(agora),
+        }
+
+    def recalcular_cores(self, agora=None, invalidar_cache=True):
+        """
+        Recalcula a cor de todos os cards da coluna com um único UPDATE,
+        alterando apenas os cards cuja cor realmente muda. Retorna a quantidade de cards alterados.
+        """
+        agora = agora or timezone.now()
+        alterados = (
+            KanbanCard.objects.filter(coluna=self)
+            .exclude(cor_atual=self.expressao_cor(agora), nivel_alerta=self.expressao_nivel_alerta(agora))
+            .update(ultima_atualizacao=agora, **self.valores_alerta(agora))
+        )
+        if alterados and invalidar_cache:
+            Kanban.invalidar_cache_das_colunas([self.pk])
+        return alterados
+
+    def reagendar_cards(self, agora=None):
+        """
+        Recalcula a cor e a próxima transição de todos os cards da coluna,
+        usado quando o prazo ou as cores da coluna mudam.
+        """
+        agora = agora or timezone.now()
+        alterados = KanbanCard.objects.filter(coluna=self).update(ultima_atualizacao=agora, **self.valores_alerta(agora))
+        Kanban.invalidar_cache_das_colunas([self.pk])
+        return alterados
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o prazo e as cores carregados para reagendar os cards apenas quando mudarem
+        instance._prazo_original = instance._valores_prazo()
+        return instance
+
+    def _valores_prazo(self):
+        return tuple(self.__dict__.get(campo) for campo in self.CAMPOS_PRAZO)
+
+    def save(self, *args, **kwargs):
+        atualizacao = self.pk is not None and not self._state.adding
+        prazo_alterado = getattr(self, '_prazo_original', None) != self._valores_prazo()
+        super().save(*args, **kwargs)
+        if atualizacao and prazo_alterado:
+            self.reagendar_cards()
+        self._prazo_original = self._valores_prazo()
+
+    def rebalancear_ranks(self):
+        """
+        Redistribui os ranks dos cards da coluna em valores curtos e igualmente espaçados,
+        mantendo a ordem atual. Retorna a quantidade de cards atualizados.
+        """
+        agora = timezone.now()
+        with transaction.atomic():
+            cards = list(
+                KanbanCard.objects.select_for_update().filter(coluna=self).order_by('rank', 'id').only('id', 'rank')
+            )
+            for card, rank in zip(cards, ranks_distribuidos(len(cards))):
+                card.rank = rank
+                card.ultima_atualizacao = agora
+            KanbanCard.objects.bulk_update(cards, ['rank', 'ultima_atualizacao'], batch_size=500)
+            Kanban.invalidar_cache_das_colunas([self.pk])
+        return len(cards)
+
+    @staticmethod
+    def rebalancear_ranks_longos(tamanho_maximo=TAMANHO_MAXIMO_RANK):
+        """
+        Rebalanceia as colunas que possuem algum rank maior que `tamanho_maximo`.
+        Retorna a quantidade de colunas rebalanceadas.
+        """
+        colunas_ids = (
+            KanbanCard.objects.values('coluna_id')
+            .annotate(maior_rank=Max(Length('rank')))
+            .filter(maior_rank__gt=tamanho_maximo)
+            .values_list('coluna_id', flat=True)
+        )
+        colunas = list(KanbanColumn.objects.filter(id__in=list(colunas_ids)))
+        for coluna in colunas:
+            coluna.rebalancear_ranks()
+        return len(colunas)
+
+    @staticmethod
+    def recalcular_cores_de_todas(agora=None):
+        """
+        Recalcula as cores dos cards de todas as colunas, com um UPDATE por coluna.
+        """
+        agora = agora or timezone.now()
+        alterados = {coluna.pk: coluna.recalcular_cores(agora, invalidar_cache=False) for coluna in KanbanColumn.objects.all()}
+        colunas_alteradas = [coluna_id for coluna_id, total in alterados.items() if total]
+        if colunas_alteradas:
+            Kanban.invalidar_cache_das_colunas(colunas_alteradas)
+        return sum(alterados.values())
 
     def __str__(self):
         return f"Coluna: {self.nome}"
     
 
-class KanbanCard(models.Model):
+class KanbanCardDados(models.Model):
+    """
+    Dados do lead comuns aos cards ativos (`KanbanCard`) e arquivados (`KanbanCardArquivado`).
+    """
     lead_nome = models.CharField(max_length=100)
     descricao = models.TextField(blank=True)
-    data_criacao = models.DateTimeField(auto_now_add=True)  # Define automaticamente a data de criação
-    ultima_atualizacao = models.DateTimeField(auto_now=True)
     data_prazo = models.DateTimeField(null=True, blank=True)
-    cor_atual = models.CharField(max_length=7, default='#00FF00')  # Cor inicial (verde)
     dados_adicionais = models.JSONField(default=dict, blank=True, help_text="Campo para dados dinâmicos adicionais")
     contato = models.JSONField(
         default=dict,
@@ -75,6 +278,30 @@ class KanbanCard(models.Model):
     data_assinatura = models.DateTimeField(null=True, blank=True, help_text="Data da assinatura do contrato")
     contrato_assinado = models.TextField(blank=True, help_text="Contrato assinado anexado")
 
+    class Meta:
+        abstract = True
+
+    @staticmethod
+    def campos_dados():
+        """Nomes dos campos definidos nesta classe base."""
+        return [campo.name for campo in KanbanCardDados._meta.get_fields()]
+
+
+class KanbanCard(KanbanCardDados):
+    data_criacao = models.DateTimeField(auto_now_add=True)  # Define automaticamente a data de criação
+    ultima_atualizacao = models.DateTimeField(auto_now=True, db_index=True)
+    cor_atual = models.CharField(max_length=7, default='#00FF00')  # Cor inicial (verde)
+    nivel_alerta = models.PositiveSmallIntegerField(choices=NIVEIS_ALERTA, default=NIVEL_NO_PRAZO, editable=False)
+    proxima_transicao = models.DateTimeField(null=True, blank=True, db_index=True, editable=False,
+                                             help_text="Momento da próxima mudança de cor do card")
+    rank = models.CharField(max_length=255, blank=True, default='', editable=False,
+                            help_text="Posição do card na coluna, em ordem lexicográfica")
+
+    # Campos de busca normalizados a partir de `lead_nome` e `contato` ao salvar
+    busca_nome = models.CharField(max_length=100, blank=True, default='', db_index=True, editable=False)
+    busca_telefone = models.CharField(max_length=20, blank=True, default='', db_index=True, editable=False)
+    busca_whatsapp = models.CharField(max_length=20, blank=True, default='', db_index=True, editable=False)
+    busca_email = models.CharField(max_length=254, blank=True, default='', db_index=True, editable=False)
 
     # Campos necessários para associar a uma coluna do Kanban
     coluna = models.ForeignKey(
@@ -93,6 +320,14 @@ class KanbanCard(models.Model):
         blank=True
     )
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['coluna', 'rank'], name='kanban_card_coluna_rank_idx'),
+            models.Index(fields=['nivel_alerta', 'data_criacao'], name='kanban_card_alerta_idx'),
+            models.Index(fields=['data_visita'], name='kanban_card_visita_idx'),
+            models.Index(fields=['imovel', 'data_visita'], name='kanban_card_imovel_visita_idx'),
+        ]
+
     def validar_e_associar_coluna(self, coluna):
         """
         Valida e associa o cartão a uma coluna do Kanban.
@@ -107,6 +342,51 @@ class KanbanCard(models.Model):
         self.coluna = coluna
         self.save()
 
+    def mover(self, coluna, anterior_id=None, seguinte_id=None):
+        """
+        Move o cartão para a coluna, entre os cards `anterior_id` e `seguinte_id`.
+        Com apenas um deles o card fica imediatamente depois do anterior ou imediatamente antes do
+        seguinte; sem nenhum dos dois, vai para o fim da coluna.
+        Apenas este cartão é gravado; deve ser chamado dentro de uma transação.
+        """
+        cards_coluna = KanbanCard.objects.filter(coluna=coluna).exclude(pk=self.pk)
+        referencias = dict(
+            cards_coluna.filter(id__in=[i for i in (anterior_id, seguinte_id) if i is not None]).values_list('id', 'rank')
+        )
+        if any(i is not None and i not in referencias for i in (anterior_id, seguinte_id)):
+            raise ValidationError("Os cards de referência devem pertencer à coluna de destino.")
+
+        if anterior_id is None and seguinte_id is None:
+            rank_anterior = cards_coluna.aggregate(Max('rank'))['rank__max'] or ''
+            rank_seguinte = ''
+        elif seguinte_id is None:
+            # Card imediatamente após o anterior
+            rank_anterior = referencias[anterior_id]
+            seguinte = cards_coluna.filter(
+                Q(rank__gt=rank_anterior) | Q(rank=rank_anterior, id__gt=anterior_id)
+            ).order_by('rank', 'id').values_list('rank', flat=True).first()
+            rank_seguinte = seguinte or ''
+        elif anterior_id is None:
+            # Card imediatamente antes do seguinte
+            rank_seguinte = referencias[seguinte_id]
+            anterior = cards_coluna.filter(
+                Q(rank__lt=rank_seguinte) | Q(rank=rank_seguinte, id__lt=seguinte_id)
+            ).order_by('-rank', '-id').values_list('rank', flat=True).first()
+            rank_anterior = anterior or ''
+        else:
+            rank_anterior = referencias[anterior_id]
+            rank_seguinte = referencias[seguinte_id]
+
+        if rank_seguinte and rank_anterior >= rank_seguinte:
+            if rank_anterior > rank_seguinte:
+                raise ValidationError("O card anterior deve estar antes do card seguinte na coluna.")
+            # Ranks empatados (cards inseridos ao mesmo tempo): redistribui a coluna e tenta novamente
+            coluna.rebalancear_ranks()
+            return self.mover(coluna, anterior_id, seguinte_id)
+
+        self.rank = rank_entre(rank_anterior, rank_seguinte)
+        self.validar_e_associar_coluna(coluna)
+
     def atualizar_cor(self):
         """
         Atualiza a cor do cartão com base no prazo definido pela coluna.
@@ -115,6 +395,261 @@ class KanbanCard(models.Model):
             self.cor_atual = self.coluna.verificar_prazo(self.data_criacao)
             self.save()
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda a coluna carregada para registrar a movimentação quando o card mudar de coluna
+        instance._coluna_id_original = instance.__dict__.get('coluna_id')
+        # e os dados adicionais, para sincronizar os atributos promovidos apenas quando mudarem
+        instance._dados_adicionais_original = copy.deepcopy(instance.__dict__.get('dados_adicionais'))
+        return instance
+
+    def atualizar_campos_busca(self):
+        contato = self.contato if isinstance(self.contato, dict) else {}
+        self.busca_nome = normalizar_texto(self.lead_nome)[:100]
+        self.busca_telefone = normalizar_telefone(contato.get('telefone'))[:20]
+        self.busca_whatsapp = normalizar_telefone(contato.get('whatsapp'))[:20]
+        self.busca_email = normalizar_email(contato.get('email'))[:254]
+
+    def save(self, *args, **kwargs):
+        mudou_de_coluna = self._state.adding or getattr(self, '_coluna_id_original', None) != self.coluna_id
+        self.atualizar_campos_busca()
+
+        # Mantém a cor e a próxima transição coerentes com a coluna a cada gravação
+        if self.coluna_id:
+            agora = timezone.now()
+            data_criacao = self.data_criacao or agora
+            self.nivel_alerta = self.coluna.verificar_nivel_alerta(data_criacao, agora)
+            self.cor_atual = self.coluna.cor_do_nivel(self.nivel_alerta)
+            self.proxima_transicao = self.coluna.calcular_proxima_transicao(data_criacao, agora)
+            if not self.rank:
+                # Novos cards entram no fim da coluna
+                ultimo_rank = KanbanCard.objects.filter(coluna_id=self.coluna_id).aggregate(Max('rank'))['rank__max']
+                self.rank = rank_entre(ultimo_rank or '', '')
+        super().save(*args, **kwargs)
+
+        if mudou_de_coluna and self.coluna_id:
+            KanbanMovimentacao.registrar(self)
+        self._coluna_id_original = self.coluna_id
+
+        if self.coluna_id and (mudou_de_coluna or getattr(self, '_dados_adicionais_original', None) != self.dados_adicionais):
+            KanbanCardAtributo.sincronizar_card(self)
+        self._dados_adicionais_original = copy.deepcopy(self.dados_adicionais)
+
+    @staticmethod
+    def _mover_para_o_fim(cards, coluna, kanban_id):
+        """
+        Grava os cards, já validados e bloqueados, no fim da coluna com um único bulk_update
+        e registra as movimentações com um único bulk_create.
+        """
+        agora = timezone.now()
+        ids = [card.pk for card in cards]
+        rank = KanbanCard.objects.filter(coluna=coluna).exclude(id__in=ids).aggregate(Max('rank'))['rank__max'] or ''
+        movimentacoes = []
+        for card in cards:
+            if card.coluna_id != coluna.pk:
+                movimentacoes.append(
+                    KanbanMovimentacao(card_id=card.pk, kanban_id=kanban_id, coluna_id=coluna.pk, etapa=coluna.nome, data=agora)
+                )
+            rank = rank_entre(rank, '')
+            card.coluna = coluna
+            card.rank = rank
+            card.nivel_alerta = coluna.verificar_nivel_alerta(card.data_criacao, agora)
+            card.cor_atual = coluna.cor_do_nivel(card.nivel_alerta)
+            card.proxima_transicao = coluna.calcular_proxima_transicao(card.data_criacao, agora)
+            card.ultima_atualizacao = agora
+            card._coluna_id_original = coluna.pk
+        KanbanCard.objects.bulk_update(
+            cards, ['coluna', 'rank', 'cor_atual', 'nivel_alerta', 'proxima_transicao', 'ultima_atualizacao'], batch_size=500
+        )
+        KanbanMovimentacao.objects.bulk_create(movimentacoes)
+        Kanban.invalidar_cache(kanban_id)
+
+    @staticmethod
+    def mover_em_lote(card_ids, coluna):
+        """
+        Move vários cards para o fim da coluna, na ordem de `card_ids`.
+
+        Todos os cards são validados com as regras da coluna antes de qualquer gravação; se algum
+        for inválido, lança ValidationError com os erros de cada card e nada é alterado. Os cards
+        são gravados com um único bulk_update e as movimentações com um único bulk_create.
+        """
+        card_ids = list(dict.fromkeys(card_ids))
+        with transaction.atomic():
+            cards = {card.pk: card for card in KanbanCard.objects.select_for_update().filter(id__in=card_ids)}
+            inexistentes = [card_id for card_id in card_ids if card_id not in cards]
+            if inexistentes:
+                raise ValidationError(f"Cards inexistentes: {', '.join(map(str, inexistentes))}.")
+            cards = [cards[card_id] for card_id in card_ids]
+
+            kanbans = set(
+                KanbanColumnOrder.objects.filter(coluna_id__in={coluna.pk} | {card.coluna_id for card in cards})
+                .values_list('kanban_id', flat=True)
+            )
+            if len(kanbans) != 1:
+                raise ValidationError("Os cards e a coluna de destino devem pertencer ao mesmo Kanban.")
+
+            erros = coluna.validar_cards(cards)
+            if erros:
+                raise ValidationError({str(card_id): mensagens for card_id, mensagens in erros.items()})
+
+            KanbanCard._mover_para_o_fim(cards, coluna, kanbans.pop())
+        return cards
+
+    @staticmethod
+    def operar_em_lote(kanban, card_ids, operacao, coluna=None, imovel=None):
+        """
+        Aplica uma operação a vários cards do Kanban em uma única transação:
+
+        - `mover`: move os cards para o fim de `coluna`;
+        - `arquivar`: move os cards para o fim da coluna "Inativos" do Kanban;
+        - `imovel`: associa os cards a `imovel` (ou remove a associação, se for None).
+
+        As regras da coluna de destino são verificadas para todos os cards em uma única passada e,
+        ao associar um imóvel, as visitas agendadas dos cards são conferidas contra as do corretor e
+        as do imóvel, como no serializer. Apenas os cards válidos são alterados. Retorna, na ordem de `card_ids`, uma lista de
+        dicionários com `id`, `sucesso` e `erros` de cada card.
+        """
+        if operacao not in OPERACOES_EM_LOTE:
+            raise ValidationError(f"Operação inválida. Use uma de: {', '.join(OPERACOES_EM_LOTE)}.")
+        card_ids = list(dict.fromkeys(card_ids))
+
+        with transaction.atomic():
+            if operacao == 'arquivar':
+                coluna = KanbanColumn.objects.filter(ordem__kanban=kanban, nome=COLUNA_ARQUIVO).first()
+                if coluna is None:
+                    raise ValidationError(f"O Kanban não possui a coluna '{COLUNA_ARQUIVO}'.")
+            elif operacao == 'mover' and not KanbanColumnOrder.objects.filter(kanban=kanban, coluna=coluna).exists():
+                raise ValidationError("A coluna de destino não pertence ao Kanban.")
+
+            cards = {
+                card.pk: card
+                for card in KanbanCard.objects.select_for_update().filter(
+                    id__in=card_ids, coluna_id__in=KanbanColumnOrder.objects.filter(kanban=kanban).values('coluna_id')
+                )
+            }
+            erros = {card_id: ["Card não encontrado neste Kanban."] for card_id in card_ids if card_id not in cards}
+
+            if operacao == 'imovel':
+                if imovel is not None:
+                    # Remover a associação não cria conflitos; associar exige conferir as visitas agendadas
+                    for card in cards.values():
+                        if card.data_visita is not None:
+                            conflitos = KanbanCard.conflitos_visita(
+                                card.data_visita, usuario_id=kanban.usuario_id, imovel_id=imovel.pk, excluir_id=card.pk
+                            )
+                            mensagens = KanbanCard.mensagens_conflito(conflitos)
+                            if mensagens:
+                                erros[card.pk] = mensagens
+                validos = [card_id for card_id in cards if card_id not in erros]
+                KanbanCard.objects.filter(id__in=validos).update(imovel=imovel, ultima_atualizacao=timezone.now())
+                Kanban.invalidar_cache(kanban.pk)
+            else:
+                erros.update(coluna.validar_cards(cards.values()))
+                validos = [cards[card_id] for card_id in card_ids if card_id not in erros]
+                KanbanCard._mover_para_o_fim(validos, coluna, kanban.pk)
+
+        return [{'id': card_id, 'sucesso': card_id not in erros, 'erros': erros.get(card_id, [])} for card_id in card_ids]
+
+    @staticmethod
+    def buscar(termo, kanban_id=None):
+        """
+        Busca cards por e-mail ou telefone exatos, ou pelo início do nome do lead,
+        sempre pelos campos de busca indexados. Com `kanban_id`, limita a busca às colunas do Kanban.
+        """
+        if '@' in termo:
+            filtro = Q(busca_email=normalizar_email(termo))
+        elif parece_telefone(termo):
+            telefone = normalizar_telefone(termo)
+            filtro = Q(busca_telefone=telefone) | Q(busca_whatsapp=telefone)
+        else:
+            filtro = Q(busca_nome__startswith=normalizar_texto(termo))
+
+        cards = KanbanCard.objects.filter(filtro)
+        if kanban_id is not None:
+            cards = cards.filter(coluna_id__in=KanbanColumnOrder.objects.filter(kanban_id=kanban_id).values('coluna_id'))
+        return cards.order_by('busca_nome', 'id')
+
+    @staticmethod
+    def agenda(inicio, fim, usuario_id=None, imovel_id=None):
+        """
+        Visitas agendadas entre `inicio` (inclusive) e `fim` (exclusive), em ordem de horário.
+        Com `usuario_id`, limita às visitas dos cards do Kanban do usuário; com `imovel_id`, às do imóvel.
+        """
+        visitas = KanbanCard.objects.filter(data_visita__gte=inicio, data_visita__lt=fim)
+        if usuario_id is not None:
+            visitas = visitas.filter(
+                coluna_id__in=KanbanColumnOrder.objects.filter(kanban__usuario_id=usuario_id).values('coluna_id')
+            )
+        if imovel_id is not None:
+            visitas = visitas.filter(imovel_id=imovel_id)
+        return visitas.select_related('imovel', 'coluna').order_by('data_visita', 'id')
+
+    @staticmethod
+    def conflitos_visita(data_visita, usuario_id=None, imovel_id=None, excluir_id=None):
+        """
+        Visitas que se sobrepõem a uma visita em `data_visita`, no Kanban do usuário ou no mesmo imóvel.
+
+        Como todas as visitas têm a mesma duração, duas visitas se sobrepõem quando os inícios
+        distam menos de `DURACAO_VISITA`; a consulta é uma faixa no índice de `data_visita`.
+        """
+        if usuario_id is None and imovel_id is None:
+            return KanbanCard.objects.none()
+        filtro = Q()
+        if usuario_id is not None:
+            filtro |= Q(coluna_id__in=KanbanColumnOrder.objects.filter(kanban__usuario_id=usuario_id).values('coluna_id'))
+        if imovel_id is not None:
+            filtro |= Q(imovel_id=imovel_id)
+        conflitos = KanbanCard.objects.filter(
+            filtro,
+            data_visita__gt=data_visita - DURACAO_VISITA,
+            data_visita__lt=data_visita + DURACAO_VISITA,
+        )
+        if excluir_id is not None:
+            conflitos = conflitos.exclude(pk=excluir_id)
+        return conflitos.order_by('data_visita', 'id')
+
+    def verificar_conflitos_visita(self):
+        """
+        Retorna as mensagens de conflito da visita do card com as visitas do corretor (dono do
+        Kanban da coluna) e do imóvel. Retorna uma lista vazia se o card não tiver visita agendada.
+        """
+        if self.data_visita is None:
+            return []
+        usuario_id = KanbanColumnOrder.objects.filter(coluna_id=self.coluna_id).values_list('kanban__usuario_id', flat=True).first()
+        conflitos = KanbanCard.conflitos_visita(
+            self.data_visita, usuario_id=usuario_id, imovel_id=self.imovel_id, excluir_id=self.pk
+        )
+        return KanbanCard.mensagens_conflito(conflitos)
+
+    @staticmethod
+    def mensagens_conflito(conflitos):
+        return [
+            f"A visita conflita com a visita de '{conflito.lead_nome}' às {conflito.data_visita:%d/%m/%Y %H:%M}."
+            for conflito in conflitos
+        ]
+
+    @staticmethod
+    def processar_transicoes(agora=None, card_ids=None):
+        """
+        Atualiza os cards cuja próxima transição de cor já chegou.
+
+        A seleção usa o índice de `proxima_transicao` (sem varrer a tabela) e
+        a atualização é feita com um UPDATE por coluna envolvida.
+        """
+        agora = agora or timezone.now()
+        vencidos = KanbanCard.objects.filter(proxima_transicao__lte=agora)
+        if card_ids is not None:
+            vencidos = vencidos.filter(id__in=card_ids)
+
+        total = 0
+        colunas = list(KanbanColumn.objects.filter(id__in=vencidos.values('coluna_id')))
+        for coluna in colunas:
+            total += vencidos.filter(coluna=coluna).update(ultima_atualizacao=agora, **coluna.valores_alerta(agora))
+        if colunas:
+            Kanban.invalidar_cache_das_colunas([coluna.pk for coluna in colunas])
+        return total
+
     def __str__(self):
         return f"Lead: {self.lead_nome} na Coluna: {self.coluna.nome}"
 
@@ -126,6 +661,310 @@ class Kanban(models.Model):
     data_criacao = models.DateTimeField(auto_now_add=True)
     ultima_atualizacao = models.DateTimeField(auto_now=True)
     usuario = models.OneToOneField(Usuario, on_delete=models.CASCADE, related_name="kanban")
+    campos_promovidos = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Chaves de `dados_adicionais` dos cards com filtro e ordenação indexados, "
+                  "no formato [{\"chave\": \"orcamento\", \"tipo\": \"numero\"}]",
+    )
+
+    # Quantidade padrão de cards por coluna na abertura do quadro
+    LIMITE_CARDS_POR_COLUNA = 50
+    CAMPOS_CARD_SNAPSHOT = ['id', 'rank', 'lead_nome', 'descricao', 'data_prazo', 'cor_atual']
+
+    def montar_snapshot(self, limite_por_coluna=LIMITE_CARDS_POR_COLUNA):
+        """
+        Monta as colunas do Kanban com a primeira página de cards de cada uma.
+
+        Usa duas consultas (colunas e cards) e agrupa os cards em uma única passada.
+        A numeração por coluna limita os cards de cada coluna na própria consulta;
+        `proximo_cursor` é preenchido quando a coluna tem mais cards a carregar.
+        """
+        colunas = list(KanbanColumnOrder.objects.filter(kanban=self).select_related('coluna'))
+
+        cards = (
+            KanbanCard.objects
+            .filter(coluna_id__in=[coluna_order.coluna_id for coluna_order in colunas])
+            .annotate(ordem=Window(RowNumber(), partition_by=[F('coluna_id')], order_by=[F('rank').asc(), F('id').asc()]))
+            .filter(ordem__lte=limite_por_coluna + 1)
+            .order_by('coluna_id', 'rank', 'id')
+            .values('coluna_id', *self.CAMPOS_CARD_SNAPSHOT)
+        )
+
+        cards_por_coluna = {coluna_order.coluna_id: [] for coluna_order in colunas}
+        for card in cards:
+            cards_por_coluna[card.pop('coluna_id')].append(card)
+
+        colunas_data = []
+        for coluna_order in colunas:
+            cards_coluna = cards_por_coluna[coluna_order.coluna_id]
+            colunas_data.append({
+                "id": coluna_order.coluna.id,
+                "nome": coluna_order.coluna.nome,
+                "posicao": coluna_order.posicao,
+                "prazo_alerta": coluna_order.coluna.prazo_alerta,
+                "cards": cards_coluna[:limite_por_coluna],
+                "proximo_cursor": Kanban.cursor_do_card(cards_coluna[limite_por_coluna - 1]) if len(cards_coluna) > limite_por_coluna else None,
+            })
+        return colunas_data
+
+    @staticmethod
+    def cursor_do_card(card):
+        """O cursor identifica a posição do card na ordem (rank, id) da coluna."""
+        return f"{card['rank']}:{card['id']}"
+
+    @staticmethod
+    def carregar_mais_cards(coluna_id, cursor=None, limite=LIMITE_CARDS_POR_COLUNA):
+        """
+        Retorna a próxima página de cards de uma coluna a partir do cursor e o cursor seguinte.
+        Lança ValueError se o cursor for inválido.
+        """
+        cards = KanbanCard.objects.filter(coluna_id=coluna_id).order_by('rank', 'id')
+        if cursor:
+            rank, _, card_id = cursor.rpartition(':')
+            card_id = int(card_id)
+            cards = cards.filter(Q(rank__gt=rank) | Q(rank=rank, id__gt=card_id))
+        cards = list(cards.values(*Kanban.CAMPOS_CARD_SNAPSHOT)[:limite + 1])
+        proximo_cursor = Kanban.cursor_do_card(cards[limite - 1]) if len(cards) > limite else None
+        return cards[:limite], proximo_cursor
+
+    def alteracoes_desde(self, desde):
+        """
+        Retorna o que mudou no Kanban depois de `desde`: colunas e cards criados ou alterados
+        e os IDs dos removidos, além do cursor para a próxima consulta.
+
+        Os cards vêm de uma consulta por intervalo no índice de `ultima_atualizacao` e as
+        remoções da tabela de `KanbanRemocao`. O cursor fica `MARGEM_SINCRONIZACAO` antes do
+        início da consulta, para não perder gravações de transações que ainda não confirmaram;
+        o cliente deve tratar itens repetidos como atualização. Se `desde` for anterior à
+        retenção das remoções, retorna `completo=True` e o cliente deve recarregar o quadro.
+        """
+        agora = timezone.now()
+        cursor = agora - MARGEM_SINCRONIZACAO
+        if desde < agora - RETENCAO_REMOCOES:
+            return {"completo": True, "cursor": cursor}
+
+        colunas_order = KanbanColumnOrder.objects.filter(kanban=self).select_related('coluna')
+        if self.ultima_atualizacao <= desde:
+            # A estrutura do Kanban não mudou: apenas as colunas editadas
+            colunas_order = colunas_order.filter(coluna__ultima_atualizacao__gt=desde)
+
+        cards = (
+            KanbanCard.objects
+            .filter(ultima_atualizacao__gt=desde, coluna_id__in=KanbanColumnOrder.objects.filter(kanban=self).values('coluna_id'))
+            .order_by('ultima_atualizacao', 'id')
+            .values('coluna_id', 'ultima_atualizacao', *self.CAMPOS_CARD_SNAPSHOT)
+        )
+
+        removidos = {tipo: [] for tipo, _ in KanbanRemocao.TIPOS}
+        for tipo, objeto_id in KanbanRemocao.objects.filter(kanban=self, data_remocao__gt=desde).values_list('tipo', 'objeto_id'):
+            removidos[tipo].append(objeto_id)
+
+        return {
+            "completo": False,
+            "cursor": cursor,
+            "versao": self.ultima_atualizacao,
+            "colunas": [
+                {
+                    "id": coluna_order.coluna.id,
+                    "nome": coluna_order.coluna.nome,
+                    "posicao": coluna_order.posicao,
+                    "prazo_alerta": coluna_order.coluna.prazo_alerta,
+                }
+                for coluna_order in colunas_order
+            ],
+            "cards": list(cards),
+            "removidos": removidos,
+        }
+
+    def tipos_promovidos(self):
+        """Retorna um dicionário chave -> tipo dos campos promovidos do Kanban."""
+        return {campo['chave']: campo.get('tipo', 'texto') for campo in self.campos_promovidos or []}
+
+    def filtrar_cards(self, filtros=(), ordenar=None):
+        """
+        Filtra e ordena os cards do Kanban pelos campos promovidos, usando os índices de `KanbanCardAtributo`.
+
+        `filtros` é uma lista de (chave, operador, valor), com operador 'exact', 'gte', 'lte' ou 'startswith'
+        (este apenas para texto); `ordenar` é uma chave promovida, com '-' para ordem decrescente.
+        Lança ValidationError para chaves não promovidas ou valores inválidos.
+        """
+        tipos = self.tipos_promovidos()
+        cards = KanbanCard.objects.filter(coluna_id__in=KanbanColumnOrder.objects.filter(kanban=self).values('coluna_id'))
+
+        for chave, operador, valor in filtros:
+            if chave not in tipos:
+                raise ValidationError(f"O campo '{chave}' não é um campo promovido deste Kanban.")
+            campo, valor = KanbanCardAtributo.campo_e_valor(tipos[chave], valor)
+            if valor is None or (operador == 'startswith' and campo != 'valor_texto'):
+                raise ValidationError(f"Filtro inválido para o campo '{chave}'.")
+            atributos = KanbanCardAtributo.objects.filter(kanban=self, chave=chave, **{f'{campo}__{operador}': valor})
+            cards = cards.filter(id__in=atributos.values('card_id'))
+
+        if ordenar:
+            chave = ordenar.lstrip('-')
+            if chave not in tipos:
+                raise ValidationError(f"O campo '{chave}' não é um campo promovido deste Kanban.")
+            campo = 'valor_numero' if tipos[chave] == 'numero' else 'valor_texto'
+            valor_ordem = Subquery(
+                KanbanCardAtributo.objects.filter(card=OuterRef('pk'), chave=chave).values(campo)[:1]
+            )
+            ordem = F('valor_ordem').desc(nulls_last=True) if ordenar.startswith('-') else F('valor_ordem').asc(nulls_last=True)
+            return cards.annotate(valor_ordem=valor_ordem).order_by(ordem, 'id')
+        return cards.order_by('rank', 'id')
+
+    def sincronizar_atributos(self):
+        """
+        Reconstrói os atributos promovidos de todos os cards do Kanban, usado no preenchimento
+        inicial e quando a lista de campos promovidos muda. Retorna a quantidade de atributos gravados.
+        """
+        tipos = self.tipos_promovidos()
+        with transaction.atomic():
+            KanbanCardAtributo.objects.filter(kanban=self).delete()
+            if not tipos:
+                return 0
+            cards = KanbanCard.objects.filter(
+                coluna_id__in=KanbanColumnOrder.objects.filter(kanban=self).values('coluna_id')
+            ).values_list('id', 'dados_adicionais')
+            atributos = [
+                atributo
+                for card_id, dados in cards.iterator()
+                for atributo in KanbanCardAtributo.extrair(self.id, card_id, dados, tipos)
+            ]
+            KanbanCardAtributo.objects.bulk_create(atributos, batch_size=1000)
+        return len(atributos)
+
+    @staticmethod
+    def visao_geral(limite_urgentes=20):
+        """
+        Resumo dos Kanbans de todos os usuários para a gestão.
+
+        As contagens de cards e de cards em alerta por usuário e coluna vêm de uma única consulta
+        agrupada sobre `KanbanColumnOrder` e os cards das colunas; os totais por etapa e por usuário
+        são somados a partir dela. Os `limite_urgentes` cards em alerta há mais tempo usam o
+        índice de `nivel_alerta`.
+        """
+        linhas = (
+            KanbanColumnOrder.objects
+            .values('kanban_id', 'kanban__usuario_id', 'kanban__usuario__username', 'coluna_id', 'coluna__nome', 'posicao')
+            .annotate(
+                cards=Count('coluna__cards'),
+                alertas=Count('coluna__cards', filter=Q(coluna__cards__nivel_alerta=NIVEL_ALERTA)),
+            )
+            .order_by('kanban__usuario__username', 'kanban_id', 'posicao')
+        )
+
+        usuarios = {}
+        etapas = {}
+        for linha in linhas:
+            usuario = usuarios.setdefault(linha['kanban_id'], {
+                'usuario_id': linha['kanban__usuario_id'],
+                'usuario': linha['kanban__usuario__username'],
+                'kanban_id': linha['kanban_id'],
+                'cards': 0,
+                'alertas': 0,
+                'colunas': [],
+            })
+            usuario['cards'] += linha['cards']
+            usuario['alertas'] += linha['alertas']
+            usuario['colunas'].append({
+                'coluna_id': linha['coluna_id'],
+                'etapa': linha['coluna__nome'],
+                'cards': linha['cards'],
+                'alertas': linha['alertas'],
+            })
+            etapa = etapas.setdefault(linha['coluna__nome'], {'etapa': linha['coluna__nome'], 'cards': 0, 'alertas': 0})
+            etapa['cards'] += linha['cards']
+            etapa['alertas'] += linha['alertas']
+
+        urgentes = (
+            KanbanCard.objects.filter(nivel_alerta=NIVEL_ALERTA)
+            .order_by('data_criacao', 'id')
+            .values('id', 'lead_nome', 'data_criacao', 'cor_atual', 'coluna_id',
+                    etapa=F('coluna__nome'),
+                    kanban_id=F('coluna__ordem__kanban_id'),
+                    usuario=F('coluna__ordem__kanban__usuario__username'))
+            [:limite_urgentes]
+        )
+
+        return {
+            'etapas': list(etapas.values()),
+            'usuarios': list(usuarios.values()),
+            'urgentes': list(urgentes),
+        }
+
+    @staticmethod
+    def marcar_alteracao(kanban_id):
+        """Avança a versão do Kanban após mudanças na sua estrutura de colunas."""
+        Kanban.objects.filter(pk=kanban_id).update(ultima_atualizacao=timezone.now())
+        Kanban.invalidar_cache(kanban_id)
+
+    @staticmethod
+    def chave_versao_cache(kanban_id):
+        return f'kanban:{kanban_id}:versao'
+
+    @staticmethod
+    def versao_cache(kanban_id):
+        """
+        Retorna o contador de versão do Kanban usado nas chaves do cache.
+        Um contador ausente (nunca criado ou expulso do cache) é iniciado a partir do relógio,
+        de modo que nunca volta a um valor já usado por respostas ainda em cache.
+        """
+        chave = Kanban.chave_versao_cache(kanban_id)
+        versao = cache.get(chave)
+        if versao is None:
+            inicial = time.time_ns()
+            cache.add(chave, inicial, timeout=None)
+            versao = cache.get(chave, inicial)
+        return versao
+
+    @staticmethod
+    def invalidar_cache(*kanban_ids):
+        """
+        Avança o contador de versão dos Kanbans, invalidando as respostas em cache.
+        O contador avança na hora e de novo após o commit, para que uma leitura concorrente
+        feita antes do commit não fique guardada sob a nova versão. Sem cache compartilhado
+        nada é guardado e não há o que invalidar.
+        """
+        if not cache_compartilhado():
+            return
+
+        def avancar():
+            for kanban_id in kanban_ids:
+                try:
+                    cache.incr(Kanban.chave_versao_cache(kanban_id))
+                except ValueError:
+                    # Sem contador, a próxima leitura inicia um novo a partir do relógio
+                    pass
+
+        avancar()
+        transaction.on_commit(avancar)
+
+    @staticmethod
+    def invalidar_cache_das_colunas(colunas_ids):
+        """Invalida o cache dos Kanbans aos quais as colunas pertencem."""
+        kanban_ids = set(
+            KanbanColumnOrder.objects.filter(coluna_id__in=colunas_ids).values_list('kanban_id', flat=True)
+        )
+        if kanban_ids:
+            Kanban.invalidar_cache(*kanban_ids)
+
+    @staticmethod
+    def obter_em_cache(kanban_id, nome, construir):
+        """
+        Retorna a resposta `nome` do Kanban guardada sob a versão atual, ou a constrói com
+        `construir()` e a guarda. Qualquer gravação no Kanban avança a versão, então uma
+        resposta em cache nunca está desatualizada. Se o cache for local ao processo, a versão
+        não seria avançada pelas gravações dos outros processos, então a resposta é sempre construída.
+        """
+        if not cache_compartilhado():
+            return construir()
+        chave = f'kanban:{kanban_id}:{Kanban.versao_cache(kanban_id)}:{nome}'
+        dados = cache.get(chave)
+        if dados is None:
+            dados = construir()
+            cache.set(chave, dados, timeout=TEMPO_CACHE_KANBAN)
+        return dados
 
     def __str__(self):
         return f"Kanban: {self.nome} do Usuário: {self.usuario}"
@@ -170,8 +1009,46 @@ class KanbanColumnOrder(models.Model):
             coluna=coluna,
             defaults={'posicao': posicao}
         )
+        Kanban.marcar_alteracao(kanban.pk)
         return column_order
     
+    @staticmethod
+    def reordenar_colunas(kanban, colunas_ids, versao):
+        """
+        Aplica a ordem completa das colunas do Kanban (`colunas_ids`, da primeira à última).
+
+        `versao` é a `ultima_atualizacao` do Kanban conhecida pelo cliente: o UPDATE condicional
+        que avança a versão também bloqueia o Kanban, de modo que reordenações concorrentes são
+        serializadas e uma reordenação feita sobre uma versão antiga é rejeitada.
+        As posições são lidas com bloqueio e gravadas com um único bulk_update.
+        Retorna a nova versão do Kanban.
+        """
+        if len(set(colunas_ids)) != len(colunas_ids):
+            raise ValidationError("A lista de colunas não pode conter repetições.")
+
+        with transaction.atomic():
+            nova_versao = timezone.now()
+            if not Kanban.objects.filter(pk=kanban.pk, ultima_atualizacao=versao).update(ultima_atualizacao=nova_versao):
+                raise KanbanDesatualizado("O Kanban foi alterado por outra operação. Recarregue e tente novamente.")
+
+            ordens = {
+                coluna_order.coluna_id: coluna_order
+                for coluna_order in KanbanColumnOrder.objects.select_for_update().filter(kanban=kanban).order_by().only('id', 'coluna_id', 'posicao')
+            }
+            if set(ordens) != set(colunas_ids):
+                raise ValidationError("A lista deve conter exatamente as colunas do Kanban.")
+
+            alteradas = []
+            for posicao, coluna_id in enumerate(colunas_ids, start=1):
+                if ordens[coluna_id].posicao != posicao:
+                    ordens[coluna_id].posicao = posicao
+                    alteradas.append(ordens[coluna_id])
+            KanbanColumnOrder.objects.bulk_update(alteradas, ['posicao'])
+            Kanban.invalidar_cache(kanban.pk)
+
+        kanban.ultima_atualizacao = nova_versao
+        return nova_versao
+
     @staticmethod
     def remover_coluna(kanban, coluna):
         #import pdb
@@ -201,71 +1078,290 @@ class KanbanColumnOrder(models.Model):
         
         # Salvar em um único comando para melhorar desempenho
         KanbanColumnOrder.objects.bulk_update(colunas_restantes, ['posicao'])
+        Kanban.marcar_alteracao(kanban.pk)
 
         return True
 
 
-    
 
-def criar_kanban_padrao(usuario):
-    # Cria o Kanban associado ao usuário
-    kanban = Kanban.objects.create(
-        usuario=usuario,
-        nome=f"Kanban de {usuario.username}",
-        descricao="Kanban padrão do usuário"
-    )
 
-    # Define as colunas padrão com suas posições e campos obrigatórios
-    colunas_padrao = [
-        ("Contato Inicial", 1, {
-            "lead_nome": "Nome do lead",
-            "descricao": "Descrição inicial do lead",
-        }),
-        ("Visita ao Imóvel", 2, {
-            "data_visita": "Data e hora da visita agendada",
-            "observacoes_visita": "Observações sobre a visita",
-        }),
-        ("Negociação", 3, {
-            "valor_final": "Valor final da negociação",
-            "tipo_garantia": "Tipo de garantia",
-            "prazo_vigencia": "Prazo de vigência do contrato",
-            "metodo_pagamento": "Método de pagamento",
-        }),
-        ("Documentação e Análise de Crédito", 4, {
-            "documentos_anexados": "Documentos anexados para análise",
-            "status_documentacao": "Status da documentação",
-            "resultado_analise_credito": "Resultado da análise de crédito",
-        }),
-        ("Assinatura do Contrato", 5, {
-            "data_assinatura": "Data da assinatura do contrato",
-            "contrato_assinado": "Contrato assinado anexado",
-        }),
-        ("Contratos Firmados", 6, {
-            "contrato_assinado": "Contrato assinado anexado",
-            "data_assinatura": "Data da assinatura do contrato",
-        }),
-        ("Reprovado", 7, {
-            "status_documentacao": "Status da documentação",
-            "resultado_analise_credito": "Resultado da análise de crédito",
-        }),
-        ("Inativos", 8, {
-            "descricao": "Motivo da inatividade",
-        }),
+class KanbanRemocao(models.Model):
+    """
+    Registro de cards e colunas removidos, usado pela sincronização incremental do Kanban.
+    """
+    TIPOS = [
+        ('card', 'Card'),
+        ('coluna', 'Coluna'),
     ]
 
-    # Itera sobre a lista de colunas padrão, criando cada uma e associando-a ao Kanban
-    for nome, posicao, campos_obrigatorios in colunas_padrao:
-        # Cria a coluna específica
-        coluna = KanbanColumn.objects.create(nome=nome, meta_dados=campos_obrigatorios)        
-        coluna.save()
-        # Associa a coluna ao Kanban com a ordem definida
-        KanbanColumnOrder.objects.create(
-            kanban=kanban,
-            coluna=coluna,
-            posicao=posicao
+    kanban = models.ForeignKey(Kanban, on_delete=models.CASCADE, related_name="remocoes")
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    objeto_id = models.PositiveBigIntegerField()
+    data_remocao = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kanban', 'data_remocao'], name='kanban_remocao_data_idx'),
+        ]
+
+    @staticmethod
+    def limpar_antigas(agora=None):
+        """Remove os registros mais antigos que a retenção. Retorna a quantidade removida."""
+        agora = agora or timezone.now()
+        removidos, _ = KanbanRemocao.objects.filter(data_remocao__lt=agora - RETENCAO_REMOCOES).delete()
+        return removidos
+
+    def __str__(self):
+        return f"Remoção de {self.tipo} {self.objeto_id} do Kanban {self.kanban_id}"
+
+
+class KanbanMovimentacao(models.Model):
+    """
+    Histórico das entradas dos cards nas colunas, usado nas análises de funil.
+
+    O registro é somente de inclusão. As chaves estrangeiras não têm restrição no banco
+    para que o histórico permaneça após a remoção ou o arquivamento de cards e colunas;
+    por isso o nome da coluna (`etapa`) é gravado no momento da movimentação.
+    """
+    card = models.ForeignKey(KanbanCard, on_delete=models.DO_NOTHING, db_constraint=False, related_name="movimentacoes")
+    kanban = models.ForeignKey(Kanban, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                               related_name="movimentacoes")
+    coluna = models.ForeignKey(KanbanColumn, on_delete=models.DO_NOTHING, db_constraint=False,
+                               related_name="movimentacoes")
+    etapa = models.CharField(max_length=100, help_text="Nome da coluna no momento da entrada")
+    data = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['card', 'data'], name='kanban_mov_card_data_idx'),
+            models.Index(fields=['kanban', 'data'], name='kanban_mov_kanban_data_idx'),
+        ]
+
+    @staticmethod
+    def registrar(card):
+        """Registra a entrada do card na sua coluna atual."""
+        kanban_id = KanbanColumnOrder.objects.filter(coluna_id=card.coluna_id).values_list('kanban_id', flat=True).first()
+        return KanbanMovimentacao.objects.create(
+            card_id=card.pk, kanban_id=kanban_id, coluna_id=card.coluna_id, etapa=card.coluna.nome
         )
 
-    return kanban
+    def __str__(self):
+        return f"Card {self.card_id} entrou em {self.etapa} em {self.data}"
+
+
+class KanbanCardAtributo(models.Model):
+    """
+    Valor de um campo promovido de `KanbanCard.dados_adicionais`, extraído para uma coluna
+    indexada. Os atributos de cada card são mantidos em sincronia ao salvar o card.
+    """
+    card = models.ForeignKey(KanbanCard, on_delete=models.CASCADE, related_name="atributos")
+    kanban = models.ForeignKey(Kanban, on_delete=models.CASCADE, related_name="atributos")
+    chave = models.CharField(max_length=50)
+    valor_texto = models.CharField(max_length=255, blank=True, default='')
+    valor_numero = models.DecimalField(max_digits=14, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        unique_together = ('card', 'chave')
+        indexes = [
+            models.Index(fields=['kanban', 'chave', 'valor_texto'], name='kanban_atributo_texto_idx'),
+            models.Index(fields=['kanban', 'chave', 'valor_numero'], name='kanban_atributo_numero_idx'),
+        ]
+
+    # Valores numéricos aceitos por `valor_numero` (14 dígitos, 2 deles decimais)
+    LIMITE_VALOR_NUMERO = Decimal(10) ** 12
+
+    @staticmethod
+    def campo_e_valor(tipo, valor):
+        """Retorna a coluna usada pelo tipo e o valor normalizado (None se inválido ou fora do intervalo da coluna)."""
+        if tipo == 'numero':
+            try:
+                numero = Decimal(str(valor))
+                numero = numero.quantize(Decimal('0.01')) if numero.is_finite() else None
+            except (InvalidOperation, ValueError):
+                return 'valor_numero', None
+            if numero is None or abs(numero) >= KanbanCardAtributo.LIMITE_VALOR_NUMERO:
+                return 'valor_numero', None
+            return 'valor_numero', numero
+        return 'valor_texto', normalizar_texto(valor)[:255] if valor not in (None, '') else None
+
+    @staticmethod
+    def extrair(kanban_id, card_id, dados_adicionais, tipos):
+        """Cria (sem salvar) os atributos dos campos promovidos presentes nos dados do card."""
+        dados = dados_adicionais if isinstance(dados_adicionais, dict) else {}
+        atributos = []
+        for chave, tipo in tipos.items():
+            if chave not in dados:
+                continue
+            campo, valor = KanbanCardAtributo.campo_e_valor(tipo, dados[chave])
+            if valor is not None:
+                atributos.append(KanbanCardAtributo(card_id=card_id, kanban_id=kanban_id, chave=chave, **{campo: valor}))
+        return atributos
+
+    @staticmethod
+    def sincronizar_card(card):
+        """Regrava os atributos promovidos de um card a partir dos seus dados adicionais."""
+        kanban = Kanban.objects.filter(colunas__coluna_id=card.coluna_id).only('id', 'campos_promovidos').first()
+        if kanban is None or not kanban.campos_promovidos:
+            return
+        KanbanCardAtributo.objects.filter(card=card).delete()
+        KanbanCardAtributo.objects.bulk_create(
+            KanbanCardAtributo.extrair(kanban.id, card.pk, card.dados_adicionais, kanban.tipos_promovidos())
+        )
+
+    def __str__(self):
+        return f"{self.chave} do card {self.card_id}"
+
+
+class KanbanCardArquivado(KanbanCardDados):
+    """
+    Card retirado das colunas finais do funil. Tem os mesmos dados do `KanbanCard`, mas fica
+    fora da tabela de cards ativos, que é lida pelo quadro e pelo recálculo de cores.
+    O `id` é o mesmo do card original.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    kanban = models.ForeignKey(Kanban, on_delete=models.CASCADE, related_name="cards_arquivados")
+    coluna = models.ForeignKey(KanbanColumn, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                               related_name="cards_arquivados")
+    etapa = models.CharField(max_length=100, help_text="Nome da coluna no momento do arquivamento")
+    imovel = models.ForeignKey(Imovel, on_delete=models.SET_NULL, null=True, blank=True, related_name="cards_arquivados")
+    data_criacao = models.DateTimeField()
+    ultima_atualizacao = models.DateTimeField()
+    data_arquivamento = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kanban', 'data_arquivamento'], name='kanban_arquivado_data_idx'),
+        ]
+
+    @staticmethod
+    def arquivar(idade=IDADE_ARQUIVAMENTO, colunas=COLUNAS_TERMINAIS, agora=None, tamanho_lote=500):
+        """
+        Move para o arquivo os cards das `colunas` finais sem alteração há mais de `idade`.
+        Cada lote é copiado com um bulk_create e removido da tabela de cards na mesma transação.
+        Retorna a quantidade de cards arquivados.
+        """
+        agora = agora or timezone.now()
+        # Cards de colunas sem Kanban não têm onde ser consultados e permanecem na tabela
+        elegiveis = KanbanCard.objects.filter(
+            coluna__nome__in=colunas,
+            coluna_id__in=KanbanColumnOrder.objects.values('coluna_id'),
+            ultima_atualizacao__lt=agora - idade,
+        )
+        campos = KanbanCardDados.campos_dados()
+        total = 0
+        while True:
+            with transaction.atomic():
+                cards = list(elegiveis.select_for_update().select_related('coluna').order_by('id')[:tamanho_lote])
+                if not cards:
+                    break
+                kanbans = dict(
+                    KanbanColumnOrder.objects.filter(coluna_id__in={card.coluna_id for card in cards})
+                    .values_list('coluna_id', 'kanban_id')
+                )
+                KanbanCardArquivado.objects.bulk_create([
+                    KanbanCardArquivado(
+                        id=card.pk, kanban_id=kanbans[card.coluna_id], coluna_id=card.coluna_id,
+                        etapa=card.coluna.nome, imovel_id=card.imovel_id, data_criacao=card.data_criacao,
+                        ultima_atualizacao=card.ultima_atualizacao, data_arquivamento=agora,
+                        **{campo: getattr(card, campo) for campo in campos},
+                    )
+                    for card in cards
+                ])
+                KanbanCard.objects.filter(id__in=[card.pk for card in cards]).delete()
+            total += len(cards)
+        return total
+
+    def __str__(self):
+        return f"{self.lead_nome} (arquivado em {self.etapa})"
+
+
+# Colunas do Kanban padrão: nome, posição e campos obrigatórios
+COLUNAS_PADRAO = (
+    ("Contato Inicial", 1, {
+        "lead_nome": "Nome do lead",
+        "descricao": "Descrição inicial do lead",
+    }),
+    ("Visita ao Imóvel", 2, {
+        "data_visita": "Data e hora da visita agendada",
+        "observacoes_visita": "Observações sobre a visita",
+    }),
+    ("Negociação", 3, {
+        "valor_final": "Valor final da negociação",
+        "tipo_garantia": "Tipo de garantia",
+        "prazo_vigencia": "Prazo de vigência do contrato",
+        "metodo_pagamento": "Método de pagamento",
+    }),
+    ("Documentação e Análise de Crédito", 4, {
+        "documentos_anexados": "Documentos anexados para análise",
+        "status_documentacao": "Status da documentação",
+        "resultado_analise_credito": "Resultado da análise de crédito",
+    }),
+    ("Assinatura do Contrato", 5, {
+        "data_assinatura": "Data da assinatura do contrato",
+        "contrato_assinado": "Contrato assinado anexado",
+    }),
+    ("Contratos Firmados", 6, {
+        "contrato_assinado": "Contrato assinado anexado",
+        "data_assinatura": "Data da assinatura do contrato",
+    }),
+    ("Reprovado", 7, {
+        "status_documentacao": "Status da documentação",
+        "resultado_analise_credito": "Resultado da análise de crédito",
+    }),
+    ("Inativos", 8, {
+        "descricao": "Motivo da inatividade",
+    }),
+)
+
+
+def criar_kanbans_padrao(usuarios):
+    """
+    Cria o Kanban padrão, com as colunas de `COLUNAS_PADRAO`, para cada usuário da lista.
+
+    Kanbans, colunas e ordens são inseridos com bulk_create. Em bancos que não retornam
+    os IDs de inserções em lote (MySQL), os Kanbans são relidos pelo usuário e as colunas
+    pelo identificador do lote, em ordem de ID, que segue a ordem de inserção. O identificador
+    é apagado na mesma transação, então nenhuma coluna fica marcada após a criação.
+    Retorna os Kanbans na mesma ordem dos usuários.
+    """
+    usuarios = list(usuarios)
+    retorna_ids = connection.features.can_return_rows_from_bulk_insert
+    lote = None if retorna_ids else uuid.uuid4().hex
+
+    with transaction.atomic():
+        kanbans = Kanban.objects.bulk_create([
+            Kanban(usuario=usuario, nome=f"Kanban de {usuario.username}", descricao="Kanban padrão do usuário")
+            for usuario in usuarios
+        ])
+        if not retorna_ids:
+            ids = dict(Kanban.objects.filter(usuario__in=usuarios).values_list('usuario_id', 'id'))
+            for kanban in kanbans:
+                kanban.pk = ids[kanban.usuario_id]
+
+        colunas = KanbanColumn.objects.bulk_create([
+            KanbanColumn(nome=nome, meta_dados=dict(campos_obrigatorios), lote=lote)
+            for _ in kanbans
+            for nome, _posicao, campos_obrigatorios in COLUNAS_PADRAO
+        ])
+        if not retorna_ids:
+            ids = KanbanColumn.objects.filter(lote=lote).order_by('id').values_list('id', flat=True)
+            for coluna, coluna_id in zip(colunas, ids):
+                coluna.pk = coluna_id
+            KanbanColumn.objects.filter(lote=lote).update(lote=None)
+
+        posicoes = [posicao for _nome, posicao, _campos in COLUNAS_PADRAO] * len(kanbans)
+        kanbans_das_colunas = [kanban for kanban in kanbans for _ in COLUNAS_PADRAO]
+        KanbanColumnOrder.objects.bulk_create([
+            KanbanColumnOrder(kanban=kanban, coluna=coluna, posicao=posicao)
+            for kanban, coluna, posicao in zip(kanbans_das_colunas, colunas, posicoes)
+        ])
+
+    return kanbans
+
+
+def criar_kanban_padrao(usuario):
+    # Cria o Kanban associado ao usuário, com as colunas padrão
+    return criar_kanbans_padrao([usuario])[0]
 
 
 
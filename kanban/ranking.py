@@ -0,0 +1,67 @@
+"""
+Ranks lexicográficos para ordenar os cards dentro de uma coluna do Kanban.
+
+Um rank é uma string em base 36 (apenas dígitos e letras minúsculas, para manter a
+mesma ordem em collations que ignoram maiúsculas) comparada como texto. Sempre existe
+um rank entre dois ranks distintos, então mover um card exige gravar apenas o card
+movido. Ranks gerados nunca terminam em '0', o que garante espaço antes de qualquer rank.
+"""
+
+ALFABETO = '0123456789abcdefghijklmnopqrstuvwxyz'
+BASE = len(ALFABETO)
+
+# Acima deste tamanho a coluna deve ser rebalanceada
+TAMANHO_MAXIMO_RANK = 32
+
+
+def rank_entre(antes='', depois=''):
+    """
+    Retorna um rank estritamente entre `antes` e `depois`.
+    String vazia representa o início (em `antes`) ou o fim da coluna (em `depois`).
+    """
+    if depois and antes >= depois:
+        raise ValueError("O rank anterior deve ser menor que o rank seguinte.")
+
+    rank = ''
+    posicao = 0
+    superior = depois or None
+    while True:
+        digito_antes = ALFABETO.index(antes[posicao]) if posicao < len(antes) else 0
+
+        if superior is None:
+            # Sem limite superior: basta incrementar o dígito, o que mantém os ranks curtos
+            # quando cards são adicionados ao final da coluna
+            if digito_antes + 1 < BASE:
+                return rank + ALFABETO[digito_antes + 1]
+            rank += ALFABETO[digito_antes]
+            posicao += 1
+            continue
+
+        digito_depois = ALFABETO.index(superior[posicao])
+        if digito_depois - digito_antes > 1:
+            return rank + ALFABETO[(digito_antes + digito_depois) // 2]
+
+        rank += ALFABETO[digito_antes]
+        if digito_depois != digito_antes:
+            # O prefixo já é menor que `depois`; a partir daqui só importa superar `antes`
+            superior = None
+        posicao += 1
+
+
+def para_base(valor, largura):
+    digitos = []
+    for _ in range(largura):
+        valor, resto = divmod(valor, BASE)
+        digitos.append(ALFABETO[resto])
+    return ''.join(reversed(digitos))
+
+
+def ranks_distribuidos(quantidade):
+    """
+    Retorna `quantidade` ranks curtos, em ordem crescente e igualmente espaçados.
+    """
+    largura = 1
+    while BASE ** largura <= quantidade + 1:
+        largura += 1
+    passo = BASE ** largura // (quantidade + 1)
+    return [para_base(passo * indice, largura).rstrip('0') for indice in range(1, quantidade + 1)]
@@ -0,0 +1,166 @@
+"""
+Otimização da ordem das visitas de um dia a partir das coordenadas dos imóveis.
+
+As distâncias entre todos os pontos são calculadas de uma vez pela fórmula de haversine,
+com operações vetorizadas do NumPy. A rota inicial é montada pelo vizinho mais próximo e
+depois melhorada com 2-opt (inversão de trechos da rota enquanto a distância diminuir).
+
+Visitas com horário fixo são visitadas no horário marcado e na ordem cronológica: o vizinho
+mais próximo só escolhe uma visita livre se ainda for possível chegar à próxima visita fixa
+a tempo, e o 2-opt só aceita inversões que não atrasem as visitas fixas. O tempo de
+deslocamento é estimado pela distância e por uma velocidade média.
+"""
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from kanban.models import DURACAO_VISITA
+
+RAIO_TERRA_KM = 6371.0088
+
+# Velocidade média de deslocamento entre visitas, usada para estimar o tempo de viagem
+VELOCIDADE_MEDIA_KMH = getattr(settings, 'KANBAN_VELOCIDADE_MEDIA_KMH', 30)
+
+MAXIMO_ITERACOES_2OPT = 1000
+TOLERANCIA = 1e-9
+
+
+def matriz_distancias(latitudes, longitudes):
+    """Matriz n x n das distâncias, em km, entre os pontos pela fórmula de haversine."""
+    latitudes = np.radians(np.asarray(latitudes, dtype=np.float64))
+    longitudes = np.radians(np.asarray(longitudes, dtype=np.float64))
+    delta_lat = latitudes[:, None] - latitudes[None, :]
+    delta_lng = longitudes[:, None] - longitudes[None, :]
+    a = np.sin(delta_lat / 2) ** 2 + np.cos(latitudes)[:, None] * np.cos(latitudes)[None, :] * np.sin(delta_lng / 2) ** 2
+    return 2 * RAIO_TERRA_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class _Roteiro:
+    """
+    Pontos de uma otimização: as paradas (índices 0..n-1), o ponto de partida (n) e um ponto
+    final virtual (n + 1) a distância zero de todos, para que a rota termine em qualquer parada.
+    Sem origem, o ponto de partida também é virtual.
+    """
+
+    def __init__(self, paradas, origem, inicio, duracao, velocidade):
+        quantidade = len(paradas)
+        self.partida, self.fim = quantidade, quantidade + 1
+        self.distancias = np.zeros((quantidade + 2, quantidade + 2))
+        latitudes = [parada['latitude'] for parada in paradas]
+        longitudes = [parada['longitude'] for parada in paradas]
+        if origem is not None:
+            latitudes.append(origem[0])
+            longitudes.append(origem[1])
+        pontos = len(latitudes)
+        self.distancias[:pontos, :pontos] = matriz_distancias(latitudes, longitudes)
+
+        # Horários em minutos a partir do início da rota; NaN para as visitas livres
+        self.horarios = np.array([
+            (parada['horario'] - inicio) / timedelta(minutes=1) if parada['fixo'] else np.nan
+            for parada in paradas
+        ] + [np.nan, np.nan])
+        self.fixo = ~np.isnan(self.horarios)
+        self.duracao = duracao / timedelta(minutes=1)
+        self.minutos_por_km = 60.0 / velocidade
+
+    def simular(self, caminho):
+        """Minutos de chegada a cada parada do caminho e o atraso total nas visitas fixas."""
+        tempo, atraso, chegadas = 0.0, 0.0, []
+        for anterior, parada in zip(caminho, caminho[1:]):
+            if parada == self.fim:
+                break
+            tempo += self.distancias[anterior, parada] * self.minutos_por_km
+            if self.fixo[parada]:
+                atraso += max(0.0, tempo - self.horarios[parada])
+                tempo = max(tempo, self.horarios[parada])
+            chegadas.append(tempo)
+            tempo += self.duracao
+        return chegadas, atraso
+
+    def vizinho_mais_proximo(self):
+        """Rota inicial: as visitas fixas em ordem cronológica, preenchendo os intervalos com as livres mais próximas."""
+        fixas = sorted(np.flatnonzero(self.fixo), key=lambda parada: self.horarios[parada])
+        livres = np.flatnonzero(~self.fixo[:self.partida])
+        caminho, atual, tempo = [self.partida], self.partida, 0.0
+
+        for proxima_fixa in fixas + [None]:
+            while len(livres):
+                chegada = tempo + self.distancias[atual, livres] * self.minutos_por_km
+                candidatas = np.ones(len(livres), dtype=bool)
+                if proxima_fixa is not None:
+                    ate_fixa = chegada + self.duracao + self.distancias[livres, proxima_fixa] * self.minutos_por_km
+                    candidatas = ate_fixa <= self.horarios[proxima_fixa]
+                if not candidatas.any():
+                    break
+                escolha = np.flatnonzero(candidatas)[np.argmin(self.distancias[atual, livres[candidatas]])]
+                atual, tempo = livres[escolha], chegada[escolha] + self.duracao
+                caminho.append(int(atual))
+                livres = np.delete(livres, escolha)
+            if proxima_fixa is not None:
+                tempo += self.distancias[atual, proxima_fixa] * self.minutos_por_km
+                tempo = max(tempo, self.horarios[proxima_fixa]) + self.duracao
+                atual = proxima_fixa
+                caminho.append(int(atual))
+
+        return caminho + [self.fim]
+
+    def dois_opt(self, caminho):
+        """
+        Inverte trechos do caminho enquanto a distância total diminuir sem aumentar o atraso
+        nas visitas fixas. Para cada início de trecho, o ganho de todos os finais possíveis é
+        calculado de uma vez; trechos com duas ou mais visitas fixas são descartados, pois
+        inverteriam a ordem cronológica delas.
+        """
+        _, atraso_atual = self.simular(caminho)
+        for _iteracao in range(MAXIMO_ITERACOES_2OPT):
+            pontos = np.array(caminho)
+            fixas_acumuladas = np.cumsum(self.fixo[pontos])
+            melhorou = False
+            for i in range(1, len(caminho) - 2):
+                finais = np.arange(i + 1, len(caminho) - 1)
+                a, b = pontos[i - 1], pontos[i]
+                c, d = pontos[finais], pontos[finais + 1]
+                ganho = self.distancias[a, c] + self.distancias[b, d] - self.distancias[a, b] - self.distancias[c, d]
+                fixas_no_trecho = fixas_acumuladas[finais] - fixas_acumuladas[i - 1]
+                validos = (ganho < -TOLERANCIA) & (fixas_no_trecho < 2)
+                for j in finais[validos][np.argsort(ganho[validos])]:
+                    novo = caminho[:i] + caminho[i:j + 1][::-1] + caminho[j + 1:]
+                    _, atraso = self.simular(novo)
+                    if atraso <= atraso_atual + TOLERANCIA:
+                        caminho, atraso_atual, melhorou = novo, atraso, True
+                        break
+                if melhorou:
+                    break
+            if not melhorou:
+                break
+        return caminho
+
+
+def otimizar_rota(paradas, inicio, origem=None, duracao=DURACAO_VISITA, velocidade=VELOCIDADE_MEDIA_KMH):
+    """
+    Retorna a ordem sugerida para as visitas do dia.
+
+    `paradas` é uma lista de dicionários com `id`, `latitude`, `longitude`, `horario` (data e
+    hora da visita) e `fixo` (se a visita deve acontecer no horário marcado). `inicio` é o
+    momento em que a rota começa e `origem`, opcionalmente, o par (latitude, longitude) de partida.
+    """
+    if not paradas:
+        return {'paradas': [], 'distancia_total_km': 0.0, 'atraso_minutos': 0.0}
+
+    roteiro = _Roteiro(paradas, origem, inicio, duracao, velocidade)
+    caminho = roteiro.dois_opt(roteiro.vizinho_mais_proximo())
+    chegadas, atraso = roteiro.simular(caminho)
+
+    resultado, anterior = [], caminho[0]
+    for parada, chegada in zip(caminho[1:-1], chegadas):
+        resultado.append({
+            'id': paradas[parada]['id'],
+            'chegada': inicio + timedelta(minutes=round(chegada, 4)),
+            'distancia_km': round(float(roteiro.distancias[anterior, parada]), 3),
+            'horario_fixo': bool(roteiro.fixo[parada]),
+        })
+        anterior = parada
+    return {
+        'paradas': resultado,
+        'distancia_total_km': round(sum(parada['distancia_km'] for parada in resultado), 3),
+        'atraso_minutos': round(atraso, 1),
+    }
@@ -1,6 +1,9 @@
 from rest_framework import serializers
-from .models import Kanban, KanbanCard, KanbanColumnOrder, KanbanColumn
+from .models import Kanban, KanbanCard, KanbanCardArquivado, KanbanCardDados, KanbanColumnOrder, KanbanColumn
+from .validacao import compilar_regras, obter_validador
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.contrib.auth import get_user_model
+import copy
 
 User = get_user_model()
 
@@ -39,14 +42,51 @@ class KanbanColumnSerializer(serializers.ModelSerializer):
     def validate_cor_alerta(self, value):
         return self._validate_hex_color(value)
 
+    def validate_meta_dados(self, value):
+        """Garante que as regras de validação da coluna podem ser compiladas."""
+        try:
+            compilar_regras(value)
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.messages)
+        return value
+
 
 
 class KanbanCardSerializer(serializers.ModelSerializer):
     class Meta:
         model = KanbanCard
-        fields = ['id', 'lead_nome', 'descricao', 'data_criacao', 'ultima_atualizacao', 'data_prazo', 'cor_atual', 'dados_adicionais', 'coluna']
+        fields = ['id', 'lead_nome', 'descricao', 'data_criacao', 'ultima_atualizacao', 'data_prazo', 'cor_atual', 'dados_adicionais', 'coluna',
+                  'data_visita', 'imovel']
         read_only_fields = ['id', 'data_criacao', 'ultima_atualizacao', 'cor_atual']
 
+    def validate(self, attrs):
+        """
+        Valida o card resultante com as regras da coluna de destino e, se a visita, o imóvel
+        ou a coluna mudarem, verifica conflitos com a agenda do corretor e do imóvel.
+        """
+        coluna = attrs.get('coluna') or getattr(self.instance, 'coluna', None)
+        if coluna is None:
+            return attrs
+        card = copy.copy(self.instance) if self.instance is not None else KanbanCard()
+        for campo, valor in attrs.items():
+            setattr(card, campo, valor)
+        erros = obter_validador(coluna).erros(card)
+        if erros:
+            raise serializers.ValidationError({'coluna': erros})
+        if {'data_visita', 'imovel', 'coluna'} & set(attrs):
+            conflitos = card.verificar_conflitos_visita()
+            if conflitos:
+                raise serializers.ValidationError({'data_visita': conflitos})
+        return attrs
+
+
+class KanbanCardArquivadoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = KanbanCardArquivado
+        fields = ['id', 'kanban', 'coluna', 'etapa', 'imovel', 'data_criacao', 'ultima_atualizacao',
+                  'data_arquivamento'] + KanbanCardDados.campos_dados()
+        read_only_fields = fields
+
 
 class KanbanColumnOrderSerializer(serializers.ModelSerializer):
     coluna_id = serializers.PrimaryKeyRelatedField(queryset=KanbanColumn.objects.all(), source='coluna')
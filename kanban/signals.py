@@ -1,10 +1,91 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from usuario.models import Usuario
-from kanban.models import criar_kanban_padrao
+from kanban.models import criar_kanban_padrao, Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder, KanbanRemocao
+from kanban.eventos import broker
+from kanban.agendador import agendador_transicoes
+from kanban.compatibilidade import indice_imoveis
+from imovel.models import Imovel, TransacaoImovel
 
 @receiver(post_save, sender=Usuario)
 def criar_kanban_ao_criar_usuario(sender, instance, created, **kwargs):
     if created:
         # Cria o kanban padrão para o usuário recém-criado
         criar_kanban_padrao(instance)
+
+
+@receiver(pre_delete, sender=KanbanCard)
+def registrar_remocao_card(sender, instance, **kwargs):
+    # Registra a remoção para a sincronização incremental do Kanban ao qual a coluna pertence
+    kanban_id = KanbanColumnOrder.objects.filter(coluna_id=instance.coluna_id).values_list('kanban_id', flat=True).first()
+    if kanban_id is not None:
+        KanbanRemocao.objects.create(kanban_id=kanban_id, tipo='card', objeto_id=instance.pk)
+
+
+@receiver(pre_delete, sender=KanbanColumnOrder)
+def registrar_remocao_coluna(sender, instance, origin=None, **kwargs):
+    # Na remoção do próprio Kanban (ou do usuário) não há o que sincronizar
+    if getattr(origin, 'model', type(origin)) in (Kanban, Usuario):
+        return
+    KanbanRemocao.objects.create(kanban_id=instance.kanban_id, tipo='coluna', objeto_id=instance.coluna_id)
+
+
+@receiver([post_save, post_delete], sender=KanbanCard)
+def invalidar_cache_ao_alterar_card(sender, instance, **kwargs):
+    Kanban.invalidar_cache_das_colunas([instance.coluna_id])
+
+
+@receiver([post_save, post_delete], sender=KanbanColumn)
+def invalidar_cache_ao_alterar_coluna(sender, instance, **kwargs):
+    Kanban.invalidar_cache_das_colunas([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=KanbanColumnOrder)
+def invalidar_cache_ao_alterar_ordem(sender, instance, **kwargs):
+    Kanban.invalidar_cache(instance.kanban_id)
+
+
+@receiver([post_save, post_delete], sender=Kanban)
+def invalidar_cache_ao_alterar_kanban(sender, instance, **kwargs):
+    Kanban.invalidar_cache(instance.pk)
+
+
+@receiver(post_save, sender=Usuario)
+def invalidar_cache_ao_alterar_usuario(sender, instance, created, **kwargs):
+    # A resposta completa do Kanban traz o nome do usuário
+    if not created:
+        Kanban.invalidar_cache(*Kanban.objects.filter(usuario=instance).values_list('id', flat=True))
+
+
+@receiver([post_save, post_delete], sender=KanbanCard)
+@receiver([post_save, post_delete], sender=KanbanColumn)
+@receiver([post_save, post_delete], sender=KanbanColumnOrder)
+@receiver(post_save, sender=Kanban)
+def notificar_conexoes_de_eventos(sender, **kwargs):
+    # Acorda o envio de eventos deste processo assim que a alteração for confirmada
+    transaction.on_commit(broker.notificar)
+
+
+@receiver(post_save, sender=KanbanCard)
+def agendar_transicao_do_card(sender, instance, **kwargs):
+    # Leva a próxima transição ao agendador sem esperar a recarga periódica da janela
+    proxima_transicao, card_id = instance.proxima_transicao, instance.pk
+    transaction.on_commit(lambda: agendador_transicoes.agendar(proxima_transicao, card_id))
+
+
+@receiver(post_save, sender=KanbanColumn)
+def reagendar_cards_da_coluna(sender, instance, **kwargs):
+    # A mudança do prazo recalcula as transições dos cards com um UPDATE, sem os sinais dos cards
+    transaction.on_commit(agendador_transicoes.avisar)
+
+
+@receiver([post_save, post_delete], sender=Imovel)
+def atualizar_indice_ao_alterar_imovel(sender, instance, **kwargs):
+    # O índice de compatibilidade lê o imóvel do banco, então é atualizado após o commit
+    transaction.on_commit(lambda: indice_imoveis.atualizar_imovel(instance.pk))
+
+
+@receiver([post_save, post_delete], sender=TransacaoImovel)
+def atualizar_indice_ao_alterar_transacao(sender, instance, **kwargs):
+    transaction.on_commit(lambda: indice_imoveis.atualizar_imovel(instance.imovel_id))
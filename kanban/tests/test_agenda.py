@@ -0,0 +1,118 @@
+from datetime import datetime
+from django.db.models.signals import post_save
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from imovel.models import Imovel
+from usuario.models import Usuario
+from kanban.models import Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+
+class AgendaVisitasTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.colunas = {}
+        for nome in ("ana", "bruno"):
+            usuario = Usuario.objects.create(username=nome)
+            kanban = Kanban.objects.create(nome=f"Kanban {nome}", usuario=usuario)
+            coluna = KanbanColumn.objects.create(nome="Visita Agendada")
+            KanbanColumnOrder.objects.create(kanban=kanban, coluna=coluna, posicao=1)
+            cls.colunas[nome] = coluna
+        cls.ana, cls.bruno = Usuario.objects.get(username="ana"), Usuario.objects.get(username="bruno")
+        cls.imovel = Imovel.objects.create(
+            nome="Apto Aldeota", bairro="Aldeota", cidade="Fortaleza", estado="CE", cep="60000-000",
+            tipo_imovel="apartamento", numero_registro="123",
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.ana)
+
+    def _visita(self, corretor, hora, minuto=0, imovel=None):
+        return KanbanCard.objects.create(
+            lead_nome=f"Lead {corretor} {hora}:{minuto:02d}", coluna=self.colunas[corretor],
+            data_visita=datetime(2024, 5, 10, hora, minuto), imovel=imovel,
+        )
+
+    def test_conflitos_por_faixa_de_horario(self):
+        visita = self._visita("ana", 10)
+        self._visita("ana", 12)
+        do_imovel = self._visita("bruno", 14, imovel=self.imovel)
+
+        conflitos = KanbanCard.conflitos_visita(datetime(2024, 5, 10, 10, 30), usuario_id=self.ana.id)
+        self.assertEqual(list(conflitos), [visita])
+        # Visitas encostadas não conflitam
+        self.assertFalse(KanbanCard.conflitos_visita(datetime(2024, 5, 10, 11), usuario_id=self.ana.id).exists())
+        # A agenda de outro corretor só conflita quando o imóvel é o mesmo
+        self.assertFalse(KanbanCard.conflitos_visita(datetime(2024, 5, 10, 10), usuario_id=self.bruno.id).exists())
+        conflitos = KanbanCard.conflitos_visita(datetime(2024, 5, 10, 14, 15), usuario_id=self.ana.id, imovel_id=self.imovel.id)
+        self.assertEqual(list(conflitos), [do_imovel])
+
+    def test_serializer_rejeita_visita_em_conflito(self):
+        self._visita("ana", 10)
+        card = KanbanCard.objects.create(lead_nome="Novo lead", coluna=self.colunas["ana"])
+
+        response = self.client.patch(reverse('kanban-card-detail', kwargs={'pk': card.id}),
+                                     {'data_visita': '2024-05-10T10:30:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('data_visita', response.data)
+
+        response = self.client.patch(reverse('kanban-card-detail', kwargs={'pk': card.id}),
+                                     {'data_visita': '2024-05-10T11:00:00'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_agenda_do_corretor(self):
+        primeira = self._visita("ana", 9)
+        sobreposta = self._visita("ana", 9, 30)
+        livre = self._visita("ana", 15)
+        self._visita("bruno", 9)
+        KanbanCard.objects.create(lead_nome="Outro dia", coluna=self.colunas["ana"], data_visita=datetime(2024, 5, 11, 9))
+
+        response = self.client.get(reverse('kanban-card-agenda'), {'inicio': '2024-05-10', 'fim': '2024-05-11'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([visita['id'] for visita in response.data], [primeira.id, sobreposta.id, livre.id])
+        self.assertEqual([visita['conflito'] for visita in response.data], [True, True, False])
+
+    def test_agenda_do_imovel(self):
+        do_imovel = self._visita("bruno", 9, imovel=self.imovel)
+        self._visita("ana", 9)
+
+        response = self.client.get(reverse('kanban-card-agenda'),
+                                   {'inicio': '2024-05-10', 'fim': '2024-05-11', 'imovel_id': self.imovel.id})
+        self.assertEqual([visita['id'] for visita in response.data], [do_imovel.id])
+        self.assertEqual(response.data[0]['imovel'], "Apto Aldeota")
+
+    def test_agenda_valida_intervalo(self):
+        url = reverse('kanban-card-agenda')
+        self.assertEqual(self.client.get(url, {'inicio': '2024-05-10'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'inicio': '2024-05-10', 'fim': '2024-08-10'}).status_code,
+                         status.HTTP_400_BAD_REQUEST)
+
+    def test_agenda_com_fuso_horario(self):
+        manha = self._visita("ana", 9)
+        self._visita("ana", 15)
+
+        # 12h UTC são 9h no horário local (America/Sao_Paulo); `fim` sem fuso já está no horário local
+        response = self.client.get(reverse('kanban-card-agenda'), {'inicio': '2024-05-10T12:00:00Z', 'fim': '2024-05-10T12:00:00'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([visita['id'] for visita in response.data], [manha.id])
+
+    def test_associar_imovel_em_lote_confere_conflitos(self):
+        self._visita("bruno", 10, imovel=self.imovel)
+        em_conflito = self._visita("ana", 10, 30)
+        livre = self._visita("ana", 14)
+        sem_visita = KanbanCard.objects.create(lead_nome="Sem visita", coluna=self.colunas["ana"])
+
+        response = self.client.post(reverse('kanban-card-em-lote'), {
+            'kanban_id': Kanban.objects.get(usuario=self.ana).id, 'operacao': 'imovel', 'imovel_id': self.imovel.id,
+            'card_ids': [em_conflito.id, livre.id, sem_visita.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([resultado['sucesso'] for resultado in response.data['resultados']], [False, True, True])
+        self.assertEqual(len(response.data['resultados'][0]['erros']), 1)
+        self.assertEqual(set(KanbanCard.objects.filter(coluna=self.colunas["ana"], imovel=self.imovel).values_list('id', flat=True)),
+                         {livre.id, sem_visita.id})
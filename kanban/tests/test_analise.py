@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from django.db.models.signals import post_save
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from usuario.models import Usuario
+from kanban.analise import analisar_funil
+from kanban.models import Kanban, KanbanCard, KanbanCardArquivado, KanbanColumn, KanbanColumnOrder, KanbanMovimentacao
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+
+class FunilKanbanTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.admin = Usuario.objects.create(username="admin", is_staff=True)
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+
+        cls.visita = KanbanColumn.objects.create(nome="Visita ao Imóvel")
+        cls.negociacao = KanbanColumn.objects.create(nome="Negociação")
+        cls.contratos = KanbanColumn.objects.create(nome="Contratos Firmados")
+        for posicao, coluna in enumerate([cls.visita, cls.negociacao, cls.contratos], start=1):
+            KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=coluna, posicao=posicao)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _historico(self, *entradas):
+        """Cria um card com as entradas (coluna, horas desde o início) informadas."""
+        inicio = datetime(2024, 1, 1, 8, 0)
+        card = KanbanCard.objects.create(lead_nome="Lead", coluna=entradas[-1][0])
+        KanbanMovimentacao.objects.filter(card=card).delete()
+        KanbanMovimentacao.objects.bulk_create([
+            KanbanMovimentacao(card=card, kanban=self.kanban, coluna=coluna, etapa=coluna.nome, data=inicio + timedelta(hours=horas))
+            for coluna, horas in entradas
+        ])
+        return card
+
+    def test_movimentacao_registrada_ao_mudar_de_coluna(self):
+        card = KanbanCard.objects.create(lead_nome="Lead", coluna=self.visita)
+        card = KanbanCard.objects.get(pk=card.pk)
+        card.descricao = "Sem mudança de coluna"
+        card.save()
+        card.validar_e_associar_coluna(self.negociacao)
+
+        etapas = list(KanbanMovimentacao.objects.filter(card=card).order_by('data', 'id').values_list('etapa', flat=True))
+        self.assertEqual(etapas, ["Visita ao Imóvel", "Negociação"])
+        self.assertEqual(KanbanMovimentacao.objects.filter(card=card, kanban=self.kanban).count(), 2)
+
+    def test_historico_permanece_apos_remover_card(self):
+        card = KanbanCard.objects.create(lead_nome="Lead", coluna=self.visita)
+        card_id = card.id
+        card.delete()
+        self.assertTrue(KanbanMovimentacao.objects.filter(card_id=card_id).exists())
+
+    def test_tempo_e_conversao_por_etapa(self):
+        self._historico((self.visita, 0), (self.negociacao, 2), (self.contratos, 6))
+        self._historico((self.visita, 0), (self.negociacao, 4))
+        self._historico((self.visita, 0))
+
+        resultado = analisar_funil(
+            KanbanMovimentacao.objects.filter(kanban=self.kanban),
+            ordem_etapas=["Visita ao Imóvel", "Negociação", "Contratos Firmados"],
+            agora=datetime(2024, 1, 1, 18, 0),
+        )
+
+        visita, negociacao, contratos = resultado["etapas"]
+        self.assertEqual(visita["etapa"], "Visita ao Imóvel")
+        self.assertEqual(visita["entradas"], 3)
+        self.assertEqual(visita["cards_atuais"], 1)
+        self.assertEqual(visita["tempo_medio_horas"], 3.0)
+        self.assertEqual(negociacao["tempo_mediano_horas"], 4.0)
+        self.assertIsNone(contratos["tempo_medio_horas"])
+
+        conversao = {(item["de"], item["para"]): item["taxa"] for item in resultado["conversao"]}
+        self.assertAlmostEqual(conversao[("Visita ao Imóvel", "Negociação")], 2 / 3, places=4)
+        self.assertAlmostEqual(conversao[("Visita ao Imóvel", "Contratos Firmados")], 1 / 3, places=4)
+        self.assertEqual(conversao[("Negociação", "Contratos Firmados")], 0.5)
+
+    def test_conversao_segue_a_ordem_das_movimentacoes(self):
+        # O card voltou da negociação para a visita: não converteu da visita para a negociação
+        self._historico((self.negociacao, 0), (self.visita, 2))
+        self._historico((self.visita, 0), (self.negociacao, 2), (self.visita, 4), (self.negociacao, 6))
+        arquivado = self._historico((self.visita, 0), (self.contratos, 3))
+        KanbanCardArquivado.arquivar(idade=timedelta(0), colunas=[self.contratos.nome])
+        self.assertTrue(KanbanCardArquivado.objects.filter(pk=arquivado.pk).exists())
+
+        resultado = analisar_funil(
+            KanbanMovimentacao.objects.filter(kanban=self.kanban),
+            ordem_etapas=["Visita ao Imóvel", "Negociação", "Contratos Firmados"],
+            agora=datetime(2024, 1, 1, 18, 0),
+        )
+
+        conversao = {(item["de"], item["para"]): (item["cards"], item["taxa"]) for item in resultado["conversao"]}
+        self.assertEqual(conversao[("Visita ao Imóvel", "Negociação")], (1, round(1 / 3, 4)))
+        self.assertEqual(conversao[("Visita ao Imóvel", "Contratos Firmados")], (1, round(1 / 3, 4)))
+        self.assertEqual(conversao[("Negociação", "Contratos Firmados")], (0, 0.0))
+
+        # O card arquivado deixa de contar como atual na sua última etapa
+        self.assertEqual([etapa["cards_atuais"] for etapa in resultado["etapas"]], [1, 1, 0])
+
+    def test_endpoint_funil_do_kanban(self):
+        self._historico((self.visita, 0), (self.negociacao, 2))
+
+        response = self.client.get(reverse('kanban-funil-list'), {'kanban_id': self.kanban.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([etapa["etapa"] for etapa in response.data["etapas"]],
+                         ["Visita ao Imóvel", "Negociação"])
+
+    def test_endpoint_funil_de_todos_os_kanbans(self):
+        # Apenas administradores analisam todos os Kanbans
+        response = self.client.get(reverse('kanban-funil-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse('kanban-funil-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"etapas": [], "conversao": []})
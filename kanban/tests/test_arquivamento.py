@@ -0,0 +1,81 @@
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from usuario.models import Usuario
+from kanban.models import (
+    Kanban, KanbanCard, KanbanCardArquivado, KanbanColumn, KanbanColumnOrder, KanbanMovimentacao, KanbanRemocao,
+)
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+
+class ArquivamentoCardsTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+        cls.negociacao = KanbanColumn.objects.create(nome="Negociação")
+        cls.reprovado = KanbanColumn.objects.create(nome="Reprovado")
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.negociacao, posicao=1)
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.reprovado, posicao=2)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        antigo = timezone.now() - timedelta(days=400)
+
+        self.reprovado_antigo = KanbanCard.objects.create(
+            lead_nome="Lead antigo", coluna=self.reprovado, contato={"telefone": "85999990000"},
+            dados_adicionais={"origem": "Site"}, valor_final="350000.00",
+        )
+        self.reprovado_recente = KanbanCard.objects.create(lead_nome="Lead recente", coluna=self.reprovado)
+        self.negociacao_antigo = KanbanCard.objects.create(lead_nome="Lead em negociação", coluna=self.negociacao)
+        KanbanCard.objects.filter(pk__in=[self.reprovado_antigo.pk, self.negociacao_antigo.pk]).update(ultima_atualizacao=antigo)
+
+    def test_arquivar_apenas_cards_antigos_das_colunas_finais(self):
+        total = KanbanCardArquivado.arquivar(idade=timedelta(days=180))
+
+        self.assertEqual(total, 1)
+        self.assertFalse(KanbanCard.objects.filter(pk=self.reprovado_antigo.pk).exists())
+        self.assertEqual(KanbanCard.objects.count(), 2)
+
+        arquivado = KanbanCardArquivado.objects.get(pk=self.reprovado_antigo.pk)
+        self.assertEqual((arquivado.kanban_id, arquivado.etapa), (self.kanban.id, "Reprovado"))
+        self.assertEqual(arquivado.contato, {"telefone": "85999990000"})
+        self.assertEqual(arquivado.dados_adicionais, {"origem": "Site"})
+        self.assertEqual(str(arquivado.valor_final), "350000.00")
+
+        # O histórico permanece e os clientes sincronizados recebem a remoção do card
+        self.assertTrue(KanbanMovimentacao.objects.filter(card_id=arquivado.pk).exists())
+        self.assertTrue(KanbanRemocao.objects.filter(tipo='card', objeto_id=arquivado.pk).exists())
+
+    def test_arquivar_em_lotes(self):
+        for i in range(5):
+            card = KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.reprovado)
+            KanbanCard.objects.filter(pk=card.pk).update(ultima_atualizacao=timezone.now() - timedelta(days=400))
+
+        self.assertEqual(KanbanCardArquivado.arquivar(idade=timedelta(days=180), tamanho_lote=2), 6)
+
+    def test_comando_de_arquivamento(self):
+        saida = StringIO()
+        call_command('arquivar_cards_kanban', '--dias', '30', stdout=saida)
+        self.assertIn("1 card(s) arquivado(s).", saida.getvalue())
+
+    def test_listar_cards_arquivados(self):
+        KanbanCardArquivado.arquivar(idade=timedelta(days=180))
+        url = reverse('kanban-card-arquivado-list')
+
+        response = self.client.get(url, {'kanban_id': self.kanban.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['lead_nome'], "Lead antigo")
+
+        # Sem `kanban_id`, apenas administradores podem consultar
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
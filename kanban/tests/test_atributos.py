@@ -0,0 +1,97 @@
+from decimal import Decimal
+from io import StringIO
+from django.core.management import call_command
+from django.db.models.signals import post_save
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from usuario.models import Usuario
+from kanban.models import Kanban, KanbanCard, KanbanCardAtributo, KanbanColumn, KanbanColumnOrder
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+
+class CamposPromovidosTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(
+            nome="Kanban Teste",
+            usuario=cls.usuario,
+            campos_promovidos=[{"chave": "orcamento", "tipo": "numero"}, {"chave": "bairro", "tipo": "texto"}],
+        )
+        cls.coluna = KanbanColumn.objects.create(nome="Contato Inicial")
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.coluna, posicao=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.barato = KanbanCard.objects.create(
+            lead_nome="Lead 1", coluna=self.coluna, dados_adicionais={"orcamento": 250000, "bairro": "Aldeota"}
+        )
+        self.caro = KanbanCard.objects.create(
+            lead_nome="Lead 2", coluna=self.coluna, dados_adicionais={"orcamento": "900000.50", "bairro": "Meireles"}
+        )
+        self.sem_dados = KanbanCard.objects.create(lead_nome="Lead 3", coluna=self.coluna)
+
+    def _filtrar(self, parametros):
+        return self.client.get(reverse('kanban-card-filtrar'), {'kanban_id': self.kanban.id, **parametros})
+
+    def test_atributos_sincronizados_ao_salvar(self):
+        self.assertEqual(KanbanCardAtributo.objects.filter(card=self.barato).count(), 2)
+
+        card = KanbanCard.objects.get(pk=self.barato.pk)
+        card.dados_adicionais["bairro"] = "Centro"
+        card.dados_adicionais["origem"] = "Instagram"  # chave não promovida
+        card.save()
+
+        atributos = dict(KanbanCardAtributo.objects.filter(card=card).values_list('chave', 'valor_texto'))
+        self.assertEqual(atributos, {"orcamento": "", "bairro": "centro"})
+
+    def test_filtrar_por_faixa_e_texto(self):
+        response = self._filtrar({'dados.orcamento__gte': '300000'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([card['id'] for card in response.data['results']], [self.caro.id])
+
+        response = self._filtrar({'dados.bairro': 'ALDEOTA'})
+        self.assertEqual([card['id'] for card in response.data['results']], [self.barato.id])
+
+    def test_ordenar_por_campo_promovido(self):
+        response = self._filtrar({'ordenar': '-orcamento'})
+        self.assertEqual([card['id'] for card in response.data['results']],
+                         [self.caro.id, self.barato.id, self.sem_dados.id])
+
+    def test_filtrar_campo_nao_promovido(self):
+        response = self._filtrar({'dados.origem': 'Instagram'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_numero_fora_do_intervalo(self):
+        card = KanbanCard.objects.get(pk=self.barato.pk)
+        card.dados_adicionais["orcamento"] = 1e30
+        card.save()
+        self.assertFalse(KanbanCardAtributo.objects.filter(card=card, chave="orcamento").exists())
+
+        self.assertEqual(KanbanCardAtributo.campo_e_valor('numero', '999999999999.99'),
+                         ('valor_numero', KanbanCardAtributo.LIMITE_VALOR_NUMERO - Decimal('0.01')))
+        self.assertEqual(KanbanCardAtributo.campo_e_valor('numero', 10 ** 12), ('valor_numero', None))
+
+        for valor in ('1e30', '-1000000000000'):
+            response = self._filtrar({'dados.orcamento__gte': valor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_definir_campos_promovidos_reconstroi_atributos(self):
+        url = reverse('kanban-campos-promovidos', kwargs={'pk': self.usuario.id})
+        response = self.client.put(url, {'campos': [{'chave': 'bairro'}]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['atributos'], 2)
+        self.assertEqual(set(KanbanCardAtributo.objects.values_list('chave', flat=True)), {'bairro'})
+
+        response = self.client.put(url, {'campos': [{'chave': 'bairro', 'tipo': 'data'}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comando_de_sincronizacao(self):
+        KanbanCardAtributo.objects.all().delete()
+        call_command('sincronizar_atributos_kanban', stdout=StringIO())
+        self.assertEqual(KanbanCardAtributo.objects.filter(kanban=self.kanban).count(), 4)
@@ -0,0 +1,132 @@
+from datetime import date
+from django.core.cache import cache
+from django.db.models.signals import post_save
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from imovel.models import Imovel, TransacaoImovel
+from usuario.models import Usuario
+from kanban.compatibilidade import CHAVE_VERSAO, IndiceImoveis, criterios_do_lead, indice_imoveis
+from kanban.models import Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder
+from kanban.signals import criar_kanban_ao_criar_usuario
+from kanban.tests.utils import cache_em_arquivos
+
+
+class CompatibilidadeImoveisTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+        cls.contato = KanbanColumn.objects.create(nome="Contato Inicial")
+        cls.inativos = KanbanColumn.objects.create(nome="Inativos")
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.contato, posicao=1)
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.inativos, posicao=2)
+
+        cls.aldeota = cls._imovel("Apto Aldeota", "Aldeota", "apartamento", 3, venda=480000)
+        cls.meireles = cls._imovel("Apto Meireles", "Meireles", "apartamento", 2, venda=430000, aluguel=3500)
+        cls.caro = cls._imovel("Cobertura", "Meireles", "apartamento", 4, venda=1200000)
+        cls.casa = cls._imovel("Casa Messejana", "Messejana", "casa", 3, venda=450000)
+
+    @staticmethod
+    def _imovel(nome, bairro, tipo, quartos, **transacoes):
+        imovel = Imovel.objects.create(
+            nome=nome, bairro=bairro, cidade="Fortaleza", estado="CE", cep="60000-000", tipo_imovel=tipo,
+            num_quartos=quartos, numero_registro=nome,
+        )
+        for tipo_transacao, valor in transacoes.items():
+            TransacaoImovel.objects.create(imovel=imovel, tipo_transacao=tipo_transacao, valor=valor,
+                                           condicoes_pagamento="À vista", data_disponibilidade=date(2024, 1, 1))
+        return imovel
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.criterios = {"cidade": "fortaleza", "bairro": ["Aldeota"], "tipo_imovel": "apartamento",
+                          "tipo_transacao": "venda", "orcamento": "450000", "quartos": 3}
+        # Força a reconstrução do índice do processo a partir dos imóveis deste teste
+        cache.delete(CHAVE_VERSAO)
+
+    def test_criterios_do_lead(self):
+        criterios = criterios_do_lead({"cidade": "Fortaleza", "bairro": "Aldeota", "orcamento": "abc"})
+        self.assertEqual(criterios["cidade"], "fortaleza")
+        self.assertEqual(criterios["bairros"], frozenset({"aldeota"}))
+        self.assertIsNone(criterios["orcamento"])
+
+    def test_tipos_em_lista_e_sem_normalizacao(self):
+        indice = IndiceImoveis()
+        criterios = dict(self.criterios, tipo_imovel=["Casa", "APARTAMENTO"], tipo_transacao="Venda")
+        resultado = indice.compativeis(criterios)
+
+        # A casa entra pela união das listas dos dois tipos; a cobertura segue acima do orçamento
+        self.assertEqual({item["imovel_id"] for item in resultado}, {self.aldeota.id, self.meireles.id, self.casa.id})
+
+        # Um valor que não é texto nem lista não quebra a consulta
+        self.assertEqual(criterios_do_lead({"tipo_imovel": {"nome": "casa"}})["tipo_imovel"], frozenset())
+        self.assertEqual(indice.compativeis_em_lote([KanbanCard(pk=1, dados_adicionais=criterios)])[1], resultado)
+
+    def test_ordenacao_por_pontuacao(self):
+        indice = IndiceImoveis()
+        resultado = indice.compativeis(self.criterios)
+
+        # A cobertura está acima do orçamento, a casa é de outro tipo e o aluguel é outra transação
+        self.assertEqual([item["imovel_id"] for item in resultado], [self.aldeota.id, self.meireles.id])
+        self.assertGreater(resultado[0]["pontuacao"], resultado[1]["pontuacao"])
+
+    @cache_em_arquivos()
+    def test_atualizacao_incremental(self):
+        indice_imoveis.reconstruir()
+
+        # Os sinais atualizam o índice do processo após o commit
+        with self.captureOnCommitCallbacks(execute=True):
+            self.aldeota.status = 'vendido'
+            self.aldeota.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            novo = self._imovel("Apto Cocó", "Cocó", "apartamento", 3, venda=440000)
+
+        # O índice continua em dia e não precisa ser reconstruído
+        with self.assertNumQueries(0):
+            resultado = indice_imoveis.compativeis(self.criterios)
+        self.assertEqual([item["imovel_id"] for item in resultado], [novo.id, self.meireles.id])
+
+    @cache_em_arquivos()
+    def test_outro_processo_reconstroi_o_indice(self):
+        indice = IndiceImoveis()
+        indice.reconstruir()
+        outro_processo = IndiceImoveis()
+        outro_processo.reconstruir()
+
+        TransacaoImovel.objects.filter(imovel=self.meireles).delete()
+        outro_processo.atualizar_imovel(self.meireles.id)
+
+        resultado = indice.compativeis(self.criterios)
+        self.assertEqual([item["imovel_id"] for item in resultado], [self.aldeota.id])
+
+    def test_cache_local_reconstroi_a_cada_consulta(self):
+        """
+        Com um cache local ao processo a versão não avisaria os outros processos, então o índice
+        é reconstruído a cada consulta e não sugere imóveis alterados por eles.
+        """
+        indice = IndiceImoveis()
+        indice.compativeis(self.criterios)
+
+        # Alteração feita sem passar pelos sinais deste processo
+        Imovel.objects.filter(pk=self.aldeota.pk).update(status='vendido')
+
+        resultado = indice.compativeis(self.criterios)
+        self.assertEqual([item["imovel_id"] for item in resultado], [self.meireles.id])
+
+    def test_endpoints_de_compatibilidade(self):
+        lead = KanbanCard.objects.create(lead_nome="Lead", coluna=self.contato, dados_adicionais=self.criterios)
+        KanbanCard.objects.create(lead_nome="Lead inativo", coluna=self.inativos, dados_adicionais=self.criterios)
+        sem_criterios = KanbanCard.objects.create(lead_nome="Sem critérios", coluna=self.contato)
+
+        response = self.client.get(reverse('kanban-card-imoveis-compativeis', kwargs={'pk': lead.id}), {'limite': 1})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["imovel_id"] for item in response.data], [self.aldeota.id])
+
+        response = self.client.get(reverse('kanban-card-compatibilidade'), {'kanban_id': self.kanban.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {lead.id, sem_criterios.id})
+        self.assertEqual(len(response.data[sem_criterios.id]), 5)
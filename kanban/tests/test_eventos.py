@@ -0,0 +1,74 @@
+import asyncio
+from asgiref.sync import sync_to_async
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+from usuario.models import Usuario
+from kanban.eventos import BrokerEventos, fluxo_eventos
+from kanban.models import Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+
+class EventosKanbanTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+        cls.coluna = KanbanColumn.objects.create(nome="Contato Inicial")
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.coluna, posicao=1)
+
+    async def test_broker_distribui_para_todas_as_conexoes(self):
+        broker = BrokerEventos(intervalo=60)
+        fila1 = broker.inscrever(self.kanban.id)
+        fila2 = broker.inscrever(self.kanban.id)
+
+        broker.publicar(self.kanban.id, {'tipo': 'alteracoes', 'dados': {'cards': [1]}})
+        self.assertEqual((await fila1.get())['dados'], {'cards': [1]})
+        self.assertEqual((await fila2.get())['dados'], {'cards': [1]})
+
+        # A tarefa de consulta ao banco só termina com a última conexão
+        broker.cancelar(self.kanban.id, fila1)
+        self.assertIn(self.kanban.id, broker.tarefas)
+        broker.cancelar(self.kanban.id, fila2)
+        self.assertNotIn(self.kanban.id, broker.tarefas)
+
+    async def test_monitor_publica_alteracoes_do_banco(self):
+        broker = BrokerEventos(intervalo=0.05)
+        fila = broker.inscrever(self.kanban.id)
+        try:
+            card = await sync_to_async(KanbanCard.objects.create)(lead_nome="Lead novo", coluna=self.coluna)
+            evento = await asyncio.wait_for(fila.get(), timeout=5)
+            self.assertEqual(evento['tipo'], 'alteracoes')
+            self.assertEqual([item['id'] for item in evento['dados']['cards']], [card.id])
+
+            # A mesma alteração não é reenviada nas consultas seguintes
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(fila.get(), timeout=0.3)
+        finally:
+            broker.cancelar(self.kanban.id, fila)
+
+    async def test_fluxo_envia_alteracoes_desde_o_cursor(self):
+        desde = timezone.now()
+        card = await sync_to_async(KanbanCard.objects.create)(lead_nome="Lead novo", coluna=self.coluna)
+
+        fluxo = fluxo_eventos(self.kanban.id, desde, broker=BrokerEventos(intervalo=60))
+        try:
+            self.assertEqual(await anext(fluxo), "retry: 3000\n\n")
+            evento = await anext(fluxo)
+            self.assertTrue(evento.startswith("event: alteracoes\n"))
+            self.assertIn(f'"id": {card.id}', evento)
+        finally:
+            await fluxo.aclose()
+
+    async def test_eventos_sem_autenticacao(self):
+        response = await self.async_client.get(reverse('kanban-eventos', kwargs={'pk': self.usuario.id}))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_eventos_kanban_inexistente(self):
+        token = str(AccessToken.for_user(self.usuario))
+        response = await self.async_client.get(reverse('kanban-eventos', kwargs={'pk': 9999}), {'token': token})
+        self.assertEqual(response.status_code, 404)
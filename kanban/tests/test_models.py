@@ -1,10 +1,12 @@
+from unittest import mock
 from django.test import TestCase
+from django.db import connection
 from django.core.exceptions import ValidationError
 from django.db.models.signals import post_save
 from usuario.models import Usuario
 from django.utils import timezone
 from kanban.models import (
-    Kanban, KanbanCard, KanbanColumnOrder, KanbanColumn, criar_kanban_padrao
+    Kanban, KanbanCard, KanbanColumnOrder, KanbanColumn, criar_kanban_padrao, criar_kanbans_padrao, COLUNAS_PADRAO
 )
 from kanban.signals import criar_kanban_ao_criar_usuario
 
@@ -107,6 +109,131 @@ class KanbanModelTest(TestCase):
         card.atualizar_cor()
         self.assertEqual(card.cor_atual, coluna.cor_inicial)
 
+    def test_recalcular_cores_em_lote(self):
+        # Cria cards com idades diferentes em uma coluna com prazo de 2 horas
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial", prazo_alerta=2)
+        idades = {"vermelho": 3, "amarelo": 1, "verde": 0}
+        cards = {}
+        for nome, horas in idades.items():
+            card = KanbanCard.objects.create(lead_nome=nome, coluna=coluna)
+            KanbanCard.objects.filter(pk=card.pk).update(data_criacao=timezone.now() - timezone.timedelta(hours=horas))
+            cards[nome] = card
+
+        # Um UPDATE para a coluna (mais a consulta das colunas e a dos Kanbans cujo cache é invalidado)
+        with self.assertNumQueries(3):
+            alterados = KanbanColumn.recalcular_cores_de_todas()
+
+        # O card verde já estava com a cor inicial e não é alterado
+        self.assertEqual(alterados, 2)
+        for card in cards.values():
+            card.refresh_from_db()
+        self.assertEqual(cards["vermelho"].cor_atual, coluna.cor_alerta)
+        self.assertEqual(cards["amarelo"].cor_atual, "#FFFF00")
+        self.assertEqual(cards["verde"].cor_atual, coluna.cor_inicial)
+
+        # Uma segunda execução não encontra nada para alterar
+        self.assertEqual(KanbanColumn.recalcular_cores_de_todas(), 0)
+
+    def test_proxima_transicao_do_card(self):
+        # A próxima transição é a metade do prazo para cards novos
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial", prazo_alerta=2)
+        card = KanbanCard.objects.create(lead_nome="Lead Teste", coluna=coluna)
+        self.assertAlmostEqual(card.proxima_transicao, card.data_criacao + timezone.timedelta(hours=1),
+                               delta=timezone.timedelta(seconds=1))
+
+        agora = timezone.now()
+        self.assertEqual(coluna.calcular_proxima_transicao(agora - timezone.timedelta(hours=1.5), agora),
+                         agora + timezone.timedelta(hours=0.5))
+        self.assertIsNone(coluna.calcular_proxima_transicao(agora - timezone.timedelta(hours=3), agora))
+
+    def test_processar_transicoes_vencidas(self):
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial", prazo_alerta=2)
+        vencido = KanbanCard.objects.create(lead_nome="Vencido", coluna=coluna)
+        futuro = KanbanCard.objects.create(lead_nome="Futuro", coluna=coluna)
+        KanbanCard.objects.filter(pk=vencido.pk).update(
+            data_criacao=timezone.now() - timezone.timedelta(hours=1.5),
+            proxima_transicao=timezone.now() - timezone.timedelta(minutes=30),
+        )
+
+        self.assertEqual(KanbanCard.processar_transicoes(), 1)
+
+        vencido.refresh_from_db()
+        futuro.refresh_from_db()
+        self.assertEqual(vencido.cor_atual, "#FFFF00")
+        self.assertAlmostEqual(vencido.proxima_transicao, vencido.data_criacao + timezone.timedelta(hours=2),
+                               delta=timezone.timedelta(seconds=1))
+        self.assertEqual(futuro.cor_atual, coluna.cor_inicial)
+
+    def test_agendador_processa_apenas_cards_vencidos(self):
+        from kanban.agendador import AgendadorTransicoes
+
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial", prazo_alerta=2)
+        card = KanbanCard.objects.create(lead_nome="Lead Teste", coluna=coluna)
+        agendador = AgendadorTransicoes()
+
+        # Antes da metade do prazo nada muda e o agendador espera até a próxima recarga
+        espera = agendador.executar_ciclo(card.data_criacao)
+        self.assertGreater(espera, 0)
+        card.refresh_from_db()
+        self.assertEqual(card.cor_atual, coluna.cor_inicial)
+
+        # Após a metade do prazo o card fica amarelo
+        KanbanCard.objects.filter(pk=card.pk).update(data_criacao=timezone.now() - timezone.timedelta(hours=1, minutes=10),
+                                                     proxima_transicao=timezone.now() - timezone.timedelta(minutes=10))
+        agendador.executar_ciclo(timezone.now() + timezone.timedelta(minutes=1))
+        card.refresh_from_db()
+        self.assertEqual(card.cor_atual, "#FFFF00")
+
+    def test_agendador_recebe_cards_gravados_no_processo(self):
+        from kanban.agendador import AgendadorTransicoes
+
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial", prazo_alerta=1)
+        agendador = AgendadorTransicoes(janela=timezone.timedelta(hours=1), intervalo_recarga=timezone.timedelta(hours=1))
+        agora = timezone.now()
+        agendador.executar_ciclo(agora)
+
+        # O card criado depois da carga entra no heap pelo sinal, sem esperar a recarga
+        with mock.patch('kanban.signals.agendador_transicoes', agendador), \
+                self.captureOnCommitCallbacks(execute=True):
+            card = KanbanCard.objects.create(lead_nome="Lead Teste", coluna=coluna)
+        self.assertIn((card.proxima_transicao, card.id), agendador.heap)
+        self.assertTrue(agendador.despertador.is_set())
+
+        with mock.patch.object(agendador, 'recarregar') as recarregar:
+            espera = agendador.executar_ciclo(card.proxima_transicao + timezone.timedelta(seconds=1))
+        recarregar.assert_not_called()
+        self.assertGreater(espera, 0)
+        card.refresh_from_db()
+        self.assertEqual(card.cor_atual, "#FFFF00")
+
+    def test_agendador_acorda_com_aviso_de_outro_processo(self):
+        from kanban.agendador import AgendadorTransicoes
+        from kanban.tests.utils import cache_em_arquivos
+
+        with cache_em_arquivos():
+            agendador = AgendadorTransicoes(intervalo_verificacao=timezone.timedelta(milliseconds=10))
+            agendador.executar_ciclo()
+
+            AgendadorTransicoes().avisar()
+            inicio = timezone.now()
+            agendador.aguardar(30)
+
+        self.assertLess(timezone.now() - inicio, timezone.timedelta(seconds=5))
+        self.assertIsNone(agendador.proxima_recarga)
+
+    def test_alterar_prazo_da_coluna_reagenda_cards(self):
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial", prazo_alerta=2)
+        card = KanbanCard.objects.create(lead_nome="Lead Teste", coluna=coluna)
+        KanbanCard.objects.filter(pk=card.pk).update(data_criacao=timezone.now() - timezone.timedelta(hours=3))
+
+        coluna.prazo_alerta = 10
+        coluna.save()
+
+        card.refresh_from_db()
+        self.assertEqual(card.cor_atual, coluna.cor_inicial)
+        self.assertAlmostEqual(card.proxima_transicao, card.data_criacao + timezone.timedelta(hours=5),
+                               delta=timezone.timedelta(seconds=1))
+
 
 class KanbanCardModelTest(TestCase):
 
@@ -163,6 +290,52 @@ class KanbanCardModelTest(TestCase):
         except ValidationError:
             self.fail("Erro ao validar campos obrigatórios para um card válido.")
 
+    def test_novos_cards_entram_no_fim_da_coluna(self):
+        cards = [KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.coluna) for i in range(3)]
+        ranks = [card.rank for card in cards]
+        self.assertEqual(ranks, sorted(ranks))
+        self.assertEqual(len(set(ranks)), 3)
+
+    def test_mover_grava_apenas_o_card_movido(self):
+        card1, card2, card3 = [KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.coluna) for i in range(3)]
+        ranks_antes = {card1.id: card1.rank, card2.id: card2.rank}
+
+        card3.mover(self.coluna, anterior_id=card1.id)
+
+        ordem = list(KanbanCard.objects.filter(coluna=self.coluna).order_by('rank', 'id').values_list('id', flat=True))
+        self.assertEqual(ordem, [card1.id, card3.id, card2.id])
+        self.assertEqual(dict(KanbanCard.objects.filter(id__in=ranks_antes).values_list('id', 'rank')), ranks_antes)
+
+    def test_mover_antes_do_seguinte(self):
+        card1, card2, card3 = [KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.coluna) for i in range(3)]
+        KanbanCard.objects.filter(id=card1.id).update(rank='c')
+        KanbanCard.objects.filter(id=card2.id).update(rank='m')
+
+        # O card fica entre o anterior ao seguinte e o seguinte, qualquer que seja o rank do anterior
+        card3.mover(self.coluna, seguinte_id=card2.id)
+
+        ordem = list(KanbanCard.objects.filter(coluna=self.coluna).order_by('rank', 'id').values_list('id', flat=True))
+        self.assertEqual(ordem, [card1.id, card3.id, card2.id])
+
+    def test_mover_com_ranks_empatados_rebalanceia(self):
+        card1, card2, card3 = [KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.coluna) for i in range(3)]
+        KanbanCard.objects.filter(id__in=[card1.id, card2.id]).update(rank='i')
+
+        card3.mover(self.coluna, anterior_id=card1.id, seguinte_id=card2.id)
+
+        ordem = list(KanbanCard.objects.filter(coluna=self.coluna).order_by('rank', 'id').values_list('id', flat=True))
+        self.assertEqual(ordem, [card1.id, card3.id, card2.id])
+
+    def test_rebalancear_ranks_longos(self):
+        card1, card2 = [KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.coluna) for i in range(2)]
+        KanbanCard.objects.filter(id=card2.id).update(rank=card1.rank + 'z' * 40)
+
+        self.assertEqual(KanbanColumn.rebalancear_ranks_longos(tamanho_maximo=32), 1)
+
+        ranks = list(KanbanCard.objects.filter(coluna=self.coluna).order_by('id').values_list('rank', flat=True))
+        self.assertTrue(ranks[0] < ranks[1])
+        self.assertTrue(all(len(rank) <= 2 for rank in ranks))
+
 
 
 
@@ -259,6 +432,43 @@ class CriarKanbanPadraoTest(TestCase):
 
         
 
+    def test_criar_kanbans_padrao_em_lote(self):
+        """
+        Testa se vários Kanbans padrão são criados com um número fixo de consultas.
+        """
+        usuarios = [Usuario.objects.create(username=f"corretor{indice}") for indice in range(10)]
+
+        # Kanbans, colunas e ordens, mais os dois comandos de savepoint do teste
+        with self.assertNumQueries(5):
+            kanbans = criar_kanbans_padrao(usuarios)
+
+        self.assertEqual([kanban.usuario_id for kanban in kanbans], [usuario.id for usuario in usuarios])
+        self.assertEqual(KanbanColumnOrder.objects.filter(kanban__in=kanbans).count(), 80)
+        self.assertEqual(
+            list(kanbans[3].colunas.order_by('posicao').values_list('coluna__nome', flat=True)),
+            [nome for nome, _posicao, _campos in COLUNAS_PADRAO]
+        )
+
+    def test_criar_kanbans_padrao_sem_retorno_de_ids(self):
+        """
+        Testa a criação em bancos que não retornam os IDs de inserções em lote (MySQL).
+        """
+        usuarios = [Usuario.objects.create(username=f"corretor{indice}") for indice in range(2)]
+
+        # Kanbans e sua releitura, colunas, sua releitura e a limpeza do lote, ordens e os dois comandos de savepoint do teste
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), \
+                self.assertNumQueries(8):
+            kanbans = criar_kanbans_padrao(usuarios)
+        self.assertFalse(KanbanColumn.objects.filter(lote__isnull=False).exists())
+
+        for kanban, usuario in zip(kanbans, usuarios):
+            self.assertEqual(Kanban.objects.get(usuario=usuario).pk, kanban.pk)
+            self.assertEqual(
+                list(kanban.colunas.order_by('posicao').values_list('coluna__nome', flat=True)),
+                [nome for nome, _posicao, _campos in COLUNAS_PADRAO]
+            )
+
+
 class KanbanColumnOrderModelTest(TestCase):
 
     @classmethod
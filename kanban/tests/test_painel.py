@@ -0,0 +1,74 @@
+from datetime import timedelta
+from django.db.models.signals import post_save
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from usuario.models import Usuario
+from kanban.models import Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder, NIVEL_ALERTA, NIVEL_ATENCAO
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+
+class PainelGestorTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.admin = Usuario.objects.create(username="gestor", is_staff=True)
+        cls.colunas = {}
+        for nome in ("ana", "bruno"):
+            usuario = Usuario.objects.create(username=nome)
+            kanban = Kanban.objects.create(nome=f"Kanban {nome}", usuario=usuario)
+            for posicao, etapa in enumerate(["Contato Inicial", "Negociação"], start=1):
+                coluna = KanbanColumn.objects.create(nome=etapa, prazo_alerta=2)
+                KanbanColumnOrder.objects.create(kanban=kanban, coluna=coluna, posicao=posicao)
+                cls.colunas[nome, etapa] = coluna
+        cls.usuario = usuario
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def _card(self, usuario, etapa, horas):
+        card = KanbanCard.objects.create(lead_nome=f"Lead {usuario} {horas}h", coluna=self.colunas[usuario, etapa])
+        KanbanCard.objects.filter(pk=card.pk).update(data_criacao=timezone.now() - timedelta(hours=horas))
+        return card
+
+    def test_nivel_alerta_acompanha_a_cor(self):
+        card = self._card("ana", "Contato Inicial", 1)
+        KanbanColumn.recalcular_cores_de_todas()
+        card.refresh_from_db()
+        self.assertEqual((card.nivel_alerta, card.cor_atual), (NIVEL_ATENCAO, "#FFFF00"))
+
+        KanbanCard.objects.filter(pk=card.pk).update(data_criacao=timezone.now() - timedelta(hours=5))
+        KanbanCard.processar_transicoes(agora=timezone.now() + timedelta(hours=1))
+        card.refresh_from_db()
+        self.assertEqual((card.nivel_alerta, card.cor_atual), (NIVEL_ALERTA, "#FF0000"))
+
+    def test_visao_geral(self):
+        self._card("ana", "Contato Inicial", 0)
+        antigo = self._card("ana", "Negociação", 30)
+        recente = self._card("bruno", "Negociação", 5)
+        KanbanColumn.recalcular_cores_de_todas()
+
+        # Uma consulta agrupada para as contagens e uma para os cards urgentes
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('kanban-painel-list'), {'urgentes': 5})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etapas = {etapa['etapa']: (etapa['cards'], etapa['alertas']) for etapa in response.data['etapas']}
+        self.assertEqual(etapas, {"Contato Inicial": (1, 0), "Negociação": (2, 2)})
+
+        ana, bruno = response.data['usuarios']
+        self.assertEqual((ana['usuario'], ana['cards'], ana['alertas']), ("ana", 2, 1))
+        self.assertEqual([coluna['cards'] for coluna in ana['colunas']], [1, 1])
+        self.assertEqual((bruno['usuario'], bruno['cards'], bruno['alertas']), ("bruno", 1, 1))
+
+        urgentes = response.data['urgentes']
+        self.assertEqual([card['id'] for card in urgentes], [antigo.id, recente.id])
+        self.assertEqual((urgentes[0]['usuario'], urgentes[0]['etapa']), ("ana", "Negociação"))
+
+    def test_visao_geral_restrita_a_administradores(self):
+        self.client.force_authenticate(user=self.usuario)
+        response = self.client.get(reverse('kanban-painel-list'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,100 @@
+import time
+from datetime import datetime, timedelta
+import numpy as np
+from django.db.models.signals import post_save
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from imovel.models import Imovel
+from usuario.models import Usuario
+from kanban.models import Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder
+from kanban.rotas import matriz_distancias, otimizar_rota
+from kanban.signals import criar_kanban_ao_criar_usuario
+
+INICIO = datetime(2024, 5, 10, 8)
+
+
+def _parada(id, longitude, horario=None):
+    return {'id': id, 'latitude': 0.0, 'longitude': longitude, 'horario': horario or INICIO, 'fixo': horario is not None}
+
+
+class OtimizacaoRotaTest(SimpleTestCase):
+
+    def test_matriz_distancias(self):
+        # Praça do Ferreira (Fortaleza) até o Marco Zero (Recife): cerca de 630 km em linha reta
+        distancias = matriz_distancias([-3.7275, -8.0631], [-38.5275, -34.8711])
+        self.assertEqual(distancias.shape, (2, 2))
+        self.assertTrue(np.allclose(np.diag(distancias), 0))
+        self.assertAlmostEqual(distancias[0, 1], distancias[1, 0])
+        self.assertTrue(620 < distancias[0, 1] < 640)
+
+    def test_ordem_sem_horarios_fixos(self):
+        paradas = [_parada(id, longitude) for id, longitude in [(1, 0.03), (2, 0.0), (3, 0.02), (4, 0.01)]]
+        rota = otimizar_rota(paradas, INICIO, origem=(0.0, -0.01))
+
+        self.assertEqual([parada['id'] for parada in rota['paradas']], [2, 4, 3, 1])
+        self.assertAlmostEqual(rota['distancia_total_km'], 4.448, places=2)
+
+    def test_respeita_horario_fixo(self):
+        # A visita mais distante tem horário marcado logo no início do dia
+        paradas = [_parada(1, 0.0), _parada(2, 0.01), _parada(3, 0.05, horario=INICIO + timedelta(minutes=30))]
+        rota = otimizar_rota(paradas, INICIO, origem=(0.0, 0.0))
+
+        self.assertEqual([parada['id'] for parada in rota['paradas']], [3, 2, 1])
+        self.assertEqual(rota['paradas'][0]['chegada'], INICIO + timedelta(minutes=30))
+        self.assertEqual(rota['atraso_minutos'], 0)
+
+    def test_cinquenta_paradas_em_milissegundos(self):
+        gerador = np.random.default_rng(42)
+        paradas = [
+            {'id': id, 'latitude': -3.75 + lat, 'longitude': -38.52 + lng, 'horario': INICIO, 'fixo': False}
+            for id, (lat, lng) in enumerate(gerador.uniform(-0.08, 0.08, size=(50, 2)))
+        ]
+        paradas[10].update(fixo=True, horario=INICIO.replace(hour=12))
+
+        tempo = time.perf_counter()
+        rota = otimizar_rota(paradas, INICIO)
+        self.assertLess(time.perf_counter() - tempo, 1)
+        self.assertEqual(len(rota['paradas']), 50)
+        self.assertEqual(rota['atraso_minutos'], 0)
+
+
+class RotaVisitasViewTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+        cls.coluna = KanbanColumn.objects.create(nome="Visita Agendada")
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.coluna, posicao=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+
+    def _visita(self, hora, longitude=None, **dados):
+        imovel = Imovel.objects.create(
+            nome=f"Imóvel {hora}", bairro="Centro", cidade="Fortaleza", estado="CE", cep="60000-000",
+            tipo_imovel="casa", numero_registro=str(hora), latitude=0 if longitude is not None else None,
+            longitude=longitude,
+        )
+        return KanbanCard.objects.create(lead_nome=f"Lead {hora}", coluna=self.coluna, imovel=imovel,
+                                         data_visita=INICIO.replace(hour=hora), dados_adicionais=dados)
+
+    def test_rota_do_dia(self):
+        distante = self._visita(8, longitude=0.05)
+        proxima = self._visita(10, longitude=0.0)
+        fixa = self._visita(15, longitude=0.02, horario_fixo=True)
+        sem_coordenadas = self._visita(12)
+
+        response = self.client.get(reverse('kanban-card-rota'), {'data': '2024-05-10', 'origem_lat': 0, 'origem_lng': 0})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([parada['id'] for parada in response.data['paradas']], [proxima.id, fixa.id, distante.id])
+        self.assertEqual(response.data['paradas'][1]['chegada'], INICIO.replace(hour=15))
+        self.assertEqual(response.data['sem_coordenadas'], [sem_coordenadas.id])
+
+    def test_rota_exige_data(self):
+        response = self.client.get(reverse('kanban-card-rota'), {'data': '10/05/2024'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -301,7 +301,7 @@ class KanbanCardSerializerTest(APITestCase):
         # Campos esperados no serializer
         expected_fields = {
             'id', 'lead_nome', 'descricao', 'data_criacao', 'ultima_atualizacao',
-            'data_prazo', 'cor_atual', 'dados_adicionais', 'coluna'
+            'data_prazo', 'cor_atual', 'dados_adicionais', 'coluna', 'data_visita', 'imovel'
         }
         self.assertEqual(set(data.keys()), expected_fields)
 
@@ -0,0 +1,130 @@
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save
+from django.test import TestCase
+from usuario.models import Usuario
+from kanban.models import Kanban, KanbanCard, KanbanColumn, KanbanColumnOrder, KanbanMovimentacao
+from kanban.serializers import KanbanCardSerializer, KanbanColumnSerializer
+from kanban.signals import criar_kanban_ao_criar_usuario
+from kanban.validacao import compilar_regras, obter_validador
+
+
+class ValidacaoColunaTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+        cls.contato = KanbanColumn.objects.create(nome="Contato Inicial")
+        cls.proposta = KanbanColumn.objects.create(
+            nome="Proposta",
+            meta_dados={
+                "campos_obrigatorios": {"descricao": "Resumo da proposta"},
+                "regras": {
+                    "dados_adicionais.valor": {"tipo": "numero", "min": 1000, "obrigatorio": True},
+                    "dados_adicionais.forma_pagamento": {"tipo": "texto", "opcoes": ["À vista", "Financiamento"]},
+                },
+            },
+        )
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.contato, posicao=1)
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.proposta, posicao=2)
+
+    def _card(self, **campos):
+        return KanbanCard.objects.create(lead_nome="Lead", coluna=self.contato, **campos)
+
+    def test_regras_de_tipo_e_valor(self):
+        validador = compilar_regras(self.proposta.meta_dados)
+        card = KanbanCard(descricao="Apartamento", dados_adicionais={"valor": "alto", "forma_pagamento": "Permuta"})
+
+        erros = validador.erros(card)
+        self.assertIn("O campo 'dados_adicionais.valor' deve ser do tipo numero.", erros)
+        self.assertIn("O campo 'dados_adicionais.forma_pagamento' deve ser um de: À vista, Financiamento.", erros)
+
+        card.dados_adicionais = {"valor": 500}
+        self.assertEqual(validador.erros(card), ["O campo 'dados_adicionais.valor' deve ser no mínimo 1000."])
+
+        card.dados_adicionais = {"valor": 350000, "forma_pagamento": "Financiamento"}
+        self.assertEqual(validador.erros(card), [])
+
+    def test_campos_obrigatorios_mantem_mensagem(self):
+        card = self._card(dados_adicionais={"valor": 350000})
+        with self.assertRaises(ValidationError) as contexto:
+            card.validar_e_associar_coluna(self.proposta)
+        self.assertEqual(contexto.exception.messages,
+                         ["O campo 'descricao' (Resumo da proposta) é obrigatório para esta coluna."])
+
+    def test_regras_invalidas(self):
+        with self.assertRaises(ValidationError):
+            compilar_regras({"regras": {"valor": {"tipo": "moeda"}}})
+
+    def test_valores_das_regras_invalidos(self):
+        for regra in ({"opcoes": 5}, {"opcoes": "Site"}, {"min": "0"}, {"max": "10"}, {"max": True},
+                      {"max_tamanho": None}, {"max_tamanho": -1}, {"max_tamanho": 2.5}):
+            with self.subTest(regra=regra), self.assertRaises(ValidationError):
+                compilar_regras({"regras": {"valor": regra}})
+
+    def test_validador_compilado_uma_vez_por_versao(self):
+        coluna = KanbanColumn.objects.get(pk=self.proposta.pk)
+        validador = obter_validador(coluna)
+        self.assertIs(obter_validador(KanbanColumn.objects.get(pk=self.proposta.pk)), validador)
+
+        coluna.meta_dados = {"regras": {"descricao": {"max_tamanho": 5}}}
+        coluna.save()
+        self.assertIsNot(obter_validador(coluna), validador)
+        self.assertEqual(obter_validador(coluna).erros(KanbanCard(descricao="Muito longa")),
+                         ["O campo 'descricao' deve ter no máximo 5 caracteres."])
+
+    def test_mover_em_lote_reporta_todos_os_erros(self):
+        valido = self._card(descricao="Casa", dados_adicionais={"valor": 200000})
+        sem_valor = self._card(descricao="Terreno")
+        sem_descricao = self._card(dados_adicionais={"valor": 90000})
+
+        with self.assertRaises(ValidationError) as contexto:
+            KanbanCard.mover_em_lote([valido.id, sem_valor.id, sem_descricao.id], self.proposta)
+        self.assertEqual(set(contexto.exception.message_dict), {str(sem_valor.id), str(sem_descricao.id)})
+        # Nenhum card é movido quando o lote tem erros
+        self.assertEqual(KanbanCard.objects.filter(coluna=self.proposta).count(), 0)
+
+    def test_mover_em_lote(self):
+        primeiro = self._card(descricao="Casa", dados_adicionais={"valor": 200000})
+        segundo = self._card(descricao="Sala", dados_adicionais={"valor": 150000})
+
+        KanbanCard.mover_em_lote([segundo.id, primeiro.id], self.proposta)
+
+        ids = list(KanbanCard.objects.filter(coluna=self.proposta).order_by('rank').values_list('id', flat=True))
+        self.assertEqual(ids, [segundo.id, primeiro.id])
+        self.assertEqual(KanbanMovimentacao.objects.filter(coluna=self.proposta, kanban=self.kanban).count(), 2)
+
+    def test_mover_em_lote_para_outro_kanban(self):
+        outro = Kanban.objects.create(nome="Outro", usuario=Usuario.objects.create(username="outro"))
+        coluna = KanbanColumn.objects.create(nome="Contato Inicial")
+        KanbanColumnOrder.objects.create(kanban=outro, coluna=coluna, posicao=1)
+
+        with self.assertRaises(ValidationError):
+            KanbanCard.mover_em_lote([self._card().id], coluna)
+
+    def test_serializer_valida_coluna_de_destino(self):
+        card = self._card(descricao="Casa")
+        serializer = KanbanCardSerializer(card, data={"coluna": self.proposta.id}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors["coluna"], ["O campo 'dados_adicionais.valor' é obrigatório para esta coluna."])
+
+        serializer = KanbanCardSerializer(
+            card, data={"coluna": self.proposta.id, "dados_adicionais": {"valor": 200000}}, partial=True
+        )
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_serializer_da_coluna_rejeita_regras_invalidas(self):
+        serializer = KanbanColumnSerializer(data={
+            "nome": "Nova", "prazo_alerta": 1, "cor_inicial": "#FFF", "cor_alerta": "#F00",
+            "meta_dados": {"regras": {"valor": {"tipo": "moeda"}}},
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("meta_dados", serializer.errors)
+
+        serializer = KanbanColumnSerializer(data={
+            "nome": "Nova", "prazo_alerta": 1, "cor_inicial": "#FFF", "cor_alerta": "#F00",
+            "meta_dados": {"regras": {"valor": {"opcoes": 5}}},
+        })
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("meta_dados", serializer.errors)
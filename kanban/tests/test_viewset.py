@@ -4,9 +4,13 @@ from rest_framework import status
 from django.urls import reverse
 from kanban.models import Kanban, KanbanColumnOrder, KanbanCard, KanbanColumn
 from kanban.views import KanbanViewSet
+from kanban.tests.utils import cache_em_arquivos
+from imovel.models import Imovel
 from django.contrib.auth import get_user_model
 from kanban.signals import criar_kanban_ao_criar_usuario
 from django.db.models.signals import post_save
+from django.utils import timezone
+from datetime import timedelta, timezone as dt_timezone
 
 User = get_user_model()
 
@@ -97,6 +101,332 @@ class KanbanViewSetTest(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_colunas_e_cards_numero_de_consultas(self):
+        """
+        Testa se o snapshot do Kanban usa um número fixo de consultas, independente da quantidade de cards.
+        """
+        for indice in range(20):
+            KanbanCard.objects.create(lead_nome=f"Lead extra {indice}", coluna=self.coluna1 if indice % 2 else self.coluna2)
+
+        url = reverse('kanban-colunas-e-cards', kwargs={'pk': self.usuario.id})
+        # usuário, kanban, colunas e cards
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @cache_em_arquivos()
+    def test_colunas_e_cards_em_cache(self):
+        """
+        Testa se a resposta fica em cache até a próxima gravação no Kanban, inclusive as feitas em lote.
+        """
+        url = reverse('kanban-colunas-e-cards', kwargs={'pk': self.usuario.id})
+        primeira = self.client.get(url)
+        # Apenas a consulta do Kanban do usuário; o quadro vem do cache
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['colunas'][0]['cards']), 1)
+        # O cursor é calculado a cada requisição, fora da resposta em cache
+        self.assertGreater(response.data['cursor'], primeira.data['cursor'])
+
+        novo = KanbanCard.objects.create(lead_nome="Lead 3", coluna=self.coluna1)
+        response = self.client.get(url)
+        self.assertEqual([card['id'] for card in response.data['colunas'][0]['cards']], [self.card1.id, novo.id])
+
+        KanbanCard.objects.filter(pk=novo.pk).update(data_criacao=timezone.now() - timedelta(days=30))
+        KanbanColumn.recalcular_cores_de_todas()
+        response = self.client.get(url)
+        self.assertEqual(response.data['colunas'][0]['cards'][1]['cor_atual'], self.coluna1.cor_alerta)
+
+    def test_colunas_e_cards_sem_cache_compartilhado(self):
+        """
+        Testa se, com um cache local ao processo, a resposta é montada a cada requisição, pois as
+        gravações feitas por outros processos não avançariam a versão lida por este.
+        """
+        url = reverse('kanban-colunas-e-cards', kwargs={'pk': self.usuario.id})
+        self.client.get(url)
+        # Gravação que não passa pela invalidação, como a de outro processo
+        KanbanCard.objects.filter(pk=self.card1.pk).update(lead_nome="Lead Renomeado")
+        response = self.client.get(url)
+        self.assertEqual(response.data['colunas'][0]['cards'][0]['lead_nome'], "Lead Renomeado")
+
+    @cache_em_arquivos()
+    def test_retrieve_kanban_em_cache(self):
+        url = reverse('kanban-detail', kwargs={'pk': self.usuario.id})
+        self.client.get(url)
+        with self.assertNumQueries(1):
+            self.client.get(url)
+
+        self.kanban.nome = "Kanban Renomeado"
+        self.kanban.save()
+        self.assertEqual(self.client.get(url).data['nome'], "Kanban Renomeado")
+
+    def test_colunas_e_cards_paginacao(self):
+        """
+        Testa se cada coluna é limitada ao `limite` informado e se `mais_cards` continua a partir do cursor.
+        """
+        extras = [KanbanCard.objects.create(lead_nome=f"Lead extra {indice}", coluna=self.coluna1) for indice in range(4)]
+
+        url = reverse('kanban-colunas-e-cards', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'limite': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        coluna1_data = response.data['colunas'][0]
+        self.assertEqual([card['id'] for card in coluna1_data['cards']], [self.card1.id, extras[0].id])
+        self.assertEqual(coluna1_data['proximo_cursor'], f"{extras[0].rank}:{extras[0].id}")
+        self.assertIsNone(response.data['colunas'][1]['proximo_cursor'])
+
+        url = reverse('kanban-mais-cards', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'coluna': self.coluna1.id, 'cursor': coluna1_data['proximo_cursor'], 'limite': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([card['id'] for card in response.data['cards']], [extras[1].id, extras[2].id])
+
+        response = self.client.get(url, {'coluna': self.coluna1.id, 'cursor': response.data['proximo_cursor'], 'limite': 2})
+        self.assertEqual([card['id'] for card in response.data['cards']], [extras[3].id])
+        self.assertIsNone(response.data['proximo_cursor'])
+
+    def test_mais_cards_coluna_de_outro_kanban(self):
+        """
+        Testa se `mais_cards` recusa colunas que não pertencem ao Kanban do usuário.
+        """
+        coluna_avulsa = KanbanColumn.objects.create(nome="Coluna avulsa")
+        url = reverse('kanban-mais-cards', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'coluna': coluna_avulsa.id})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+    def test_alteracoes_sem_mudancas(self):
+        """
+        Testa se `alteracoes` retorna apenas o cursor quando nada mudou, com um número fixo de consultas.
+        """
+        url = reverse('kanban-alteracoes', kwargs={'pk': self.usuario.id})
+        desde = timezone.now()
+        # kanban, colunas, cards e remoções
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {'since': desde.isoformat()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['completo'])
+        self.assertEqual(response.data['colunas'], [])
+        self.assertEqual(response.data['cards'], [])
+        self.assertEqual(response.data['removidos'], {'card': [], 'coluna': []})
+
+    def test_alteracoes_cards_e_colunas(self):
+        """
+        Testa se `alteracoes` retorna os cards alterados, as colunas editadas e os cards removidos.
+        """
+        desde = timezone.now()
+        self.card1.descricao = "Descrição alterada"
+        self.card1.save()
+        self.coluna2.nome = "Coluna renomeada"
+        self.coluna2.save()
+        novo = KanbanCard.objects.create(lead_nome="Lead novo", coluna=self.coluna2)
+        novo_id = novo.id
+        novo.delete()
+
+        url = reverse('kanban-alteracoes', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'since': desde.isoformat()})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([card['id'] for card in response.data['cards']], [self.card1.id])
+        self.assertEqual(response.data['cards'][0]['descricao'], "Descrição alterada")
+        self.assertEqual([coluna['id'] for coluna in response.data['colunas']], [self.coluna2.id])
+        self.assertEqual(response.data['removidos']['card'], [novo_id])
+
+    def test_alteracoes_estrutura_do_kanban(self):
+        """
+        Testa se a remoção de uma coluna devolve todas as colunas e registra a coluna removida.
+        """
+        coluna3 = KanbanColumn.objects.create(nome="Coluna 3")
+        KanbanColumnOrder.adicionar_e_reordenar(self.kanban, coluna3, 3)
+        coluna3_id = coluna3.id
+        desde = timezone.now()
+        KanbanColumnOrder.remover_coluna(self.kanban, coluna3)
+
+        url = reverse('kanban-alteracoes', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'since': desde.isoformat()})
+
+        self.assertEqual([coluna['id'] for coluna in response.data['colunas']], [self.coluna1.id, self.coluna2.id])
+        self.assertEqual(response.data['removidos']['coluna'], [coluna3_id])
+
+    def test_alteracoes_cursor_expirado(self):
+        url = reverse('kanban-alteracoes', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'since': (timezone.now() - timedelta(days=30)).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.data['completo'])
+
+    def test_alteracoes_since_com_fuso_horario(self):
+        """
+        Testa se um `since` com fuso horário é convertido para o horário local usado pelo banco.
+        """
+        url = reverse('kanban-alteracoes', kwargs={'pk': self.usuario.id})
+        desde = timezone.make_aware(timezone.now() - timedelta(minutes=1)).astimezone(dt_timezone.utc)
+        novo = KanbanCard.objects.create(lead_nome="Lead 3", coluna=self.coluna1)
+
+        response = self.client.get(url, {'since': desde.isoformat().replace('+00:00', 'Z')})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(novo.id, [card['id'] for card in response.data['cards']])
+
+    def test_alteracoes_since_invalido(self):
+        url = reverse('kanban-alteracoes', kwargs={'pk': self.usuario.id})
+        response = self.client.get(url, {'since': 'ontem'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class KanbanCardViewSetTest(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        post_save.disconnect(criar_kanban_ao_criar_usuario, sender=Usuario)
+        cls.usuario = Usuario.objects.create(username="testuser", password="testpassword")
+        cls.kanban = Kanban.objects.create(nome="Kanban Teste", usuario=cls.usuario)
+
+        cls.coluna1 = KanbanColumn.objects.create(nome="Contato Inicial")
+        cls.coluna2 = KanbanColumn.objects.create(
+            nome="Visita ao Imóvel",
+            meta_dados={"campos_obrigatorios": {"data_visita": "Data e hora da visita agendada"}}
+        )
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.coluna1, posicao=1)
+        KanbanColumnOrder.objects.create(kanban=cls.kanban, coluna=cls.coluna2, posicao=2)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.usuario)
+        self.cards = [KanbanCard.objects.create(lead_nome=f"Lead {i}", coluna=self.coluna1) for i in range(3)]
+
+    def _ordem(self, coluna):
+        return list(KanbanCard.objects.filter(coluna=coluna).order_by('rank', 'id').values_list('id', flat=True))
+
+    def test_mover_dentro_da_coluna(self):
+        card1, card2, card3 = self.cards
+        url = reverse('kanban-card-mover', kwargs={'pk': card3.id})
+        response = self.client.post(url, {'coluna_id': self.coluna1.id, 'anterior_id': card1.id, 'seguinte_id': card2.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._ordem(self.coluna1), [card1.id, card3.id, card2.id])
+
+    def test_mover_para_o_inicio(self):
+        card1, card2, card3 = self.cards
+        url = reverse('kanban-card-mover', kwargs={'pk': card3.id})
+        response = self.client.post(url, {'coluna_id': self.coluna1.id, 'seguinte_id': card1.id})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._ordem(self.coluna1), [card3.id, card1.id, card2.id])
+
+    def test_mover_valida_campos_da_coluna(self):
+        # A coluna de destino exige `data_visita`; o card não é alterado
+        card = self.cards[0]
+        url = reverse('kanban-card-mover', kwargs={'pk': card.id})
+        response = self.client.post(url, {'coluna_id': self.coluna2.id})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        card.refresh_from_db()
+        self.assertEqual(card.coluna_id, self.coluna1.id)
+
+    def test_buscar_por_nome_telefone_e_email(self):
+        card = KanbanCard.objects.create(
+            lead_nome="José da Silva",
+            coluna=self.coluna1,
+            contato={"telefone": "+55 (85) 99999-1234", "email": "Jose.Silva@Example.com"},
+        )
+        url = reverse('kanban-card-buscar')
+
+        for termo in ["jose d", "JOSÉ", "(85) 99999-1234", "jose.silva@example.com"]:
+            response = self.client.get(url, {'q': termo, 'kanban_id': self.kanban.id})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual([item['id'] for item in response.data], [card.id], termo)
+
+        # O nome é buscado pelo início; telefones e e-mails precisam ser exatos
+        for termo in ["silva", "99999-12", "jose.silva@"]:
+            response = self.client.get(url, {'q': termo, 'kanban_id': self.kanban.id})
+            self.assertEqual(response.data, [], termo)
+
+    def test_buscar_restrito_ao_kanban(self):
+        coluna_avulsa = KanbanColumn.objects.create(nome="Coluna avulsa")
+        KanbanCard.objects.create(lead_nome="Lead de outro Kanban", coluna=coluna_avulsa)
+        url = reverse('kanban-card-buscar')
+
+        response = self.client.get(url, {'q': 'lead', 'kanban_id': self.kanban.id})
+        self.assertEqual([item['id'] for item in response.data], [card.id for card in self.cards])
+
+        # Sem `kanban_id`, apenas administradores podem buscar
+        response = self.client.get(url, {'q': 'lead'})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_mover_para_coluna_de_outro_kanban(self):
+        coluna_avulsa = KanbanColumn.objects.create(nome="Coluna avulsa")
+        url = reverse('kanban-card-mover', kwargs={'pk': self.cards[0].id})
+        response = self.client.post(url, {'coluna_id': coluna_avulsa.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_mover_com_referencia_de_outra_coluna(self):
+        outro = KanbanCard.objects.create(lead_nome="Outro", coluna=self.coluna2, data_visita="2024-12-31T10:00:00")
+        url = reverse('kanban-card-mover', kwargs={'pk': self.cards[0].id})
+        response = self.client.post(url, {'coluna_id': self.coluna1.id, 'anterior_id': outro.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_mover_em_lote_com_resultado_por_card(self):
+        card1, card2, card3 = self.cards
+        KanbanCard.objects.filter(pk=card2.pk).update(data_visita="2024-12-31T10:00:00")
+        response = self.client.post(reverse('kanban-card-em-lote'), {
+            'kanban_id': self.kanban.id, 'operacao': 'mover', 'coluna_id': self.coluna2.id,
+            'card_ids': [card1.id, card2.id, card3.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['sucessos'], response.data['falhas']), (1, 2))
+        self.assertEqual([resultado['sucesso'] for resultado in response.data['resultados']], [False, True, False])
+        self.assertEqual(self._ordem(self.coluna2), [card2.id])
+
+    def test_arquivar_em_lote(self):
+        inativos = KanbanColumn.objects.create(nome="Inativos")
+        KanbanColumnOrder.objects.create(kanban=self.kanban, coluna=inativos, posicao=3)
+        card_avulso = KanbanCard.objects.create(lead_nome="Avulso", coluna=KanbanColumn.objects.create(nome="Avulsa"))
+
+        response = self.client.post(reverse('kanban-card-em-lote'), {
+            'kanban_id': self.kanban.id, 'operacao': 'arquivar',
+            'card_ids': [card.id for card in self.cards] + [card_avulso.id],
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._ordem(inativos), [card.id for card in self.cards])
+        self.assertEqual(response.data['resultados'][-1]['erros'], ["Card não encontrado neste Kanban."])
+
+    def test_associar_imovel_em_lote(self):
+        imovel = Imovel.objects.create(
+            nome='Casa de Praia', endereco='Rua do Sol, 123', bairro='Beira Mar', cidade='Fortaleza', estado='CE',
+            cep='60000-000', area_total=150.00, area_util=130.00, tipo_imovel='casa', num_quartos=4,
+            num_banheiros=3, num_vagas_garagem=2, ano_construcao=2018, latitude=-3.71722, longitude=-38.5434,
+            status='disponivel', tipo_construcao='novo', numero_registro='12345ABC'
+        )
+        url = reverse('kanban-card-em-lote')
+        dados = {'kanban_id': self.kanban.id, 'operacao': 'imovel', 'card_ids': [card.id for card in self.cards]}
+
+        response = self.client.post(url, {**dados, 'imovel_id': imovel.id}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(KanbanCard.objects.filter(imovel=imovel).count(), 3)
+
+        response = self.client.post(url, {**dados, 'imovel_id': None}, format='json')
+        self.assertEqual(KanbanCard.objects.filter(imovel__isnull=True).count(), 3)
+
+    def test_operacao_em_lote_invalida(self):
+        response = self.client.post(reverse('kanban-card-em-lote'), {
+            'kanban_id': self.kanban.id, 'operacao': 'excluir', 'card_ids': [self.cards[0].id],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_operacao_em_lote_com_ids_invalidos(self):
+        url = reverse('kanban-card-em-lote')
+        dados = {'kanban_id': self.kanban.id, 'operacao': 'mover', 'coluna_id': self.coluna2.id,
+                 'card_ids': [self.cards[0].id]}
+
+        for campo, valor in (('kanban_id', 'abc'), ('coluna_id', 'abc'), ('coluna_id', None), ('kanban_id', [1])):
+            response = self.client.post(url, {**dados, campo: valor}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, (campo, valor))
+
+        response = self.client.post(url, {**dados, 'operacao': 'imovel', 'imovel_id': 'abc'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(KanbanCard.objects.get(pk=self.cards[0].pk).coluna_id, self.coluna1.id)
+
 
 class KanbanColumnViewSetTest(APITestCase):
     @classmethod
@@ -249,6 +579,54 @@ class KanbanColumnOrderViewSetTest(APITestCase):
         self.assertEqual(response.data[0]['coluna_id'], self.kanban_column_1.id)
         self.assertEqual(response.data[0]['posicao'], self.kanban_column_order_1.posicao)
 
+    def test_reordenar_colunas(self):
+        """
+        Testa a aplicação da ordem completa das colunas com a versão atual do Kanban.
+        """
+        self.kanban.refresh_from_db()
+        data = {
+            'kanban_id': self.kanban.id,
+            'colunas': [self.kanban_column_2.id, self.kanban_column_1.id],
+            'versao': self.kanban.ultima_atualizacao.isoformat(),
+        }
+        url = reverse('kanbancolumnorder-reordenar')
+        # kanban, versão, leitura bloqueada, bulk_update e listagem, mais os dois comandos de savepoint do teste
+        with self.assertNumQueries(7):
+            response = self.client.put(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([coluna['coluna_id'] for coluna in response.data['colunas']],
+                         [self.kanban_column_2.id, self.kanban_column_1.id])
+        self.assertGreater(response.data['versao'], self.kanban.ultima_atualizacao)
+
+    def test_reordenar_colunas_versao_desatualizada(self):
+        """
+        Testa se uma reordenação feita sobre uma versão antiga do Kanban é rejeitada.
+        """
+        self.kanban.refresh_from_db()
+        versao = self.kanban.ultima_atualizacao.isoformat()
+        url = reverse('kanbancolumnorder-reordenar')
+        data = {'kanban_id': self.kanban.id, 'colunas': [self.kanban_column_2.id, self.kanban_column_1.id], 'versao': versao}
+        self.assertEqual(self.client.put(url, data, format='json').status_code, status.HTTP_200_OK)
+
+        data['colunas'] = [self.kanban_column_1.id, self.kanban_column_2.id]
+        response = self.client.put(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            list(KanbanColumnOrder.objects.filter(kanban=self.kanban).values_list('coluna_id', flat=True)),
+            [self.kanban_column_2.id, self.kanban_column_1.id]
+        )
+
+    def test_reordenar_colunas_lista_incompleta(self):
+        self.kanban.refresh_from_db()
+        data = {
+            'kanban_id': self.kanban.id,
+            'colunas': [self.kanban_column_1.id],
+            'versao': self.kanban.ultima_atualizacao.isoformat(),
+        }
+        response = self.client.put(reverse('kanbancolumnorder-reordenar'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_listar_cards(self):
         """
         Testa a listagem de todos os cards de uma coluna específica.
@@ -0,0 +1,17 @@
+import tempfile
+from contextlib import contextmanager
+from django.test import override_settings
+
+
+@contextmanager
+def cache_em_arquivos():
+    """
+    Usa um cache em arquivos temporários, compartilhado entre processos como o Redis ou o
+    Memcached de produção, para os testes que dependem das respostas guardadas em cache.
+    """
+    with tempfile.TemporaryDirectory() as diretorio:
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': diretorio,
+        }}):
+            yield
@@ -1,14 +1,19 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from kanban.views import KanbanViewSet, KanbanColumnViewSet, KanbanColumnOrderViewSet
+from kanban.views import KanbanViewSet, KanbanColumnViewSet, KanbanCardViewSet, KanbanCardArquivadoViewSet, KanbanColumnOrderViewSet, FunilKanbanViewSet, PainelGestorViewSet, eventos_kanban
 
 # Criação do roteador do Django Rest Framework
 router = DefaultRouter()
 router.register(r'kanban', KanbanViewSet, basename='kanban')
 router.register(r'colunas', KanbanColumnViewSet, basename='kanban-column')
+router.register(r'cards', KanbanCardViewSet, basename='kanban-card')
+router.register(r'cards-arquivados', KanbanCardArquivadoViewSet, basename='kanban-card-arquivado')
 router.register(r'kanbancolumnorder', KanbanColumnOrderViewSet, basename='kanbancolumnorder')
+router.register(r'funil', FunilKanbanViewSet, basename='kanban-funil')
+router.register(r'painel', PainelGestorViewSet, basename='kanban-painel')
 
 # URL patterns, incluindo as rotas do roteador
 urlpatterns = [
+    path('kanban/<int:pk>/eventos/', eventos_kanban, name='kanban-eventos'),
     path('', include(router.urls)),
 ]
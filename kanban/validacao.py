@@ -0,0 +1,190 @@
+"""
+Validação dos cards do Kanban a partir das regras de `KanbanColumn.meta_dados`.
+
+As regras de uma coluna são compiladas uma vez por versão da coluna (`id` e
+`ultima_atualizacao`) em um `ValidadorColuna`, mantido em cache no processo. O validador
+confere um card ou um lote inteiro de cards, reunindo todos os erros em uma única passada.
+
+Formato aceito em `meta_dados`:
+
+    {
+        "campos_obrigatorios": {"data_visita": "Data e hora da visita agendada"},
+        "regras": {
+            "valor_final": {"tipo": "numero", "min": 0, "obrigatorio": true},
+            "dados_adicionais.origem": {"tipo": "texto", "opcoes": ["Site", "Indicação"]}
+        }
+    }
+
+Campos com o prefixo `dados_adicionais.` são lidos do JSON de dados adicionais do card.
+"""
+from datetime import date
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.utils.dateparse import parse_date, parse_datetime
+
+PREFIXO_DADOS_ADICIONAIS = 'dados_adicionais.'
+
+TIPOS = ('texto', 'numero', 'data', 'booleano')
+
+# Quantidade máxima de versões de colunas mantidas em cache
+TAMANHO_CACHE = 1024
+
+_cache_validadores = {}
+
+
+def _vazio(valor):
+    return valor is None or valor == '' or valor == [] or valor == {}
+
+
+def _leitor(campo):
+    if campo.startswith(PREFIXO_DADOS_ADICIONAIS):
+        chave = campo[len(PREFIXO_DADOS_ADICIONAIS):]
+        return lambda card: (card.dados_adicionais or {}).get(chave) if isinstance(card.dados_adicionais, dict) else None
+    return lambda card: getattr(card, campo, None)
+
+
+def _eh_numero(valor):
+    return isinstance(valor, (int, float, Decimal)) and not isinstance(valor, bool)
+
+
+def _eh_data(valor):
+    if isinstance(valor, date):
+        return True
+    if isinstance(valor, str):
+        try:
+            return parse_datetime(valor) is not None or parse_date(valor) is not None
+        except ValueError:
+            return False
+    return False
+
+
+VERIFICACOES_TIPO = {
+    'texto': lambda valor: isinstance(valor, str),
+    'numero': _eh_numero,
+    'data': _eh_data,
+    'booleano': lambda valor: isinstance(valor, bool),
+}
+
+
+def _compilar_regra(campo, regra):
+    """Retorna a lista de verificações (funções valor -> mensagem ou None) de um campo."""
+    if not isinstance(regra, dict):
+        raise ValidationError(f"A regra do campo '{campo}' deve ser um objeto.")
+    tipo = regra.get('tipo')
+    if tipo is not None and tipo not in TIPOS:
+        raise ValidationError(f"Tipo '{tipo}' inválido para o campo '{campo}'. Use um de: {', '.join(TIPOS)}.")
+
+    if 'opcoes' in regra and not isinstance(regra['opcoes'], list):
+        raise ValidationError(f"As opções do campo '{campo}' devem ser uma lista.")
+    for limite in ('min', 'max'):
+        if limite in regra and not _eh_numero(regra[limite]):
+            raise ValidationError(f"O valor de '{limite}' do campo '{campo}' deve ser um número.")
+    if 'max_tamanho' in regra and not (
+        isinstance(regra['max_tamanho'], int) and not isinstance(regra['max_tamanho'], bool) and regra['max_tamanho'] >= 0
+    ):
+        raise ValidationError(f"O valor de 'max_tamanho' do campo '{campo}' deve ser um inteiro não negativo.")
+
+    verificacoes = []
+    if tipo is not None:
+        verificar_tipo = VERIFICACOES_TIPO[tipo]
+        verificacoes.append(
+            lambda valor: None if verificar_tipo(valor) else f"O campo '{campo}' deve ser do tipo {tipo}."
+        )
+    if 'opcoes' in regra:
+        opcoes = list(regra['opcoes'])
+        verificacoes.append(
+            lambda valor: None if valor in opcoes else f"O campo '{campo}' deve ser um de: {', '.join(map(str, opcoes))}."
+        )
+    if 'min' in regra:
+        minimo = regra['min']
+        verificacoes.append(
+            lambda valor: None if not _eh_numero(valor) or valor >= minimo else f"O campo '{campo}' deve ser no mínimo {minimo}."
+        )
+    if 'max' in regra:
+        maximo = regra['max']
+        verificacoes.append(
+            lambda valor: None if not _eh_numero(valor) or valor <= maximo else f"O campo '{campo}' deve ser no máximo {maximo}."
+        )
+    if 'max_tamanho' in regra:
+        tamanho = regra['max_tamanho']
+        verificacoes.append(
+            lambda valor: None if not isinstance(valor, str) or len(valor) <= tamanho
+            else f"O campo '{campo}' deve ter no máximo {tamanho} caracteres."
+        )
+    return verificacoes
+
+
+class ValidadorColuna:
+    """
+    Regras compiladas de uma coluna: para cada campo, o leitor do valor, a mensagem de
+    obrigatoriedade e as verificações de tipo e de valor.
+    """
+
+    def __init__(self, regras):
+        self.regras = regras
+
+    def erros(self, card):
+        erros = []
+        for leitor, mensagem_obrigatorio, verificacoes in self.regras:
+            valor = leitor(card)
+            if _vazio(valor):
+                if mensagem_obrigatorio:
+                    erros.append(mensagem_obrigatorio)
+                continue
+            for verificacao in verificacoes:
+                erro = verificacao(valor)
+                if erro:
+                    erros.append(erro)
+        return erros
+
+    def validar(self, card):
+        erros = self.erros(card)
+        if erros:
+            raise ValidationError(erros)
+
+    def erros_em_lote(self, cards):
+        """Retorna um dicionário ID do card -> lista de erros, apenas com os cards inválidos."""
+        resultado = {}
+        for card in cards:
+            erros = self.erros(card)
+            if erros:
+                resultado[card.pk] = erros
+        return resultado
+
+
+def compilar_regras(meta_dados):
+    """Compila as regras de `meta_dados` em um `ValidadorColuna`. Lança ValidationError se forem inválidas."""
+    meta_dados = meta_dados if isinstance(meta_dados, dict) else {}
+    obrigatorios = meta_dados.get('campos_obrigatorios') or {}
+    regras = meta_dados.get('regras') or {}
+    if not isinstance(obrigatorios, dict) or not isinstance(regras, dict):
+        raise ValidationError("`campos_obrigatorios` e `regras` devem ser objetos.")
+
+    compiladas = []
+    for campo in list(obrigatorios) + [campo for campo in regras if campo not in obrigatorios]:
+        regra = regras.get(campo, {})
+        verificacoes = _compilar_regra(campo, regra)
+        mensagem_obrigatorio = None
+        if campo in obrigatorios:
+            mensagem_obrigatorio = f"O campo '{campo}' ({obrigatorios[campo]}) é obrigatório para esta coluna."
+        elif regra.get('obrigatorio'):
+            mensagem_obrigatorio = f"O campo '{campo}' é obrigatório para esta coluna."
+        compiladas.append((_leitor(campo), mensagem_obrigatorio, verificacoes))
+    return ValidadorColuna(compiladas)
+
+
+def obter_validador(coluna):
+    """Retorna o validador compilado da coluna, reaproveitando o cache enquanto a coluna não mudar."""
+    if coluna.pk is None:
+        return compilar_regras(coluna.meta_dados)
+
+    versao = coluna.ultima_atualizacao
+    em_cache = _cache_validadores.get(coluna.pk)
+    if em_cache is not None and em_cache[0] == versao:
+        return em_cache[1]
+
+    validador = compilar_regras(coluna.meta_dados)
+    if len(_cache_validadores) >= TAMANHO_CACHE:
+        _cache_validadores.clear()
+    _cache_validadores[coluna.pk] = (versao, validador)
+    return validador
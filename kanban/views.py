@@ -1,15 +1,58 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.decorators import action
-from .models import Kanban, KanbanColumnOrder, KanbanCard, KanbanColumn
-from .serializers import KanbanSerializer, KanbanColumnSerializer, KanbanColumnOrderSerializer, KanbanCardSerializer
+from .models import (
+    Kanban, KanbanColumnOrder, KanbanCard, KanbanCardArquivado, KanbanColumn, KanbanDesatualizado, KanbanMovimentacao,
+    MARGEM_SINCRONIZACAO, COLUNAS_PADRAO, COLUNAS_TERMINAIS, OPERACOES_EM_LOTE, DURACAO_VISITA,
+)
+from imovel.models import Imovel
+from .analise import analisar_funil
+from .compatibilidade import indice_imoveis
+from .rotas import otimizar_rota
+from .serializers import (
+    KanbanSerializer, KanbanColumnSerializer, KanbanColumnOrderSerializer, KanbanCardSerializer,
+    KanbanCardArquivadoSerializer,
+)
 from django.shortcuts import get_object_or_404
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import AuthenticationFailed, PermissionDenied
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from .eventos import broker, fluxo_eventos
+from .agendador import agendador_transicoes
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time, timedelta
 
 User = get_user_model()
 
 
+def ler_data_hora(valor, aceitar_data=False):
+    """
+    Converte um parâmetro em data e hora ISO; com `aceitar_data`, uma data simples vale o início do dia.
+    Valores com fuso horário são convertidos para o horário local sem fuso, usado pelo banco
+    (USE_TZ=False). Retorna None se o valor for ausente ou inválido.
+    """
+    if not valor or not isinstance(valor, str):
+        return None
+    try:
+        data = parse_datetime(valor)
+        if data is None and aceitar_data:
+            data_simples = parse_date(valor)
+            data = datetime.combine(data_simples, time.min) if data_simples else None
+        if data is not None and timezone.is_aware(data) and not settings.USE_TZ:
+            data = timezone.make_naive(data)
+    except (ValueError, OverflowError):
+        return None
+    return data
+
+
 class KanbanViewSet(viewsets.ViewSet):
 
     """
@@ -18,62 +61,138 @@ class KanbanViewSet(viewsets.ViewSet):
     """
 
     permission_classes = [IsAuthenticated]
+    max_limite = 500  # Máximo de cards por coluna em uma página
     
     def retrieve(self, request, pk=None):
-        # Obtém o usuário pelo ID (`pk` recebido na URL)
-        user = get_object_or_404(User, pk=pk)
+        # Obtém o ID do Kanban associado ao usuário (`pk` recebido na URL)
+        kanban_id = self._obter_kanban_id(pk)
 
-        # Obtém o Kanban associado ao usuário
-        kanban = get_object_or_404(Kanban, usuario=user)
-
-        # Serializa o Kanban, incluindo as colunas e os cards
-        serializer = KanbanSerializer(kanban)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Serializa o Kanban, incluindo as colunas e os cards, apenas quando não houver versão atual em cache
+        dados = Kanban.obter_em_cache(
+            kanban_id, 'completo', lambda: KanbanSerializer(Kanban.objects.get(pk=kanban_id)).data
+        )
+        return Response(dados, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=['get'])
     def colunas_e_cards(self, request, pk=None):
         """
         Endpoint para retornar as colunas e os cards associados ao Kanban do usuário.
+        Cada coluna traz até `limite` cards; o restante é obtido em `mais_cards` usando `proximo_cursor`.
         """
-        user = get_object_or_404(User, pk=pk)
-
-        # Obtém o Kanban associado ao usuário
-        kanban = get_object_or_404(Kanban, usuario=user)
+        # Obtém o ID do Kanban associado ao usuário
+        kanban_id = self._obter_kanban_id(pk)
+
+        limite = self._obter_limite(request)
+        if limite is None:
+            return Response({'error': f'O parâmetro `limite` deve estar entre 1 e {self.max_limite}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Cursor para as consultas seguintes em `alteracoes`, obtido antes da leitura e fora do cache,
+        # pois uma resposta em cache continua atual enquanto a versão do Kanban não muda
+        cursor = timezone.now() - MARGEM_SINCRONIZACAO
+
+        def montar_resposta():
+            kanban = Kanban.objects.get(pk=kanban_id)
+
+            # Monta a resposta com informações do Kanban, colunas e cards
+            return {
+                "kanban": {
+                    "id": kanban.id,
+                    "nome": kanban.nome,
+                    "descricao": kanban.descricao,
+                    "ultima_atualizacao": kanban.ultima_atualizacao,
+                },
+                "colunas": kanban.montar_snapshot(limite_por_coluna=limite),
+            }
 
-        # Otimiza a consulta para buscar todas as colunas e os cards relacionados
-        colunas = KanbanColumnOrder.objects.filter(kanban=kanban).select_related('coluna')
-        cards = KanbanCard.objects.filter(coluna__in=[coluna.coluna for coluna in colunas])
-
-        # Monta a resposta com informações do Kanban, colunas e cards
         response_data = {
-            "kanban": {
-                "id": kanban.id,
-                "nome": kanban.nome,
-                "descricao": kanban.descricao,
-                "ultima_atualizacao": kanban.ultima_atualizacao,
-            },
-            "colunas": [
-                {
-                    "id": coluna.coluna.id,
-                    "nome": coluna.coluna.nome,
-                    "posicao": coluna.posicao,
-                    "prazo_alerta": coluna.coluna.prazo_alerta,
-                    "cards": [
-                        {
-                            "id": card.id,
-                            "lead_nome": card.lead_nome,
-                            "descricao": card.descricao,
-                            "data_prazo": card.data_prazo,
-                            "cor_atual": card.cor_atual
-                        }
-                        for card in cards if card.coluna.id == coluna.coluna.id
-                    ]
-                }
-                for coluna in colunas
-            ]
+            **Kanban.obter_em_cache(kanban_id, f'colunas_e_cards:{limite}', montar_resposta),
+            "cursor": cursor,
         }
-
         return Response(response_data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def mais_cards(self, request, pk=None):
+        """
+        Carrega a próxima página de cards de uma coluna do Kanban do usuário.
+        Recebe `coluna` (ID da coluna), `cursor` (retornado na página anterior) e `limite`.
+        """
+        kanban = get_object_or_404(Kanban, usuario_id=pk)
+
+        limite = self._obter_limite(request)
+        try:
+            coluna_id = int(request.query_params.get('coluna'))
+        except (TypeError, ValueError):
+            return Response({'error': 'O parâmetro `coluna` deve ser um inteiro.'}, status=status.HTTP_400_BAD_REQUEST)
+        if limite is None:
+            return Response({'error': f'O parâmetro `limite` deve estar entre 1 e {self.max_limite}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if not KanbanColumnOrder.objects.filter(kanban=kanban, coluna_id=coluna_id).exists():
+            return Response({'error': 'A coluna informada não pertence a este Kanban.'}, status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            cards, proximo_cursor = Kanban.carregar_mais_cards(
+                coluna_id, cursor=request.query_params.get('cursor'), limite=limite
+            )
+        except ValueError:
+            return Response({'error': 'O parâmetro `cursor` é inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"coluna": coluna_id, "cards": cards, "proximo_cursor": proximo_cursor}, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def alteracoes(self, request, pk=None):
+        """
+        Retorna apenas as colunas e os cards criados, alterados ou removidos após `since`
+        (o `cursor` devolvido na consulta anterior). Quando `completo` é verdadeiro o
+        cursor expirou e o quadro deve ser recarregado por `colunas_e_cards`.
+        """
+        kanban = get_object_or_404(Kanban, usuario_id=pk)
+
+        desde = ler_data_hora(request.query_params.get('since'))
+        if desde is None:
+            return Response({'error': 'O parâmetro `since` deve ser uma data e hora válida.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(kanban.alteracoes_desde(desde), status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['put'])
+    def campos_promovidos(self, request, pk=None):
+        """
+        Define os campos de `dados_adicionais` promovidos do Kanban do usuário, que passam a
+        ter filtro e ordenação indexados, e reconstrói os atributos dos cards existentes.
+        Recebe `campos`, uma lista de objetos com `chave` e `tipo` ('texto' ou 'numero').
+        """
+        kanban = get_object_or_404(Kanban, usuario_id=pk)
+
+        campos = request.data.get('campos')
+        valido = isinstance(campos, list) and all(
+            isinstance(campo, dict)
+            and isinstance(campo.get('chave'), str) and 0 < len(campo['chave']) <= 50
+            and campo.get('tipo', 'texto') in ('texto', 'numero')
+            for campo in campos
+        )
+        if not valido or len({campo['chave'] for campo in campos}) != len(campos):
+            return Response({'error': 'O campo `campos` deve ser uma lista de objetos com `chave` única e `tipo` '
+                                      '(\'texto\' ou \'numero\').'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        kanban.campos_promovidos = [{'chave': campo['chave'], 'tipo': campo.get('tipo', 'texto')} for campo in campos]
+        kanban.save(update_fields=['campos_promovidos', 'ultima_atualizacao'])
+        atributos = kanban.sincronizar_atributos()
+        return Response({'campos': kanban.campos_promovidos, 'atributos': atributos}, status=status.HTTP_200_OK)
+
+    def _obter_kanban_id(self, usuario_id):
+        kanban_id = Kanban.objects.filter(usuario_id=usuario_id).values_list('id', flat=True).first()
+        if kanban_id is None:
+            raise Http404('Kanban não encontrado.')
+        return kanban_id
+
+    def _obter_limite(self, request):
+        try:
+            limite = int(request.query_params.get('limite', Kanban.LIMITE_CARDS_POR_COLUNA))
+        except ValueError:
+            return None
+        return limite if 1 <= limite <= self.max_limite else None
     
 
 class KanbanColumnViewSet(viewsets.ModelViewSet):
@@ -127,6 +246,374 @@ class KanbanColumnViewSet(viewsets.ModelViewSet):
 
 
 
+class KanbanCardViewSet(viewsets.ModelViewSet):
+    """
+    ViewSet para criar, atualizar e mover os cards do Kanban.
+    """
+    queryset = KanbanCard.objects.all()
+    serializer_class = KanbanCardSerializer
+    permission_classes = [IsAuthenticated]
+
+    max_resultados_busca = 50
+    max_cards_lote = 500
+    max_imoveis_compativeis = 50
+    max_dias_agenda = 31
+    max_paradas_rota = 50
+
+    @action(detail=False, methods=['get'])
+    def buscar(self, request):
+        """
+        Busca leads pelo início do nome ou pelo telefone/e-mail exatos.
+        Recebe `q` e, opcionalmente, `kanban_id`; sem ele a busca abrange todos os Kanbans
+        (somente administradores).
+        """
+        termo = request.query_params.get('q', '').strip()
+        if len(termo) < 2:
+            return Response({'error': 'O parâmetro `q` deve ter ao menos 2 caracteres.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        kanban_id = request.query_params.get('kanban_id')
+        if kanban_id:
+            kanban_id = get_object_or_404(Kanban, pk=kanban_id).pk
+        elif not request.user.is_staff:
+            return Response({'error': 'Apenas administradores podem buscar em todos os Kanbans.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        cards = KanbanCard.buscar(termo, kanban_id=kanban_id)[:self.max_resultados_busca]
+        return Response(self.get_serializer(cards, many=True).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def filtrar(self, request):
+        """
+        Filtra e ordena os cards de um Kanban pelos campos promovidos de `dados_adicionais`.
+        Recebe `kanban_id`, filtros no formato `dados.<chave>=valor` (ou `dados.<chave>__gte`,
+        `__lte` e `__startswith`) e `ordenar=<chave>` (ou `-<chave>`). O resultado é paginado.
+        """
+        kanban = get_object_or_404(Kanban, pk=request.query_params.get('kanban_id'))
+
+        filtros = []
+        for parametro, valor in request.query_params.items():
+            if not parametro.startswith('dados.'):
+                continue
+            chave, _, operador = parametro[len('dados.'):].partition('__')
+            operador = operador or 'exact'
+            if operador not in ('exact', 'gte', 'lte', 'startswith'):
+                return Response({'error': f'Operador `{operador}` inválido.'}, status=status.HTTP_400_BAD_REQUEST)
+            filtros.append((chave, operador, valor))
+
+        try:
+            cards = kanban.filtrar_cards(filtros, ordenar=request.query_params.get('ordenar'))
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        pagina = self.paginate_queryset(cards)
+        return self.get_paginated_response(self.get_serializer(pagina, many=True).data)
+
+    @action(detail=False, methods=['get'])
+    def agenda(self, request):
+        """
+        Lista as visitas agendadas entre `inicio` e `fim` (data ou data e hora ISO, até 31 dias).
+        Recebe `usuario_id` (corretor dono do Kanban) e/ou `imovel_id`; sem nenhum deles, lista a
+        agenda do próprio usuário. Visitas que se sobrepõem são marcadas com `conflito`.
+        """
+        inicio = ler_data_hora(request.query_params.get('inicio'), aceitar_data=True)
+        fim = ler_data_hora(request.query_params.get('fim'), aceitar_data=True)
+        if inicio is None or fim is None or not inicio < fim <= inicio + timedelta(days=self.max_dias_agenda):
+            return Response({'error': f'Informe `inicio` e `fim` válidos, com até {self.max_dias_agenda} dias de intervalo.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        usuario_id = request.query_params.get('usuario_id')
+        imovel_id = request.query_params.get('imovel_id')
+        if usuario_id:
+            usuario_id = get_object_or_404(User, pk=usuario_id).pk
+        if imovel_id:
+            imovel_id = get_object_or_404(Imovel, pk=imovel_id).pk
+        if not usuario_id and not imovel_id:
+            usuario_id = request.user.pk
+
+        visitas = list(KanbanCard.agenda(inicio, fim, usuario_id=usuario_id or None, imovel_id=imovel_id or None))
+
+        # Varredura em ordem de horário: cada visita é comparada com o maior fim visto até ela
+        conflitos = set()
+        maior_fim, ultima = None, None
+        for visita in visitas:
+            if maior_fim is not None and visita.data_visita < maior_fim:
+                conflitos.update((ultima.pk, visita.pk))
+            if maior_fim is None or visita.data_visita + DURACAO_VISITA > maior_fim:
+                maior_fim, ultima = visita.data_visita + DURACAO_VISITA, visita
+
+        return Response([
+            {
+                'id': visita.pk,
+                'lead_nome': visita.lead_nome,
+                'data_visita': visita.data_visita,
+                'fim_visita': visita.data_visita + DURACAO_VISITA,
+                'coluna': visita.coluna.nome,
+                'imovel_id': visita.imovel_id,
+                'imovel': visita.imovel.nome if visita.imovel else None,
+                'conflito': visita.pk in conflitos,
+            }
+            for visita in visitas
+        ], status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def rota(self, request):
+        """
+        Sugere a ordem das visitas de um dia do corretor a partir das coordenadas dos imóveis.
+        Recebe `data` (AAAA-MM-DD) e, opcionalmente, `usuario_id` (padrão: o próprio usuário),
+        `inicio` (data e hora de início da rota; padrão: a primeira visita do dia) e o ponto de
+        partida `origem_lat`/`origem_lng`. Visitas com `dados_adicionais.horario_fixo` verdadeiro
+        mantêm o horário marcado; visitas sem imóvel com coordenadas são listadas em `sem_coordenadas`.
+        """
+        try:
+            dia = parse_date(request.query_params.get('data') or '')
+        except ValueError:
+            dia = None
+        if dia is None:
+            return Response({'error': 'O parâmetro `data` deve ser uma data válida (AAAA-MM-DD).'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            origem = None
+            if request.query_params.get('origem_lat') or request.query_params.get('origem_lng'):
+                origem = (float(request.query_params['origem_lat']), float(request.query_params['origem_lng']))
+        except (KeyError, ValueError):
+            return Response({'error': 'Os parâmetros `origem_lat` e `origem_lng` devem ser números.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        usuario_id = request.query_params.get('usuario_id')
+        usuario_id = get_object_or_404(User, pk=usuario_id).pk if usuario_id else request.user.pk
+
+        inicio_dia = datetime.combine(dia, time.min)
+        visitas = KanbanCard.agenda(inicio_dia, inicio_dia + timedelta(days=1), usuario_id=usuario_id)
+        paradas, sem_coordenadas = [], []
+        for visita in visitas:
+            if visita.imovel is None or visita.imovel.latitude is None or visita.imovel.longitude is None:
+                sem_coordenadas.append(visita.pk)
+                continue
+            dados = visita.dados_adicionais if isinstance(visita.dados_adicionais, dict) else {}
+            paradas.append({
+                'id': visita.pk,
+                'latitude': float(visita.imovel.latitude),
+                'longitude': float(visita.imovel.longitude),
+                'horario': visita.data_visita,
+                'fixo': dados.get('horario_fixo') is True,
+            })
+        if len(paradas) > self.max_paradas_rota:
+            return Response({'error': f'A rota aceita no máximo {self.max_paradas_rota} visitas por dia.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        inicio = ler_data_hora(request.query_params.get('inicio'), aceitar_data=True)
+        if inicio is None:
+            inicio = min((parada['horario'] for parada in paradas), default=inicio_dia)
+
+        rota = otimizar_rota(paradas, inicio, origem=origem)
+        rota['sem_coordenadas'] = sem_coordenadas
+        return Response(rota, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['post'])
+    def mover(self, request, pk=None):
+        """
+        Move o card para uma coluna do mesmo Kanban, entre os cards `anterior_id` e `seguinte_id`.
+        Recebe `coluna_id` e, opcionalmente, `anterior_id` e `seguinte_id`.
+        A validação dos campos obrigatórios da coluna e a gravação do card ocorrem na mesma transação.
+        """
+        try:
+            coluna_id = int(request.data.get('coluna_id'))
+            anterior_id = request.data.get('anterior_id')
+            anterior_id = int(anterior_id) if anterior_id not in (None, '') else None
+            seguinte_id = request.data.get('seguinte_id')
+            seguinte_id = int(seguinte_id) if seguinte_id not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'Os campos `coluna_id`, `anterior_id` e `seguinte_id` devem ser inteiros.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            card = get_object_or_404(KanbanCard.objects.select_for_update(), pk=pk)
+            coluna = get_object_or_404(KanbanColumn, pk=coluna_id)
+
+            mesmo_kanban = KanbanColumnOrder.objects.filter(
+                coluna=coluna, kanban__colunas__coluna_id=card.coluna_id
+            ).exists()
+            if not mesmo_kanban:
+                return Response({'error': 'A coluna de destino não pertence ao Kanban do card.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            try:
+                card.mover(coluna, anterior_id=anterior_id, seguinte_id=seguinte_id)
+            except ValidationError as e:
+                transaction.set_rollback(True)
+                return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(self.get_serializer(card).data, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['get'])
+    def imoveis_compativeis(self, request, pk=None):
+        """
+        Retorna os imóveis disponíveis mais compatíveis com os critérios do lead
+        (`dados_adicionais`), da maior para a menor pontuação. Recebe, opcionalmente, `limite`.
+        """
+        card = self.get_object()
+        limite = self._obter_limite_compatibilidade(request)
+        if limite is None:
+            return Response({'error': f'O parâmetro `limite` deve estar entre 1 e {self.max_imoveis_compativeis}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(indice_imoveis.compativeis(card.dados_adicionais, limite=limite), status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def compatibilidade(self, request):
+        """
+        Retorna os imóveis compatíveis de todos os leads em aberto (fora das colunas finais) de um Kanban,
+        como um dicionário ID do card -> imóveis. Recebe `kanban_id`; sem ele, processa todos os Kanbans
+        (somente administradores). Recebe, opcionalmente, `limite` por lead.
+        """
+        cards = KanbanCard.objects.exclude(coluna__nome__in=COLUNAS_TERMINAIS).only('id', 'dados_adicionais')
+        kanban_id = request.query_params.get('kanban_id')
+        if kanban_id:
+            kanban = get_object_or_404(Kanban, pk=kanban_id)
+            cards = cards.filter(coluna_id__in=KanbanColumnOrder.objects.filter(kanban=kanban).values('coluna_id'))
+        elif not request.user.is_staff:
+            return Response({'error': 'Apenas administradores podem processar todos os Kanbans.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        limite = self._obter_limite_compatibilidade(request)
+        if limite is None:
+            return Response({'error': f'O parâmetro `limite` deve estar entre 1 e {self.max_imoveis_compativeis}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(indice_imoveis.compativeis_em_lote(cards, limite=limite), status=status.HTTP_200_OK)
+
+    def _obter_limite_compatibilidade(self, request):
+        try:
+            limite = int(request.query_params.get('limite', 10))
+        except ValueError:
+            return None
+        return limite if 1 <= limite <= self.max_imoveis_compativeis else None
+
+    @action(detail=False, methods=['post'])
+    def em_lote(self, request):
+        """
+        Aplica uma operação a vários cards de um Kanban.
+        Recebe `kanban_id`, `card_ids` e `operacao` (`mover`, com `coluna_id`; `arquivar`; ou `imovel`,
+        com `imovel_id`, que pode ser nulo). Retorna o resultado de cada card: os cards que não
+        atendem às regras da coluna de destino são informados com os seus erros e não são alterados.
+        """
+        operacao = request.data.get('operacao')
+        if operacao not in OPERACOES_EM_LOTE:
+            return Response({'error': f"O campo `operacao` deve ser um de: {', '.join(OPERACOES_EM_LOTE)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            kanban_id = int(request.data.get('kanban_id'))
+            coluna_id = int(request.data.get('coluna_id')) if operacao == 'mover' else None
+            imovel_id = request.data.get('imovel_id') if operacao == 'imovel' else None
+            imovel_id = int(imovel_id) if imovel_id is not None else None
+        except (TypeError, ValueError):
+            return Response({'error': 'Os campos `kanban_id`, `coluna_id` e `imovel_id` devem ser inteiros.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        kanban = get_object_or_404(Kanban, pk=kanban_id)
+
+        card_ids = request.data.get('card_ids')
+        try:
+            card_ids = [int(card_id) for card_id in card_ids]
+        except (TypeError, ValueError):
+            return Response({'error': 'O campo `card_ids` deve ser uma lista de inteiros.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not card_ids or len(card_ids) > self.max_cards_lote:
+            return Response({'error': f'Informe de 1 a {self.max_cards_lote} cards.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        coluna = get_object_or_404(KanbanColumn, pk=coluna_id) if coluna_id is not None else None
+        imovel = get_object_or_404(Imovel, pk=imovel_id) if imovel_id is not None else None
+
+        try:
+            resultados = KanbanCard.operar_em_lote(kanban, card_ids, operacao, coluna=coluna, imovel=imovel)
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        # As gravações em lote não disparam os sinais dos cards
+        transaction.on_commit(broker.notificar)
+        transaction.on_commit(agendador_transicoes.avisar)
+        sucessos = sum(resultado['sucesso'] for resultado in resultados)
+        return Response({
+            'sucessos': sucessos,
+            'falhas': len(resultados) - sucessos,
+            'resultados': resultados,
+        }, status=status.HTTP_200_OK)
+
+
+class KanbanCardArquivadoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Consulta paginada dos cards arquivados de um Kanban, do arquivamento mais recente ao mais antigo.
+    Recebe `kanban_id`; sem ele, lista os cards de todos os Kanbans (somente administradores).
+    """
+    serializer_class = KanbanCardArquivadoSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        cards = KanbanCardArquivado.objects.order_by('-data_arquivamento', '-id')
+        kanban_id = self.request.query_params.get('kanban_id')
+        if kanban_id:
+            return cards.filter(kanban=get_object_or_404(Kanban, pk=kanban_id))
+        if not self.request.user.is_staff:
+            raise PermissionDenied('Apenas administradores podem consultar os cards arquivados de todos os Kanbans.')
+        return cards
+
+
+class FunilKanbanViewSet(viewsets.ViewSet):
+    """
+    ViewSet com a análise de funil do Kanban: tempo em cada etapa e conversão entre etapas.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def list(self, request):
+        """
+        Recebe `kanban_id` para analisar um Kanban; sem ele, analisa todos os Kanbans
+        (somente administradores). `desde` limita a análise às movimentações a partir da data.
+        A conversão entre duas etapas conta os cards que entraram na segunda depois da primeira,
+        e `cards_atuais` não inclui os cards arquivados.
+        """
+        kanban_id = request.query_params.get('kanban_id')
+        if kanban_id:
+            kanban = get_object_or_404(Kanban, pk=kanban_id)
+            movimentacoes = KanbanMovimentacao.objects.filter(kanban=kanban)
+            ordem_etapas = list(
+                KanbanColumnOrder.objects.filter(kanban=kanban).order_by('posicao').values_list('coluna__nome', flat=True)
+            )
+        elif request.user.is_staff:
+            movimentacoes = KanbanMovimentacao.objects.all()
+            ordem_etapas = [nome for nome, _posicao, _campos in COLUNAS_PADRAO]
+        else:
+            return Response({'error': 'Apenas administradores podem analisar todos os Kanbans.'},
+                            status=status.HTTP_403_FORBIDDEN)
+
+        desde = request.query_params.get('desde')
+        if desde:
+            desde = ler_data_hora(desde)
+            if desde is None:
+                return Response({'error': 'O parâmetro `desde` deve ser uma data e hora válida.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            movimentacoes = movimentacoes.filter(data__gte=desde)
+
+        return Response(analisar_funil(movimentacoes, ordem_etapas), status=status.HTTP_200_OK)
+
+
+class PainelGestorViewSet(viewsets.ViewSet):
+    """
+    Visão geral dos Kanbans de todos os corretores, para gestores: cards e alertas por etapa,
+    por corretor e por coluna, e os cards em alerta há mais tempo.
+    """
+    permission_classes = [IsAdminUser]
+    max_urgentes = 100
+
+    def list(self, request):
+        """Recebe, opcionalmente, `urgentes` (quantidade de cards urgentes, padrão 20)."""
+        try:
+            limite = int(request.query_params.get('urgentes', 20))
+        except ValueError:
+            limite = None
+        if limite is None or not 0 <= limite <= self.max_urgentes:
+            return Response({'error': f'O parâmetro `urgentes` deve estar entre 0 e {self.max_urgentes}.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(Kanban.visao_geral(limite_urgentes=limite), status=status.HTTP_200_OK)
+
+
 class KanbanColumnOrderViewSet(viewsets.ViewSet):
     """
     ViewSet para criar, atualizar e listar colunas de um Kanban.
@@ -185,6 +672,38 @@ class KanbanColumnOrderViewSet(viewsets.ViewSet):
         serializer = KanbanColumnOrderSerializer(colunas, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
+    @action(detail=False, methods=['put'])
+    def reordenar(self, request):
+        """
+        Aplica a ordem completa das colunas de um Kanban em uma única operação.
+        Recebe o ID do Kanban, a lista `colunas` com os IDs de todas as colunas na nova ordem
+        e a `versao` (`ultima_atualizacao` do Kanban) sobre a qual a ordem foi montada.
+        Retorna 409 se o Kanban foi alterado desde essa versão.
+        """
+        kanban = get_object_or_404(Kanban, pk=request.data.get('kanban_id'))
+
+        colunas = request.data.get('colunas')
+        versao = request.data.get('versao')
+        versao = ler_data_hora(versao)
+        try:
+            colunas_ids = [int(coluna_id) for coluna_id in colunas]
+        except (TypeError, ValueError):
+            colunas_ids = None
+        if colunas_ids is None or versao is None:
+            return Response({'error': 'Os campos `colunas` (lista de IDs) e `versao` são obrigatórios.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            nova_versao = KanbanColumnOrder.reordenar_colunas(kanban, colunas_ids, versao)
+        except KanbanDesatualizado as e:
+            kanban.refresh_from_db(fields=['ultima_atualizacao'])
+            return Response({'error': e.messages, 'versao': kanban.ultima_atualizacao}, status=status.HTTP_409_CONFLICT)
+        except ValidationError as e:
+            return Response({'error': e.messages}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = KanbanColumnOrderSerializer(KanbanColumnOrder.objects.filter(kanban=kanban), many=True)
+        return Response({'versao': nova_versao, 'colunas': serializer.data}, status=status.HTTP_200_OK)
+
     @action(detail=True, methods=['get'])
     def listar_cards(self, request, pk=None):
         """
@@ -192,7 +711,7 @@ class KanbanColumnOrderViewSet(viewsets.ViewSet):
         Recebe um ID de coluna.
         """
         coluna = get_object_or_404(KanbanColumnOrder, pk=pk)
-        cards = KanbanCard.objects.filter(coluna=coluna.coluna)
+        cards = KanbanCard.objects.filter(coluna=coluna.coluna).order_by('rank', 'id')
         serializer = KanbanCardSerializer(cards, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -273,3 +792,43 @@ class KanbanColumnOrderViewSet(viewsets.ViewSet):
        
 
         return Response({'message': 'Coluna removida com sucesso.'}, status=status.HTTP_204_NO_CONTENT)
+
+
+def autenticar_token(request):
+    """
+    Autentica a requisição pelo cabeçalho Authorization ou pelo parâmetro `token`,
+    já que o EventSource do navegador não permite enviar cabeçalhos.
+    Retorna o usuário ou None.
+    """
+    autenticacao = JWTAuthentication()
+    header = autenticacao.get_header(request)
+    token = autenticacao.get_raw_token(header) if header else request.GET.get('token')
+    if not token:
+        return None
+    try:
+        return autenticacao.get_user(autenticacao.get_validated_token(token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+async def eventos_kanban(request, pk):
+    """
+    Endpoint de server-sent events com as alterações do Kanban do usuário `pk`.
+    Recebe opcionalmente `since` (o cursor de `colunas_e_cards`) para não perder as
+    alterações feitas entre a carga do quadro e a abertura da conexão.
+    Cada conexão é uma corrotina; nenhuma thread fica presa enquanto o cliente aguarda.
+    """
+    usuario = await sync_to_async(autenticar_token)(request)
+    if usuario is None or not usuario.is_active:
+        return JsonResponse({'error': 'Credenciais de autenticação inválidas.'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    kanban = await Kanban.objects.filter(usuario_id=pk).only('id').afirst()
+    if kanban is None:
+        return JsonResponse({'error': 'Kanban não encontrado.'}, status=status.HTTP_404_NOT_FOUND)
+
+    desde = ler_data_hora(request.GET.get('since'))
+
+    resposta = StreamingHttpResponse(fluxo_eventos(kanban.id, desde), content_type='text/event-stream')
+    resposta['Cache-Control'] = 'no-cache'
+    resposta['X-Accel-Buffering'] = 'no'  # Desativa o buffer de proxies como o nginx
+    return resposta
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import Usuario
 
 class UsuarioSerializer(serializers.ModelSerializer):
@@ -11,4 +12,16 @@ class UsuarioSerializer(serializers.ModelSerializer):
 
     def get_permissoes(self, obj):
         # Retorna todas as permissões do usuário
-        return list(obj.get_all_permissions())
\ No newline at end of file
+        return list(obj.get_all_permissions())
+
+
+class UsuarioLoteSerializer(serializers.Serializer):
+    """
+    Dados de um usuário na importação em lote. A unicidade do `username` é conferida
+    para o lote inteiro na view, em uma única consulta.
+    """
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    email = serializers.EmailField(required=False, allow_blank=True, default='')
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    password = serializers.CharField(write_only=True, required=False)
@@ -3,6 +3,7 @@ from django.contrib.auth.models import Permission
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
 from usuario.models import Usuario
+from kanban.models import Kanban
 from rest_framework.authtoken.models import Token
 
 class UsuarioViewSetTest(APITestCase):
@@ -127,3 +128,36 @@ class UsuarioViewSetTest(APITestCase):
         self.assertIsInstance(permissoes, list)
         self.assertIn('usuario.change_usuario', permissoes)  # Ajuste para verificar permissões específicas
 
+    def test_importar_usuarios(self):
+        """Testa a importação em lote, que cria os usuários e os seus Kanbans padrão."""
+        self.authenticate_as('admin')
+        url = reverse('usuario-importar')
+        data = [
+            {'username': f'corretor{indice}', 'email': f'corretor{indice}@example.com', 'password': 'senha123'}
+            for indice in range(5)
+        ]
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 5)
+        usuario = Usuario.objects.get(username='corretor0')
+        self.assertTrue(usuario.check_password('senha123'))
+        self.assertEqual(Kanban.objects.filter(usuario__username__startswith='corretor').count(), 5)
+        self.assertEqual(usuario.kanban.colunas.count(), 8)
+
+    def test_importar_usuarios_repetidos(self):
+        """Testa se usernames existentes ou repetidos no lote são rejeitados sem criar nenhum usuário."""
+        self.authenticate_as('admin')
+        url = reverse('usuario-importar')
+        data = [{'username': 'novo'}, {'username': 'novo'}, {'username': 'regularuser'}]
+        response = self.client.post(url, data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['usernames'], ['novo', 'regularuser'])
+        self.assertFalse(Usuario.objects.filter(username='novo').exists())
+
+    def test_regular_user_cannot_importar(self):
+        """Testa se usuários comuns não podem importar usuários."""
+        self.authenticate_as('regular')
+        response = self.client.post(reverse('usuario-importar'), [{'username': 'novo'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -1,10 +1,13 @@
-from rest_framework import viewsets
+from collections import Counter
+from rest_framework import viewsets, status
 from rest_framework import permissions
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import connection, transaction
 from usuario.models import Usuario
-from usuario.serializers import UsuarioSerializer
+from usuario.serializers import UsuarioSerializer, UsuarioLoteSerializer
 from rest_framework.decorators import action
+from kanban.models import criar_kanbans_padrao
 
 class UsuarioViewSet(viewsets.ModelViewSet):
 
@@ -37,3 +40,45 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     def me(self, request):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAdminUser])
+    def importar(self, request):
+        """
+        Cria vários usuários de uma vez, cada um com o seu Kanban padrão.
+        Recebe uma lista de usuários (`username`, `email`, `first_name`, `last_name` e `password`).
+        Usuários e Kanbans são gravados em lote, com um número fixo de consultas.
+        """
+        serializer = UsuarioLoteSerializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        dados = serializer.validated_data
+        if not dados:
+            return Response({'error': 'Informe ao menos um usuário.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        usernames = [usuario['username'] for usuario in dados]
+        repetidos = {username for username, quantidade in Counter(usernames).items() if quantidade > 1}
+        repetidos.update(Usuario.objects.filter(username__in=usernames).values_list('username', flat=True))
+        if repetidos:
+            return Response({'error': 'Os seguintes usernames já existem ou estão repetidos.', 'usernames': sorted(repetidos)},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        usuarios = []
+        for usuario_data in dados:
+            senha = usuario_data.pop('password', None)
+            usuario = Usuario(**usuario_data)
+            if senha:
+                usuario.set_password(senha)
+            else:
+                usuario.set_unusable_password()
+            usuarios.append(usuario)
+
+        with transaction.atomic():
+            usuarios = Usuario.objects.bulk_create(usuarios)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                usuarios = list(Usuario.objects.filter(username__in=usernames))
+            # bulk_create não dispara o post_save que cria o Kanban de cada usuário
+            criar_kanbans_padrao(usuarios)
+
+        return Response(
+            [{'id': usuario.id, 'username': usuario.username} for usuario in usuarios],
+            status=status.HTTP_201_CREATED
+        )